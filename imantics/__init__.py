@@ -1,7 +1,12 @@
 from .annotation import *
+from .basic import *
 from .category import *
 from .dataset import *
 from .styles import *
 from .image import *
 from .color import *
-
+from .metrics import *
+from .spatial import *
+from .query import *
+from .cache import *
+from .store import *
@@ -2,11 +2,13 @@ from lxml import etree as ET
 from lxml.builder import E
 import numpy as np
 import json
+import weakref
 import cv2
 
 from .color import Color
 from .styles import COCO
-from .basic import Semantic
+from .basic import Semantic, IdCounter
+from .cache import _Cached, geometry_cache
 
 
 class Annotation(Semantic):
@@ -17,6 +19,15 @@ class Annotation(Semantic):
     to manage and generate other annotations or export formats.
     """
 
+    #: Use the area enclosed by polygons as the area of annotations created from
+    #: polygons, which needs no rasterizing, instead of the number of pixels of
+    #: their mask
+    EXACT_POLYGON_AREA = False
+
+    _c_mask = _Cached('_c_mask', source='_init_with_mask')
+    _c_polygons = _Cached('_c_polygons', source='_init_with_polygons')
+    _c_rle = _Cached('_c_rle', source='_init_with_rle')
+
     @classmethod
     def from_mask(cls, mask, image=None, category=None):
         """
@@ -84,11 +95,79 @@ class Annotation(Semantic):
         """
         return cls(image=image, category=category, polygons=polygons)
 
+    @classmethod
+    def from_rle(cls, rle, image=None, category=None):
+        """
+        Creates annotation from a run-length encoding
+
+        :param image: image assoicated with annotation
+        :type image: :class:`Image`
+        :param category: category to label annotation
+        :type category: :class:`Category`
+        :param rle: run-length encoding to create annotation from
+        :type rle: :class:`RLE`, dict
+        """
+        return cls(image=image, category=category, rle=rle)
+
+    @classmethod
+    def from_coco(cls, coco, image=None, category=None):
+        """
+        Creates annotation from a dict in COCO formatted annotation
+
+        :param coco: COCO formatted annotation
+        :type coco: dict
+        :param image: image assoicated with annotation
+        :type image: :class:`Image`
+        :param category: category to label annotation
+        :type category: :class:`Category`
+        """
+        segmentation = coco.get('segmentation')
+        metadata = coco.get('metadata', {})
+
+        # color can be stored in the metadata
+        color = coco.get('color', metadata.get('color'))
+
+        # Crowd annotations are stored as run-length encodings
+        if isinstance(segmentation, dict):
+            return cls(image, category, rle=segmentation, color=color, metadata=metadata)
+
+        return cls(image, category, polygons=segmentation, color=color, metadata=metadata)
+
+    @classmethod
+    def _restore(cls, image, category, id, color, metadata, area, bbox, source_bbox=False, mask=None,
+                 polygons=None, rle=None):
+        """
+        Creates annotation of an image from already validated representations,
+        without going through ``__init__`` (used to load datasets in bulk). The
+        bounding box is only a source representation if source_bbox is set
+        """
+        annotation = cls.__new__(cls)
+        annotation.__dict__.update({
+            'image': image,
+            'width': image.width,
+            'height': image.height,
+            'category': category,
+            'color': color,
+            'id': id,
+            'metadata': metadata,
+            '_init_with_bbox': source_bbox,
+            '_init_with_mask': mask is not None,
+            '_init_with_polygons': polygons is not None,
+            '_init_with_rle': rle is not None,
+            '_c_bbox': bbox,
+            '_c_mask': mask,
+            '_c_polygons': polygons,
+            '_c_rle': rle,
+            '_c_area': area
+        })
+        return annotation
+
     def __init__(self, image=None, category=None, bbox=None, mask=None, polygons=None, id=0,\
-                 color=None, metadata={}, width=0, height=0):
+                 color=None, metadata={}, width=0, height=0, rle=None):
 
         assert isinstance(id, int), "id must be an integer"
-        assert bbox is not None or mask is not None or polygons is not None, "you must provide a mask, bbox or polygon"
+        assert bbox is not None or mask is not None or polygons is not None or rle is not None, \
+            "you must provide a mask, bbox, polygon or rle"
 
         self.image = image
         self.width = width
@@ -101,13 +180,24 @@ class Annotation(Semantic):
 
         self.category = category
         self.color = Color.create(color)
-        self._c_bbox = BBox.create(bbox)
-        self._c_mask = Mask.create(mask)
-        self._c_polygons = Polygons.create(polygons)
 
-        self._init_with_bbox = self._c_bbox is not None
-        self._init_with_mask = self._c_mask is not None
-        self._init_with_polygons = self._c_polygons is not None
+        bbox = BBox.create(bbox)
+        mask = Mask.create(mask)
+        polygons = Polygons.create(polygons)
+        rle = RLE.create(rle)
+
+        self._init_with_bbox = bbox is not None
+        self._init_with_mask = mask is not None
+        self._init_with_polygons = polygons is not None
+        self._init_with_rle = rle is not None
+
+        # Representations the annotation is created with are kept, generated
+        # masks, polygons and encodings are held by the geometry cache
+        self._c_bbox = bbox
+        self._c_mask = mask
+        self._c_polygons = polygons
+        self._c_rle = rle
+        self._c_area = None
 
         if (self.width + self.height) <= 0:
 
@@ -115,7 +205,10 @@ class Annotation(Semantic):
                 self.width, self.height = self._c_bbox.max_point
 
             if self._init_with_mask:
-                self.height, self.width = self._c_mask.array.shape
+                self.height, self.width = self._c_mask.shape
+
+            if self._init_with_rle:
+                self.width, self.height = self._c_rle.size
 
         super(Annotation, self).__init__(id, metadata)
 
@@ -124,17 +217,19 @@ class Annotation(Semantic):
         """
         :class:`Mask` representation of the annotations
         """
-        if not self._c_mask:
-
-            width = self.image.width
-            height = self.image.height
+        mask = self._c_mask
+        if mask is None:
 
             if self._init_with_polygons:
-                self._c_mask = self.polygons.mask(width=self.width, height=self.height)
+                mask = self.polygons.mask(width=self.width, height=self.height)
+            elif self._init_with_rle:
+                mask = self.rle.mask()
             else:
-                self._c_mask = self.bbox.mask(width=self.width, height=self.height)
+                mask = self.bbox.mask(width=self.width, height=self.height)
 
-        return self._c_mask
+            self._c_mask = mask
+
+        return mask
 
     @property
     def array(self):
@@ -148,13 +243,16 @@ class Annotation(Semantic):
         """
         :class:`Polygons` repsentation of the annotations
         """
-        if not self._c_polygons:
-            if self._init_with_mask:
-                self._c_polygons = self.mask.polygons()
+        polygons = self._c_polygons
+        if polygons is None:
+            if self._init_with_mask or self._init_with_rle:
+                polygons = self.mask.polygons()
             else:
-                self._c_polygons = self.bbox.polygons()
+                polygons = self.bbox.polygons()
 
-        return self._c_polygons
+            self._c_polygons = polygons
+
+        return polygons
 
     @property
     def bbox(self):
@@ -164,42 +262,129 @@ class Annotation(Semantic):
         if not self._c_bbox:
             if self._init_with_polygons:
                 self._c_bbox = self.polygons.bbox()
+            elif self._init_with_rle:
+                self._c_bbox = self.rle.bbox()
             else:
                 self._c_bbox = self.mask.bbox()
 
         return self._c_bbox
 
+    @property
+    def rle(self):
+        """
+        :class:`RLE` repsentation of the annotations
+        """
+        rle = self._c_rle
+        if rle is None:
+            rle = self._c_rle = self.mask.rle()
+
+        return rle
+
     @property
     def area(self):
         """
         Qantity that expresses the extent of a two-dimensional figure
+
+        This is the number of pixels of the annotation (an int). Annotations
+        created from polygons use the area enclosed by the polygons (a float)
+        instead if :attr:`EXACT_POLYGON_AREA` is set.
+        """
+        if self._c_area is None:
+            if self._init_with_rle:
+                self._c_area = self.rle.area()
+            elif self._init_with_polygons and self.EXACT_POLYGON_AREA:
+                self._c_area = self.polygons.area()
+            elif self._init_with_mask or self._init_with_polygons:
+                self._c_area = self.mask.area()
+            else:
+                self._c_area = self.bbox.area()
+
+        return self._c_area
+
+    def precompute(self, attributes=('polygons', 'bbox', 'area')):
         """
-        if self._init_with_mask or self._init_with_polygons:
-            return self.mask.area()
-        return self.bbox.area()
+        Generates and caches the given representations of the annotation
 
-    def index(self, image, dataset=None):
+        :param attributes: names of the representations to generate, any of
+                           ``mask``, ``polygons``, ``bbox``, ``rle`` and ``area``
+        :type attributes: list, tuple
+        """
+        for attribute in attributes:
+            getattr(self, attribute)
 
-        annotation_index = image.annotations
-        category_index = image.categories
+    def simplify(self, tolerance=1.0, max_vertices=None):
+        """
+        Simplifies the polygons of the annotation, see :meth:`Polygons.simplify`
 
-        if self.id < 1:
-            self.id = len(annotation_index) + 1
+        Polygons traced from a mask are kept as a representation of the
+        annotation, so the simplified polygons are exported instead of being
+        traced again.
 
-        # Increment index until not found
-        if dataset is None:
-            if annotation_index.get(self.id):
-                self.id = max(annotation_index.keys()) + 1
+        :returns: simplified :class:`Polygons`
+        """
+        polygons = self.polygons.simplify(tolerance, max_vertices)
+        self._set_polygons(polygons)
+        return polygons
 
-        else:
-            if dataset._max_ann_id is None:
-                if annotation_index.get(self.id):
-                    self.id = max(annotation_index.keys()) + 1
-                    dataset._max_ann_id = self.id
+    def _set_polygons(self, polygons):
+        """
+        Replaces the polygons of the annotation, clearing the representations
+        which were generated from the old polygons
+        """
+        if self._init_with_polygons:
+            if not self._init_with_mask:
+                self._c_mask = None
+            if not self._init_with_rle:
+                self._c_rle = None
+            if not (self._init_with_mask or self._init_with_rle):
+                self._c_area = None
+            if not self._init_with_bbox:
+                self._c_bbox = None
 
-            else:
-                dataset._max_ann_id += 1
-                self.id = dataset._max_ann_id
+        elif self._init_with_mask:
+            # Keep the bounding box of the mask
+            self.bbox
+            self._init_with_polygons = True
+
+        self._c_polygons = polygons
+
+    def _source(self):
+        """
+        Representations the annotation was created with, as keyword arguments
+        of :class:`Annotation`
+        """
+        source = {}
+        if self._init_with_bbox:
+            source['bbox'] = self._c_bbox
+        if self._init_with_mask:
+            source['mask'] = self._c_mask
+        if self._init_with_polygons:
+            source['polygons'] = self._c_polygons
+        if self._init_with_rle:
+            source['rle'] = self._c_rle
+        return source
+
+    def _missing(self, attributes):
+        """
+        Names of the representations in attributes which are not cached yet
+        """
+        return [attribute for attribute in attributes
+                if getattr(self, '_c_' + attribute) is None]
+
+    def index(self, image):
+        """
+        Adds the annotation to the index of an :class:`Image` or :class:`Dataset`.
+        The id of the annotation is kept unless it is already used by another
+        annotation, in which case the next free id is allocated
+
+        :type image: :class:`Image`, :class:`Dataset`
+        """
+        annotation_index = image.annotations
+        category_index = image.categories
+
+        if annotation_index.get(self.id) is not self:
+            requested = self.id if self.id > 0 else None
+            self.id = image.annotation_ids.allocate(requested, annotation_index)
 
         annotation_index[self.id] = self
 
@@ -263,6 +448,12 @@ class Annotation(Semantic):
         image_id = self.image.id if self.image else None
         category_id = self.category.id if self.category else None
 
+        # Run-length encodings are exported as crowd annotations
+        if self._init_with_rle:
+            segmentation = self.rle.coco()
+        else:
+            segmentation = self.polygons.segmentation
+
         annotation = {
             'id': self.id,
             'image_id': image_id,
@@ -270,21 +461,23 @@ class Annotation(Semantic):
             'width': self.width,
             'height': self.height,
             'area': int(self.area),
-            'segmentation': self.polygons.segmentation,
+            'segmentation': segmentation,
             'bbox': self.bbox.bbox(style=BBox.WIDTH_HEIGHT),
             'metadata': self.metadata,
             'color': self.color.hex,
-            'iscrowd': 0,
+            'iscrowd': int(self._init_with_rle),
             'isbbox': self._init_with_bbox
 
         }
 
         i = 0
-        while i < len(annotation['segmentation']):
+        while not self._init_with_rle and i < len(annotation['segmentation']):
             if len(annotation['segmentation'][i]) == 2:
                 # discard segmentation that is only a point
                 annotation['segmentation'].pop(i)
-            elif len(annotation['segmentation'][i]) == 4:
+                continue
+
+            if len(annotation['segmentation'][i]) == 4:
                 # create another point in the middle of segmentation to
                 # avoid bug when using pycocotools, which thinks that a
                 # 4 value segmentation mask is a bounding box
@@ -304,7 +497,8 @@ class Annotation(Semantic):
 
                 new_segmentation = polygon[:2] + [x, y] + polygon[2:]
                 annotation['segmentation'][i] = new_segmentation
-                i += 1
+
+            i += 1
 
         if include:
             image = category = {}
@@ -359,10 +553,6 @@ class Annotation(Semantic):
 
         return element
 
-    def save(self, file_path, style=COCO):
-        with open(file_path, 'w') as fp:
-            json.dump(self.export(style=style), fp)
-
 
 class BBox:
     """
@@ -422,8 +612,8 @@ class BBox:
         """
         return BBox((0, 0, 0, 0))
 
-    _c_polygons = None
-    _c_mask = None
+    _c_polygons = _Cached('_c_polygons')
+    _c_mask = _Cached('_c_mask')
 
     def __init__(self, bbox, style=None):
 
@@ -468,11 +658,12 @@ class BBox:
         :returns: Polygon representation
         :rtype: :class:`Polygons`
         """
-        if not self._c_polygons:
+        polygons = self._c_polygons
+        if polygons is None:
             polygon = self.top_left + self.top_right \
                     + self.bottom_right + self.bottom_left
             return Polygons([polygon])
-        return self._c_polygons
+        return polygons
 
     def mask(self, width=None, height=None):
         """
@@ -481,30 +672,39 @@ class BBox:
         :returns: Mask representation
         :rtype: :class:`Mask`
         """
-        if not self._c_mask:
+        mask = self._c_mask
+        if mask is None:
 
-            mask = np.zeros((height, width))
-            mask[self.min_point[1]:self.max_point[1], self.min_point[0]:self.max_point[0]] = 1
+            width = width if width else self._xmax
+            height = height if height else self._ymax
 
-            self._c_mask = Mask(mask)
+            # Only the region inside of the box is stored
+            x0, y0 = max(self._xmin, 0), max(self._ymin, 0)
+            x1, y1 = min(self._xmax, width), min(self._ymax, height)
 
-        return self._c_mask
+            local = np.ones((max(y1 - y0, 0), max(x1 - x0, 0)), dtype=bool)
+            mask = self._c_mask = Mask._cropped(local, (y0, x0), (height, width))
 
-    def draw(self, image, color=None, thickness=2):
+        return mask
+
+    def draw(self, image, color=None, thickness=2, inplace=False):
         """
         Draws a bounding box to the image array of shape (width, height, 3)
 
-        *This function modifies the image array*
+        *A copy of the image array is drawn on unless inplace is True*
 
         :param color: RGB color repersentation
         :type color: tuple, list
         :param thickness: pixel thickness of box
         :type thinkness: int
+        :param inplace: draw on the image array itself
+        :type inplace: bool
         """
         color = Color.create(color).rgb
-        image_copy = image.copy()
-        cv2.rectangle(image_copy, self.min_point, self.max_point, color, thickness)
-        return image_copy
+        if not inplace:
+            image = image.copy()
+        cv2.rectangle(image, self.min_point, self.max_point, color, thickness)
+        return image
 
     @property
     def min_point(self):
@@ -602,11 +802,196 @@ class BBox:
         return False
 
 
+class _BBoxView(BBox):
+    """
+    :class:`BBox` reading its coordinates from a row of a :class:`BBoxArray`
+    """
+
+    style = BBox.MIN_MAX
+
+    def __init__(self, row):
+        self._row = row
+
+    @property
+    def _xmin(self):
+        return int(self._row[0])
+
+    @property
+    def _ymin(self):
+        return int(self._row[1])
+
+    @property
+    def _xmax(self):
+        return int(self._row[2])
+
+    @property
+    def _ymax(self):
+        return int(self._row[3])
+
+    @property
+    def width(self):
+        return self._xmax - self._xmin
+
+    @property
+    def height(self):
+        return self._ymax - self._ymin
+
+    def polygons(self):
+        # Not cached, the row can change after the view is created
+        return BBox(self.bbox()).polygons()
+
+    def mask(self, width=None, height=None):
+        return BBox(self.bbox()).mask(width=width, height=height)
+
+
+class BBoxArray:
+    """
+    Collection of bounding boxes stored as a single (N, 4) array
+
+    Boxes are kept in :attr:`BBox.MIN_MAX` style and every operation is applied
+    to all boxes at once. Indexing with an integer returns a :class:`BBox` view
+    of that row.
+
+    Annotations keep their own :class:`BBox`, so an array created from them is
+    a copy; changing it does not move the annotations.
+    """
+
+    @classmethod
+    def from_annotations(cls, annotations, dtype=np.int32):
+        """
+        Creates :class:`BBoxArray` from a copy of the bounding boxes of annotations
+
+        :param annotations: annotations to collect bounding boxes from
+        :type annotations: list, generator
+        :returns: :class:`BBoxArray` repersentation
+        """
+        boxes = [annotation.bbox.bbox(style=BBox.MIN_MAX) for annotation in annotations]
+        return cls(boxes, dtype=dtype)
+
+    @classmethod
+    def create(cls, boxes, style=None):
+        """
+        Creates :class:`BBoxArray`
+
+        Recommend over the use of ``__init__``.
+        """
+        if isinstance(boxes, BBoxArray):
+            return boxes
+
+        if isinstance(boxes, BBox.INSTANCE_TYPES):
+            return BBoxArray(boxes, style=style)
+
+        return None
+
+    def __init__(self, boxes, style=None, dtype=None):
+        if len(boxes) > 0 and isinstance(boxes[0], BBox):
+            boxes = [box.bbox(style=BBox.MIN_MAX) for box in boxes]
+            style = BBox.MIN_MAX
+
+        array = np.asarray(boxes)
+        if dtype is None:
+            dtype = np.float32 if np.issubdtype(array.dtype, np.floating) else np.int32
+
+        self.array = np.array(array, dtype=dtype).reshape(-1, 4)
+
+        if style == BBox.WIDTH_HEIGHT:
+            self.array[:, 2:] += self.array[:, :2]
+
+    @property
+    def width(self):
+        return self.array[:, 2] - self.array[:, 0]
+
+    @property
+    def height(self):
+        return self.array[:, 3] - self.array[:, 1]
+
+    def area(self):
+        return self.width * self.height
+
+    def bbox(self, style=None):
+        """
+        Generates array repersentation of the bounding boxes
+
+        :param style: stlye to generate bounding boxes (defaults: MIN_MAX)
+        :returns: (N, 4) array of bounding boxes with specified style
+        :rtype: numpy.ndarray
+        """
+        if style == BBox.WIDTH_HEIGHT:
+            boxes = self.array.copy()
+            boxes[:, 2:] -= boxes[:, :2]
+            return boxes
+        return self.array
+
+    def clip(self, width, height):
+        """
+        Limits bounding boxes to an image of the given size
+
+        :returns: resulting :class:`BBoxArray`
+        """
+        boxes = self.array.copy()
+        np.clip(boxes[:, 0::2], 0, width, out=boxes[:, 0::2])
+        np.clip(boxes[:, 1::2], 0, height, out=boxes[:, 1::2])
+        return BBoxArray(boxes, dtype=self.array.dtype)
+
+    def scale(self, x, y=None):
+        """
+        Scales bounding boxes by the given factors
+
+        :param x: horizontal scale factor
+        :param y: vertical scale factor (defaults: x)
+        :returns: resulting :class:`BBoxArray`
+        """
+        y = x if y is None else y
+        boxes = self.array * np.array([x, y, x, y])
+
+        if np.issubdtype(self.array.dtype, np.integer):
+            boxes = boxes.round()
+
+        return BBoxArray(boxes, dtype=self.array.dtype)
+
+    def translate(self, x, y):
+        """
+        Moves bounding boxes by the given offset
+
+        :returns: resulting :class:`BBoxArray`
+        """
+        boxes = self.array + np.array([x, y, x, y], dtype=self.array.dtype)
+        return BBoxArray(boxes, dtype=self.array.dtype)
+
+    def __len__(self):
+        return len(self.array)
+
+    def __iter__(self):
+        for row in self.array:
+            yield _BBoxView(row)
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            return _BBoxView(self.array[key])
+        return BBoxArray(self.array[key], dtype=self.array.dtype)
+
+    def __eq__(self, other):
+        if isinstance(other, (np.ndarray, list)):
+            other = BBoxArray(other)
+
+        if isinstance(other, BBoxArray):
+            return np.array_equal(self.array, other.array)
+
+        return False
+
+    def __repr__(self):
+        return repr(self.array)
+
+
 class Polygons:
 
     #: Polygon instance types
     INSTANCE_TYPES = (list, tuple)
 
+    #: Pairs of polygons with more vertices than this together are compared
+    #: on a raster by :meth:`iou`, clipping them would take too long
+    EXACT_VERTICES = 20000
+
     @classmethod
     def from_mask(cls, mask):
         """
@@ -641,7 +1026,7 @@ class Polygons:
         return None
 
     _c_bbox = None
-    _c_mask = None
+    _c_mask = _Cached('_c_mask')
 
     _c_points = None
     _c_segmentation = None
@@ -656,18 +1041,37 @@ class Polygons:
         :returns: Mask representation
         :rtype: :class:`Mask`
         """
-        if not self._c_mask:
+        mask = self._c_mask
+        if mask is None:
+
+            bbox = self.bbox()
+            if not (width and height):
+                width, height = bbox._xmax + 1, bbox._ymax + 1
+
+            disk = geometry_cache.disk
+            if disk is not None:
+                key = disk.key('mask', (height, width), *self.points)
+                cached = disk.read_mask(key)
 
-            size = height, width if height and width else self.bbox().max_point
-            # Generate mask from polygons
+            if disk is not None and cached is not None:
+                mask = Mask._cropped(*cached)
+            else:
+                # Generate mask from polygons, only rasterizing inside of the bbox
+                x0, y0 = max(bbox._xmin, 0), max(bbox._ymin, 0)
+                x1, y1 = min(bbox._xmax + 1, width), min(bbox._ymax + 1, height)
+
+                local = np.zeros((max(y1 - y0, 0), max(x1 - x0, 0)), dtype=np.uint8)
+                if local.size > 0:
+                    local = cv2.fillPoly(local, [points - (x0, y0) for points in self.points], 1)
 
-            mask = np.zeros(size)
-            mask = cv2.fillPoly(mask, self.points, 1)
+                mask = Mask._cropped(local.astype(bool), (y0, x0), (height, width))
+                if disk is not None:
+                    disk.write_mask(key, mask.local, mask._origin, mask.shape)
 
-            self._c_mask = Mask(mask)
-            self._c_mask._c_polygons = self
+            self._c_mask = mask
+            mask._c_polygons = weakref.ref(self)
 
-        return self._c_mask
+        return mask
 
     def bbox(self):
         """
@@ -678,26 +1082,241 @@ class Polygons:
         """
         if not self._c_bbox:
 
-            y_min = x_min = float('inf')
-            y_max = x_max = float('-inf')
-
-            for point_list in self.points:
-                minx, miny = np.min(point_list, axis=0)
-                maxx, maxy = np.max(point_list, axis=0)
+            points = self.points
+            if sum(len(point_list) for point_list in points) == 0:
+                return BBox.empty()
 
-                y_min = min(miny, y_min)
-                x_min = min(minx, x_min)
-                y_max = max(maxy, y_max)
-                x_max = max(maxx, x_max)
+            points = np.concatenate(points)
+            x_min, y_min = points.min(axis=0)
+            x_max, y_max = points.max(axis=0)
 
             self._c_bbox = BBox((x_min, y_min, x_max, y_max))
-            self._c_bbox._c_polygons = self
+            self._c_bbox._c_polygons = weakref.ref(self)
 
         return self._c_bbox
 
-    def simplify(self):
-        # TODO: Write simplification algotherm
-        self._c_points = None
+    def _rings(self):
+        """
+        Vertices of all polygons as one (N, 2) float array and the start of
+        every polygon. Polygons with fewer than 3 vertices are left out
+        """
+        rings = [np.asarray(polygon, dtype=np.float64).reshape(-1, 2) for polygon in self.polygons]
+        rings = [ring for ring in rings if len(ring) >= 3]
+        if not rings:
+            return np.zeros((0, 2)), np.zeros(0, dtype=np.int64)
+
+        lengths = np.array([len(ring) for ring in rings])
+        return np.concatenate(rings), np.cumsum(lengths) - lengths
+
+    @staticmethod
+    def _edges(vertices, starts):
+        """
+        Start and end vertex of every edge, the last vertex of a polygon is
+        connected to its first
+        """
+        following = np.arange(1, len(vertices) + 1)
+        ends = np.append(starts[1:], len(vertices))
+        following[ends - 1] = starts
+        return vertices, vertices[following]
+
+    @staticmethod
+    def _crossings(points, a, b, starts=None, chunk=1 << 18):
+        """
+        Number of edges from a to b crossed by a horizontal ray from every point
+        to the right, or (N, R) counts per ring if the starts of the rings are
+        given. Computed in chunks of points so only one chunk of pairs is held
+        """
+        counts = np.zeros((len(points),) if starts is None else (len(points), len(starts)), dtype=np.int64)
+        if len(a) == 0:
+            return counts
+        step = max(chunk // len(a), 1)
+
+        for start in range(0, len(points), step):
+            x = points[start:start + step, 0:1]
+            y = points[start:start + step, 1:2]
+
+            spans = (a[:, 1] > y) != (b[:, 1] > y)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                x_cross = a[:, 0] + (y - a[:, 1]) * (b[:, 0] - a[:, 0]) / (b[:, 1] - a[:, 1])
+            crossings = spans & (x < x_cross)
+
+            if starts is None:
+                counts[start:start + step] = np.count_nonzero(crossings, axis=1)
+            else:
+                counts[start:start + step] = np.add.reduceat(crossings, starts, axis=1)
+
+        return counts
+
+    def _signs(self, vertices, starts):
+        """
+        1 for outer polygons and -1 for holes, polygons inside of an odd number
+        of other polygons are holes
+        """
+        a, b = self._edges(vertices, starts)
+
+        # Crossings of the first vertex of every polygon with every other polygon
+        counts = self._crossings(vertices[starts], a, b, starts)
+        np.fill_diagonal(counts, 0)
+        depth = (counts % 2).sum(axis=1)
+
+        return np.where(depth % 2 == 0, 1, -1)
+
+    def area(self):
+        """
+        Area enclosed by the polygons using the shoelace formula, polygons
+        inside of other polygons are holes
+
+        :rtype: float
+        """
+        vertices, starts = self._rings()
+        if len(starts) == 0:
+            return 0.0
+
+        a, b = self._edges(vertices, starts)
+        cross = a[:, 0] * b[:, 1] - b[:, 0] * a[:, 1]
+        areas = np.abs(np.add.reduceat(cross, starts)) / 2
+
+        if len(starts) > 1:
+            areas = areas * self._signs(vertices, starts)
+
+        return float(areas.sum())
+
+    def _oriented_edges(self):
+        """
+        Start and end of every edge, with outer polygons oriented to a positive
+        and holes to a negative signed area
+        """
+        vertices, starts = self._rings()
+        if len(starts) == 0:
+            return np.zeros((0, 2)), np.zeros((0, 2))
+
+        a, b = self._edges(vertices, starts)
+        signed = np.add.reduceat(a[:, 0] * b[:, 1] - b[:, 0] * a[:, 1], starts)
+        signs = self._signs(vertices, starts) if len(starts) > 1 else np.ones(1)
+
+        lengths = np.diff(np.append(starts, len(vertices)))
+        flip = np.repeat(np.sign(signed) != signs, lengths)[:, None]
+        return np.where(flip, b, a), np.where(flip, a, b)
+
+    def _intersection_area(self, other):
+        """
+        Exact area shared with other polygons
+
+        The boundary of the intersection consists of the parts of the edges of
+        each polygon inside of the other one, so its area is the shoelace sum
+        over those parts. Parts shared by both outlines are counted once, when
+        they run in the same direction.
+        """
+        a, b = self._oriented_edges()
+        other_a, other_b = other._oriented_edges()
+        if len(a) == 0 or len(other_a) == 0:
+            return 0.0
+
+        scale = max(np.abs(a).max(), np.abs(other_a).max(), 1)
+        inside = _clipped_boundary(a, b, other_a, other_b, True, scale) \
+            + _clipped_boundary(other_a, other_b, a, b, False, scale)
+        return max(inside / 2, 0.0)
+
+    def _raster_area(self, other, resolution):
+        """
+        Area shared with other polygons and area of their union, rasterized
+        inside of the union of their bounding boxes with resolution pixels per unit
+        """
+        rings = [np.asarray(polygon, dtype=np.float64).reshape(-1, 2) for polygon in self.polygons]
+        other_rings = [np.asarray(polygon, dtype=np.float64).reshape(-1, 2) for polygon in other.polygons]
+        points = np.concatenate(rings + other_rings)
+
+        origin = points.min(axis=0)
+        width, height = np.ceil((points.max(axis=0) - origin) * resolution).astype(int) + 1
+
+        def rasterize(rings):
+            canvas = np.zeros((height, width), dtype=np.uint8)
+            scaled = [np.round((ring - origin) * resolution).astype(np.int32) for ring in rings]
+            return cv2.fillPoly(canvas, scaled, 1).astype(bool)
+
+        first, second = rasterize(rings), rasterize(other_rings)
+        pixel = 1.0 / resolution ** 2
+        return np.count_nonzero(first & second) * pixel, np.count_nonzero(first | second) * pixel
+
+    def iou(self, other, resolution=None):
+        """
+        Intersect over union value of the specified polygons, computed exactly
+        by clipping the polygons against each other. Pairs with more than
+        :attr:`EXACT_VERTICES` vertices are rasterized with one pixel per unit
+
+        :param other: polygons to compute value with
+        :type other: :class:`Polygons`, list
+        :param resolution: rasterize the polygons with this many pixels per unit
+                           inside of the union of their bounding boxes instead
+        :type resolution: float
+        :return: resulting float value
+        """
+        other = Polygons.create(other)
+        if not resolution and self.vertices + other.vertices > self.EXACT_VERTICES:
+            resolution = 1
+
+        # Polygons with disjoint bounding boxes do not overlap
+        box, other_box = self.bbox(), other.bbox()
+        if box._xmax < other_box._xmin or other_box._xmax < box._xmin \
+                or box._ymax < other_box._ymin or other_box._ymax < box._ymin:
+            return 0
+
+        if resolution:
+            i, u = self._raster_area(other, resolution)
+        else:
+            i = self._intersection_area(other)
+            u = self.area() + other.area() - i
+
+        if i == 0 or u <= 0:
+            return 0
+
+        return i / float(u)
+
+    def contains(self, points):
+        """
+        Checks whether points are inside of the polygons, using the even-odd
+        rule so points inside of holes are outside
+
+        :param points: point (x, y) or (N, 2) array of points
+        :returns: bool for a single point, otherwise boolean array of length N
+        """
+        array = np.asarray(points, dtype=np.float64)
+        single = array.ndim == 1
+        array = array.reshape(-1, 2)
+
+        vertices, starts = self._rings()
+        if len(starts) == 0:
+            inside = np.zeros(len(array), dtype=bool)
+        else:
+            a, b = self._edges(vertices, starts)
+            inside = self._crossings(array, a, b) % 2 == 1
+
+        return bool(inside[0]) if single else inside
+
+    def __contains__(self, point):
+        return self.contains(point)
+
+    def simplify(self, tolerance=1.0, max_vertices=None):
+        """
+        Simplifies the polygons with the Douglas-Peucker algorithm, removing
+        vertices closer than tolerance to the outline of the remaining ones.
+        Every polygon keeps at least 3 vertices.
+
+        :param tolerance: maximum distance in pixels of removed vertices
+        :type tolerance: float
+        :param max_vertices: maximum number of vertices of each polygon, the
+                             least significant vertices are removed first
+        :type max_vertices: int
+        :returns: simplified :class:`Polygons`
+        """
+        return Polygons(_simplify(self.polygons, tolerance, max_vertices))
+
+    @property
+    def vertices(self):
+        """
+        Number of vertices of all polygons
+        """
+        return sum(len(polygon) // 2 for polygon in self.polygons)
 
     @property
     def points(self):
@@ -736,21 +1355,24 @@ class Polygons:
 
         return self._c_segmentation
 
-    def draw(self, image, color=None, thickness=3):
+    def draw(self, image, color=None, thickness=3, inplace=False):
         """
         Draws the polygons to the image array of shape (width, height, 3)
 
-        *This function modifies the image array*
+        *A copy of the image array is drawn on unless inplace is True*
 
         :param color: RGB color repersentation
         :type color: tuple, list
         :param thickness: pixel thickness of box
         :type thinkness: int
+        :param inplace: draw on the image array itself
+        :type inplace: bool
         """
         color = Color.create(color).rgb
-        image_copy = image.copy()
-        cv2.polylines(image_copy, self.points, True, color, thickness)
-        return image_copy
+        if not inplace:
+            image = image.copy()
+        cv2.polylines(image, self.points, True, color, thickness)
+        return image
 
     def __eq__(self, other):
         if isinstance(other, self.INSTANCE_TYPES):
@@ -764,6 +1386,14 @@ class Polygons:
 
         return False
 
+    @property
+    def nbytes(self):
+        """
+        Number of bytes used by the coordinates
+        """
+        points = self._c_points or []
+        return sum(polygon.nbytes for polygon in self.polygons) + sum(p.nbytes for p in points)
+
     def __getitem__(self, key):
         return self.polygons[key]
 
@@ -771,36 +1401,391 @@ class Polygons:
         return repr(self.polygons)
 
 
-class Mask:
+def _edge_pairs(a, b, other_a, other_b, eps, chunk=1 << 20):
     """
-    Mask class
+    Indices of the pairs of edges whose bounding boxes overlap. Edges are swept
+    from left to right in chunks, only testing the other edges starting before
+    the right end of a chunk
     """
+    low, high = np.minimum(a, b) - eps, np.maximum(a, b) + eps
+    other_low, other_high = np.minimum(other_a, other_b), np.maximum(other_a, other_b)
 
-    INSTANCE_TYPES = (np.ndarray,)
+    order = np.argsort(low[:, 0], kind='stable')
+    other_order = np.argsort(other_low[:, 0], kind='stable')
+    other_left = other_low[other_order, 0]
 
-    @classmethod
-    def from_polygons(cls, polygons):
-        return Polygons.create(polygons).mask()
+    step = max(chunk // max(len(other_a), 1), 1)
+    first, second = [], []
+    for start in range(0, len(order), step):
+        rows = order[start:start + step]
+        cols = other_order[:np.searchsorted(other_left, high[rows, 0].max(), side='right')]
 
-    @classmethod
-    def from_bbox(cls, bbox):
-        return BBox.create(bbox).mask()
+        overlap = (other_high[None, cols, 0] >= low[rows, None, 0]) \
+            & (other_low[None, cols, 1] <= high[rows, None, 1]) \
+            & (other_high[None, cols, 1] >= low[rows, None, 1])
+        i, j = np.nonzero(overlap)
+        first.append(rows[i])
+        second.append(cols[j])
 
-    @classmethod
-    def create(cls, mask):
-        if isinstance(mask, Mask.INSTANCE_TYPES):
-            return Mask(mask)
+    if not first:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return np.concatenate(first), np.concatenate(second)
 
-        if isinstance(mask, Mask):
-            return mask
 
-        return None
+def _clipped_boundary(a, b, other_a, other_b, shared, scale):
+    """
+    Shoelace sum (twice the signed area) of the parts of the edges from a to b
+    inside of the polygons with edges from other_a to other_b
+
+    :param shared: include parts lying on an edge of the other polygons which
+                   runs in the same direction
+    """
+    eps = 1e-9 * scale
+    d = b - a
+    e = other_b - other_a
+
+    # Split every edge where it crosses or starts to overlap an edge of the
+    # other polygons, only pairs with overlapping bounding boxes can meet
+    i, j = _edge_pairs(a, b, other_a, other_b, eps)
+    d_i, e_j = d[i], e[j]
+    w = other_a[j] - a[i]
+    denominator = d_i[:, 0] * e_j[:, 1] - d_i[:, 1] * e_j[:, 0]
+    w_e = w[:, 0] * e_j[:, 1] - w[:, 1] * e_j[:, 0]
+    w_d = w[:, 0] * d_i[:, 1] - w[:, 1] * d_i[:, 0]
+
+    parallel = np.abs(denominator) <= eps * eps
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = w_e / denominator
+        u = w_d / denominator
+    crossing = ~parallel & (u >= 0) & (u <= 1)
+
+    # Overlapping edges are split at the ends of the other edge
+    length = np.maximum((d_i ** 2).sum(axis=1), eps * eps)
+    collinear = parallel & (np.abs(w_d) <= eps * np.sqrt(length))
+    start = (w * d_i).sum(axis=1) / length
+    end = ((other_b[j] - a[i]) * d_i).sum(axis=1) / length
+
+    edges = np.concatenate([i[crossing], i[collinear], i[collinear]])
+    values = np.concatenate([t[crossing], start[collinear], end[collinear]])
+    interior = (values > 0) & (values < 1)
+
+    everything = np.arange(len(a))
+    edges = np.concatenate([everything, everything, edges[interior]])
+    values = np.concatenate([np.zeros(len(a)), np.ones(len(a)), values[interior]])
+    order = np.lexsort((values, edges))
+    edges, values = edges[order], values[order]
+
+    piece = (edges[:-1] == edges[1:]) & (values[1:] - values[:-1] > 1e-12)
+    edge = edges[:-1][piece]
+    low, high = values[:-1][piece], values[1:][piece]
+
+    p = a[edge] + d[edge] * low[:, None]
+    q = a[edge] + d[edge] * high[:, None]
+    middle = (p + q) / 2
+
+    # Parts on the outline of the other polygons lie on an edge collinear with
+    # their own, and are decided by the direction of that edge
+    ci, span = i[collinear], np.sort(np.stack([start[collinear], end[collinear]], axis=1), axis=1)
+    same = (d_i[collinear] * e_j[collinear]).sum(axis=1) > 0
+
+    first = np.searchsorted(edge, ci, side='left')
+    counts = np.searchsorted(edge, ci, side='right') - first
+    pair = np.repeat(np.arange(len(ci)), counts)
+    candidate = np.repeat(first - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+
+    centre = (low[candidate] + high[candidate]) / 2
+    within = (centre >= span[pair, 0]) & (centre <= span[pair, 1])
+
+    on_edge = np.zeros(len(edge), dtype=bool)
+    on_edge[candidate[within]] = True
+    on_same = np.zeros(len(edge), dtype=bool)
+    on_same[candidate[within & same[pair]]] = True
+
+    inside = Polygons._crossings(middle, other_a, other_b) % 2 == 1
+    keep = np.where(on_edge, shared & on_same, inside)
+
+    cross = p[:, 0] * q[:, 1] - q[:, 0] * p[:, 1]
+    return float(cross[keep].sum())
+
+
+def _simplify(rings, tolerance, max_vertices=None):
+    """
+    Douglas-Peucker simplification of closed rings (flat coordinate arrays),
+    splitting the segments of all rings at once
+
+    Every vertex gets the distance it had to the chord it split, limited by the
+    value of the vertex which created that chord. The vertices above tolerance
+    are then exactly the ones the recursive algorithm keeps, and a vertex budget
+    keeps the most significant ones.
+    """
+    rings = [np.asarray(ring) for ring in rings]
+    lengths = np.array([len(ring) // 2 for ring in rings], dtype=np.int64)
+    simplified = list(rings)
+
+    # Rings of up to 3 vertices are kept as they are
+    selected = np.flatnonzero(lengths > 3)
+    if selected.size == 0:
+        return simplified
+
+    # Close every ring by repeating its first vertex
+    points = np.concatenate([
+        np.concatenate([rings[i].reshape(-1, 2), rings[i].reshape(-1, 2)[:1]])
+        for i in selected
+    ]).astype(np.float64)
+
+    sizes = lengths[selected] + 1
+    ends = np.cumsum(sizes)
+    starts = ends - sizes
+
+    significance = np.zeros(len(points))
+    significance[starts] = np.inf
+
+    first, last, limit = starts, ends - 1, np.full(len(starts), np.inf)
+    while first.size > 0:
+        counts = last - first - 1
+        split = counts > 0
+        first, last, limit, counts = first[split], last[split], limit[split], counts[split]
+        if first.size == 0:
+            break
+
+        # Vertices between the ends of every segment, grouped by segment
+        offsets = np.cumsum(counts) - counts
+        segment = np.repeat(np.arange(len(counts)), counts)
+        index = first[segment] + 1 + np.arange(counts.sum()) - offsets[segment]
+
+        a, b, p = points[first[segment]], points[last[segment]], points[index]
+        chord = b - a
+        norm = np.hypot(chord[:, 0], chord[:, 1])
+        cross = np.abs(chord[:, 0] * (p[:, 1] - a[:, 1]) - chord[:, 1] * (p[:, 0] - a[:, 0]))
+        distance = np.where(norm > 0, cross / np.where(norm > 0, norm, 1), np.hypot(*(p - a).T))
+
+        # Farthest vertex of every segment, the first one on ties
+        farthest = np.lexsort((-distance, segment))[offsets]
+        middle = index[farthest]
+        value = np.minimum(distance[farthest], limit)
+        significance[middle] = value
+
+        first = np.concatenate([first, middle])
+        last = np.concatenate([middle, last])
+        limit = np.concatenate([value, value])
+
+    # Rank the vertices of every ring by significance, the closing copies last
+    significance[ends - 1] = -1
+    ring = np.repeat(np.arange(len(sizes)), sizes)
+    order = np.lexsort((-significance, ring))
+    rank = np.empty(len(points), dtype=np.int64)
+    rank[order] = np.arange(len(points)) - starts[ring[order]]
+
+    keep = (significance > tolerance) | (rank < 3)
+    if max_vertices is not None:
+        keep &= rank < max(int(max_vertices), 3)
+
+    for i, start, end in zip(selected, starts, ends):
+        simplified[i] = rings[i].reshape(-1, 2)[keep[start:end - 1]].ravel()
+
+    return simplified
+
+
+class Mask:
+    """
+    Mask class
+
+    Masks are stored as a local array covering a region of the image, together
+    with the offset of that region and the size of the image. The image sized
+    :attr:`array` is only created when it is accessed, so masks of small objects
+    stay small.
+    """
+
+    INSTANCE_TYPES = (np.ndarray,)
+
+    @classmethod
+    def from_polygons(cls, polygons):
+        return Polygons.create(polygons).mask()
+
+    @classmethod
+    def from_bbox(cls, bbox):
+        return BBox.create(bbox).mask()
+
+    @classmethod
+    def create(cls, mask):
+        if isinstance(mask, Mask.INSTANCE_TYPES):
+            return Mask(mask)
+
+        if isinstance(mask, Mask):
+            return mask
+
+        if isinstance(mask, PackedMask):
+            return mask.unpack()
+
+        return None
+
+    @classmethod
+    def _cropped(cls, local, origin, shape):
+        """
+        Creates :class:`Mask` from a local array placed at ``origin`` (in array
+        axis order) of an image with ``shape``, without copying
+        """
+        mask = cls.__new__(cls)
+        mask.local = local
+        mask._origin = tuple(int(i) for i in origin)
+        mask.shape = tuple(int(i) for i in shape)
+        return mask
 
     _c_bbox = None
-    _c_polygons = None
+    _c_area = None
+    _c_polygons = _Cached('_c_polygons')
 
-    def __init__(self, array):
-        self.array = np.array(array, dtype=bool)
+    def __init__(self, array, offset=None, size=None):
+        self.local = np.array(array, dtype=bool)
+
+        offset = offset if offset else (0, 0)
+        self._origin = (int(offset[1]), int(offset[0])) if self.local.ndim == 2 else (0,) * self.local.ndim
+        self.shape = (int(size[1]), int(size[0])) if size else self.local.shape
+
+    @property
+    def array(self):
+        """
+        Image sized boolean array of the mask. This is always a new array, so
+        writing to it does not change the mask: assign to the mask itself
+        (``mask[key] = value``) or set :attr:`array` instead
+        """
+        array = self._full()
+        return array.copy() if array is self.local else array
+
+    @array.setter
+    def array(self, array):
+        self._reset(np.array(array, dtype=bool))
+
+    def _reset(self, array):
+        """
+        Replaces the pixels of the mask with an image sized array, dropping
+        everything generated from the previous pixels
+        """
+        self.local = array
+        self.shape = array.shape
+        self._origin = (0,) * array.ndim
+        self._c_bbox = None
+        self._c_area = None
+        self._c_polygons = None
+
+    @property
+    def offset(self):
+        """
+        Position (x, y) of the local array in the image
+        """
+        return self._origin[1], self._origin[0]
+
+    @property
+    def size(self):
+        """
+        Width and height of the image as a tuple (width, height)
+        """
+        return self.shape[1], self.shape[0]
+
+    @property
+    def nbytes(self):
+        """
+        Number of bytes used by the local array
+        """
+        return self.local.nbytes
+
+    def _extent(self):
+        """
+        Start and stop (in array axis order) of the region covered by the local array
+        """
+        start = np.array(self._origin)
+        return start, start + self.local.shape
+
+    def _region(self, start, stop):
+        """
+        Boolean array of the mask between start and stop (in array axis order)
+        """
+        local_start, local_stop = self._extent()
+        if np.array_equal(start, local_start) and np.array_equal(stop, local_stop):
+            return self.local
+
+        region = np.zeros(np.subtract(stop, start), dtype=bool)
+
+        low = np.maximum(start, local_start)
+        high = np.minimum(stop, local_stop)
+
+        if np.all(high > low):
+            region[tuple(slice(l - s, h - s) for l, h, s in zip(low, high, start))] = \
+                self.local[tuple(slice(l - s, h - s) for l, h, s in zip(low, high, local_start))]
+
+        return region
+
+    def _full(self):
+        """
+        Image sized array of the mask, the local array itself if it covers the image
+        """
+        return self._region((0,) * len(self.shape), self.shape)
+
+    def _empty(self):
+        return Mask._cropped(np.zeros((0,) * len(self.shape), dtype=bool), (0,) * len(self.shape), self.shape)
+
+    def _content(self):
+        """
+        Start and stop of the pixels set in the mask, taken from its cached
+        bounding box, or None if the mask is empty
+        """
+        if self.area() == 0:
+            return None
+
+        if self.local.ndim != 2:
+            return self._extent()
+
+        x_min, y_min, x_max, y_max = self.bbox().bbox(style=BBox.MIN_MAX)
+        return np.array((y_min, x_min)), np.array((y_max + 1, x_max + 1))
+
+    def _overlap(self, other):
+        """
+        Start and stop of the region shared by the bounding boxes of both masks,
+        or None if they are disjoint
+        """
+        content_a = self._content()
+        content_b = other._content()
+        if content_a is None or content_b is None:
+            return None
+
+        start = np.maximum(content_a[0], content_b[0])
+        stop = np.minimum(content_a[1], content_b[1])
+
+        if np.any(stop <= start):
+            return None
+
+        return start, stop
+
+    def _bounds(self, other):
+        """
+        Start and stop of the region covering both local arrays
+        """
+        extents = [mask._extent() for mask in (self, other) if mask.local.size > 0]
+        if not extents:
+            return None
+
+        start = np.min([start for start, _ in extents], axis=0)
+        stop = np.max([stop for _, stop in extents], axis=0)
+        return start, stop
+
+    def crop(self):
+        """
+        Crops the local array of the mask to its bounding box
+
+        :returns: resulting :class:`Mask`
+        """
+        if not self.local.any():
+            return self._empty()
+
+        start, stop = [], []
+        for axis in range(self.local.ndim):
+            others = tuple(a for a in range(self.local.ndim) if a != axis)
+            indices = np.flatnonzero(np.any(self.local, axis=others))
+            start.append(indices[0])
+            stop.append(indices[-1] + 1)
+
+        local = self.local[tuple(slice(s, e) for s, e in zip(start, stop))].copy()
+        return Mask._cropped(local, np.add(self._origin, start), self.shape)
 
     def bbox(self):
         """
@@ -812,17 +1797,17 @@ class Mask:
         if not self._c_bbox:
 
             # Generate bbox from mask
-            rows = np.any(self.array, axis=1)
-            cols = np.any(self.array, axis=0)
+            rows = np.any(self.local, axis=1)
+            cols = np.any(self.local, axis=0)
 
             if not np.any(rows) or not np.any(cols):
                 return BBox.empty()
 
-            rmin, rmax = np.where(rows)[0][[0, -1]]
-            cmin, cmax = np.where(cols)[0][[0, -1]]
+            rmin, rmax = np.where(rows)[0][[0, -1]] + self._origin[0]
+            cmin, cmax = np.where(cols)[0][[0, -1]] + self._origin[1]
 
             self._c_bbox = BBox((cmin, rmin, cmax, rmax))
-            self._c_bbox._c_mask = self
+            self._c_bbox._c_mask = weakref.ref(self)
 
         return self._c_bbox
 
@@ -833,19 +1818,70 @@ class Mask:
         :returns: Polygons representation
         :rtype: :class:`Polygons`
         """
-        if not self._c_polygons:
+        polygons = self._c_polygons
+        if polygons is None:
+
+            x, y = self.offset
+            disk = geometry_cache.disk
+            if disk is not None:
+                key = disk.key('polygons', (x, y), np.packbits(self.local), self.local.shape)
+                polygons = disk.read_polygons(key)
+
+            if polygons is None:
+                # Generate polygons from mask
+                mask = self.local.astype(np.uint8)
+                mask = cv2.copyMakeBorder(mask, 1, 1, 1, 1, cv2.BORDER_CONSTANT, value=0)
+                polygons = cv2.findContours(mask, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE, offset=(x - 1, y - 1))
+                polygons = polygons[0] if len(polygons) == 2 else polygons[1]
+                polygons = [polygon.flatten() for polygon in polygons]
+
+                if disk is not None:
+                    disk.write_polygons(key, polygons)
+
+            polygons = self._c_polygons = Polygons(polygons)
+            polygons._c_mask = weakref.ref(self)
+
+        return polygons
+
+    def rle(self):
+        """
+        Generates :class:`RLE` representation of mask.
+
+        :returns: Run-length encoding representation
+        :rtype: :class:`RLE`
+        """
+        height, width = self.shape
+        top, left = self._origin
+        rows, cols = self.local.shape
+
+        # Pad every column with background so runs stop at the column borders,
+        # COCO encodes pixels in column-major order
+        padded = np.zeros((rows + 2, cols), dtype=np.int8)
+        padded[1:-1] = self.local
+        changes = np.diff(padded.ravel(order='F'))
 
-            # Generate polygons from mask
-            mask = self.array.astype(np.uint8)
-            mask = cv2.copyMakeBorder(mask, 1, 1, 1, 1, cv2.BORDER_CONSTANT, value=0)
-            polygons = cv2.findContours(mask, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE, offset=(-1, -1))
-            polygons = polygons[0] if len(polygons) == 2 else polygons[1]
-            polygons = [polygon.flatten() for polygon in polygons]
+        def to_image(index):
+            col, row = np.divmod(index, rows + 2)
+            return (left + col) * height + top + row - 1
 
-            self._c_polygons = Polygons(polygons)
-            self._c_polygons._c_mask = self
+        starts = to_image(np.flatnonzero(changes == 1) + 1)
+        stops = to_image(np.flatnonzero(changes == -1) + 1)
 
-        return self._c_polygons
+        # Runs touching the bottom of a column continue into the next column
+        joined = np.flatnonzero(starts[1:] == stops[:-1])
+        starts = np.delete(starts, joined + 1)
+        stops = np.delete(stops, joined)
+
+        bounds = np.concatenate(([0], np.column_stack((starts, stops)).ravel(), [height * width]))
+        counts = np.diff(bounds)
+
+        # Drop the empty background run after a mask ending in foreground
+        if len(counts) > 1 and counts[-1] == 0:
+            counts = counts[:-1]
+
+        rle = RLE(counts, width=width, height=height)
+        rle._c_bbox = self._c_bbox
+        return rle
 
     def union(self, other):
         """
@@ -858,7 +1894,13 @@ class Mask:
         if isinstance(other, np.ndarray):
             other = Mask(other)
 
-        return Mask(np.logical_or(self.array, other.array))
+        bounds = self._bounds(other)
+        if bounds is None:
+            return self._empty()
+
+        start, stop = bounds
+        local = np.logical_or(self._region(start, stop), other._region(start, stop))
+        return Mask._cropped(local, start, self.shape)
 
     def __add__(self, other):
         return self.union(other)
@@ -875,11 +1917,25 @@ class Mask:
         if isinstance(other, np.ndarray):
             other = Mask(other)
 
-        return Mask(np.logical_and(self.array, other.array))
+        overlap = self._overlap(other)
+        if overlap is None:
+            return self._empty()
+
+        start, stop = overlap
+        local = np.logical_and(self._region(start, stop), other._region(start, stop))
+        return Mask._cropped(local, start, self.shape)
 
     def __mul__(self, other):
         return self.intersect(other)
 
+    def _intersection_area(self, other):
+        overlap = self._overlap(other)
+        if overlap is None:
+            return 0
+
+        start, stop = overlap
+        return np.count_nonzero(np.logical_and(self._region(start, stop), other._region(start, stop)))
+
     def iou(self, other):
         """
         Intersect over union value of the specified masks
@@ -888,8 +1944,11 @@ class Mask:
         :type other: :class:`Mask`, numpy.ndarray
         :return: resulting float value
         """
-        i = self.intersect(other).sum()
-        u = self.union(other).sum()
+        if isinstance(other, np.ndarray):
+            other = Mask(other)
+
+        i = self._intersection_area(other)
+        u = self.area() + other.area() - i
 
         if i == 0 or u == 0:
             return 0
@@ -902,31 +1961,35 @@ class Mask:
 
         :return: resulting :class:`Mask`
         """
-        return Mask(np.invert(self.array))
+        return Mask(np.invert(self._full()))
 
     def __invert__(self):
         return self.invert()
 
-    def draw(self, image, color=None, alpha=0.5):
+    def draw(self, image, color=None, alpha=0.5, inplace=False):
         """
         Draws current mask to the image array of shape (width, height, 3)
 
-        *This function modifies the image array*
+        *A copy of the image array is drawn on unless inplace is True*
 
         :param color: RGB color repersentation
         :type color: tuple, list
         :param alpha: opacity of mask
         :type alpha: float
+        :param inplace: draw on the image array itself
+        :type inplace: bool
         """
         color = Color.create(color).rgb
-        image_copy = image.copy()
-        for c in range(3):
-            image_copy[:, :, c] = np.where(
-                self.array,
-                image_copy[:, :, c] * (1 - alpha) + alpha * color[c],
-                image_copy[:, :, c]
-            )
-        return image_copy
+        if not inplace:
+            image = image.copy()
+
+        # Only blend the pixels of the mask, inside of the region covered by the local array
+        start, stop = self._extent()
+        region = image[start[0]:stop[0], start[1]:stop[1]]
+        local = self.local[:region.shape[0], :region.shape[1]]
+        region[local] = region[local] * (1 - alpha) + np.multiply(alpha, color)
+
+        return image
 
     def subtract(self, other):
         """
@@ -939,7 +2002,9 @@ class Mask:
         if isinstance(other, np.ndarray):
             other = Mask(other)
 
-        return self.intersect(other.invert())
+        start, stop = self._extent()
+        local = np.logical_and(self.local, np.logical_not(other._region(start, stop)))
+        return Mask._cropped(local, start, self.shape)
 
     def __sub__(self, other):
         return self.subtract(other)
@@ -954,16 +2019,22 @@ class Mask:
         :return: bool if item is contained
         """
         if isinstance(item, tuple):
-            array = self.array
-            for i in item:
-                array = array[i]
-            return array
+            if len(item) != self.local.ndim:
+                array = self._full()
+                for i in item:
+                    array = array[i]
+                return array
+
+            index = np.subtract(item, self._origin)
+            if np.any(index < 0) or np.any(index >= self.local.shape):
+                return False
+            return self.local[tuple(index)]
 
         if isinstance(item, np.ndarray):
             item = Mask(item)
 
         if isinstance(item, Mask):
-            return self.intersect(item).area() > 0
+            return self._intersection_area(item) > 0
 
         return False
 
@@ -974,31 +2045,254 @@ class Mask:
         """
         Given a overlap threashold determines if masks match
 
+        Pairs which cannot reach the threshold, because of their areas or the
+        overlap of their bounding boxes, are rejected without comparing pixels.
+
         :param item: item to compare with
         :type item: :class:`Mask`
         :param threshold: max amount of overlap (percentage)
         :returns: boolean determining if the items match
         """
+        if isinstance(item, np.ndarray):
+            item = Mask(item)
+
+        if threshold > 0:
+            area, other_area = self.area(), item.area()
+
+            # The intersection is at most the smaller area and the overlap of
+            # the bounding boxes, the union at least the larger area
+            overlap = self._overlap(item)
+            if overlap is None:
+                return False
+
+            bound = min(area, other_area, np.prod(np.subtract(overlap[1], overlap[0])))
+            if bound < threshold * (area + other_area - bound):
+                return False
+
         return self.iou(item) >= threshold
 
     def sum(self):
-        return self.array.sum()
+        return self.area()
 
     def area(self):
-        return self.sum()
+        if self._c_area is None:
+            self._c_area = int(np.count_nonzero(self.local))
+        return self._c_area
 
     def __getitem__(self, key):
-        return self.array[key]
+        return self._full()[key]
 
     def __setitem__(self, key, value):
-        self.array[key] = value
+        # Writes can land anywhere in the image, so the full array is needed
+        array = self._full()
+        self._reset(array if array.flags.writeable else array.copy())
+        self.local[key] = value
 
     def __eq__(self, other):
         if isinstance(other, (np.ndarray, list)):
             other = Mask(other)
 
         if isinstance(other, Mask):
-            return np.array_equal(self.array, other.array)
+            if self.shape != other.shape:
+                return False
+
+            bounds = self._bounds(other)
+            if bounds is None:
+                return True
+
+            start, stop = bounds
+            return np.array_equal(self._region(start, stop), other._region(start, stop))
+
+        return False
+
+    def __repr__(self):
+        return repr(self._full())
+
+    def pack(self):
+        """
+        Generates :class:`PackedMask` representation of mask.
+
+        :returns: Bit packed representation
+        :rtype: :class:`PackedMask`
+        """
+        return PackedMask(self._full())
+
+
+if hasattr(np, 'bitwise_count'):
+    def _popcount(words):
+        return int(np.bitwise_count(words).sum(dtype=np.int64))
+else:
+    _POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+    def _popcount(words):
+        return int(_POPCOUNT[words.view(np.uint8)].sum(dtype=np.int64))
+
+
+class PackedMask:
+    """
+    Mask stored with one bit per pixel in 64 bit words
+
+    Set operations, area and iou are computed on whole words at once, using an
+    eighth of the memory of :class:`Mask`. The boolean array is only unpacked
+    when it is needed, for example to trace polygons or draw the mask.
+    """
+
+    @classmethod
+    def create(cls, mask):
+        if isinstance(mask, PackedMask):
+            return mask
+
+        if isinstance(mask, Mask):
+            return mask.pack()
+
+        if isinstance(mask, (np.ndarray, list)):
+            return PackedMask(mask)
+
+        return None
+
+    @classmethod
+    def _packed(cls, words, shape):
+        mask = cls.__new__(cls)
+        mask.words = words
+        mask.shape = shape
+        return mask
+
+    def __init__(self, array):
+        array = np.asarray(array, dtype=bool)
+        self.shape = array.shape
+
+        # Pad the packed bytes to whole words, padding bits are always zero
+        bits = np.packbits(array.ravel())
+        padded = np.zeros(-(-len(bits) // 8) * 8, dtype=np.uint8)
+        padded[:len(bits)] = bits
+        self.words = padded.view(np.uint64)
+
+    @property
+    def array(self):
+        """
+        Unpacked boolean array of the mask
+        """
+        count = int(np.prod(self.shape))
+        return np.unpackbits(self.words.view(np.uint8), count=count).reshape(self.shape).view(bool)
+
+    @property
+    def size(self):
+        """
+        Width and height of the image as a tuple (width, height)
+        """
+        return self.shape[1], self.shape[0]
+
+    @property
+    def nbytes(self):
+        return self.words.nbytes
+
+    def unpack(self):
+        """
+        Generates :class:`Mask` representation of mask.
+
+        :rtype: :class:`Mask`
+        """
+        return Mask._cropped(self.array, (0,) * len(self.shape), self.shape)
+
+    def _words(self, other):
+        other = PackedMask.create(other)
+        if other.shape != self.shape:
+            raise ValueError('Cannot combine masks of shape {} and {}'.format(self.shape, other.shape))
+        return other.words
+
+    def union(self, other):
+        """
+        Unites the array of the specified mask with this mask
+
+        :returns: resulting :class:`PackedMask`
+        """
+        return PackedMask._packed(self.words | self._words(other), self.shape)
+
+    def __add__(self, other):
+        return self.union(other)
+
+    def intersect(self, other):
+        """
+        Intersects the array of the specified mask with this mask
+
+        :returns: resulting :class:`PackedMask`
+        """
+        return PackedMask._packed(self.words & self._words(other), self.shape)
+
+    def __mul__(self, other):
+        return self.intersect(other)
+
+    def subtract(self, other):
+        """
+        Subtracts the array of the specified mask from this mask
+
+        :returns: resulting :class:`PackedMask`
+        """
+        return PackedMask._packed(self.words & ~self._words(other), self.shape)
+
+    def __sub__(self, other):
+        return self.subtract(other)
+
+    def invert(self):
+        """
+        Inverts current mask
+
+        :returns: resulting :class:`PackedMask`
+        """
+        words = ~self.words
+
+        # Clear the bits past the last pixel again
+        data = words.view(np.uint8)
+        full, remainder = divmod(int(np.prod(self.shape)), 8)
+        if remainder:
+            data[full] &= (0xff << (8 - remainder)) & 0xff
+            full += 1
+        data[full:] = 0
+
+        return PackedMask._packed(words, self.shape)
+
+    def __invert__(self):
+        return self.invert()
+
+    def area(self):
+        return _popcount(self.words)
+
+    def sum(self):
+        return self.area()
+
+    def iou(self, other):
+        """
+        Intersect over union value of the specified masks
+
+        :return: resulting float value
+        """
+        words = self._words(other)
+        i = _popcount(self.words & words)
+        u = _popcount(self.words | words)
+
+        if i == 0 or u == 0:
+            return 0
+
+        return i / float(u)
+
+    def match(self, item, threshold=0.5):
+        return self.iou(item) >= threshold
+
+    def bbox(self):
+        return self.unpack().bbox()
+
+    def polygons(self):
+        return self.unpack().polygons()
+
+    def draw(self, image, color=None, alpha=0.5, inplace=False):
+        return self.unpack().draw(image, color=color, alpha=alpha, inplace=inplace)
+
+    def __eq__(self, other):
+        if isinstance(other, (np.ndarray, list, Mask)):
+            other = PackedMask.create(other)
+
+        if isinstance(other, PackedMask):
+            return self.shape == other.shape and np.array_equal(self.words, other.words)
 
         return False
 
@@ -1006,4 +2300,378 @@ class Mask:
         return repr(self.array)
 
 
-__all__ = ["Annotation", "BBox", "Mask", "Polygons"]
+class RLE:
+    """
+    Run-length encoded mask in the COCO format
+
+    Counts alternate between runs of background and foreground pixels, starting
+    with background, in column-major order. Area, bounding box and set operations
+    are computed directly on the runs without decoding the full mask.
+    """
+
+    @classmethod
+    def from_mask(cls, mask):
+        """
+        Creates :class:`RLE` from mask
+
+        :param mask: object to generate run-length encoding
+        :type mask: :class:`Mask`, numpy.ndarray
+        :returns: :class:`RLE` repersentation
+        """
+        return Mask.create(mask).rle()
+
+    @classmethod
+    def from_coco(cls, segmentation):
+        """
+        Creates :class:`RLE` from a COCO segmentation
+
+        Accepts both uncompressed and compressed counts:
+
+        .. code-block:: python
+
+            {'size': [height, width], 'counts': [n1, n2, n3, ...]}
+            {'size': [height, width], 'counts': 'PZ7<...'}
+
+        :param segmentation: COCO run-length encoded segmentation
+        :type segmentation: dict
+        :returns: :class:`RLE` repersentation
+        """
+        height, width = segmentation['size']
+        counts = segmentation['counts']
+
+        if isinstance(counts, bytes):
+            counts = counts.decode('ascii')
+
+        if isinstance(counts, str):
+            counts = _decode_counts(counts)
+
+        return cls(counts, width=width, height=height)
+
+    @classmethod
+    def create(cls, rle):
+        """
+        Creates :class:`RLE`
+
+        Recommend over the use of ``__init__``.
+        """
+        if isinstance(rle, dict):
+            return RLE.from_coco(rle)
+
+        if isinstance(rle, RLE):
+            return rle
+
+        return None
+
+    _c_bbox = None
+
+    def __init__(self, counts, width, height):
+        self.counts = np.array(counts, dtype=np.int64).flatten()
+        self.width = int(width)
+        self.height = int(height)
+
+        assert self.counts.sum() == self.width * self.height, \
+            "counts must cover every pixel of the mask"
+
+    @property
+    def size(self):
+        """
+        Width and height as a tuple (width, height)
+        """
+        return self.width, self.height
+
+    @property
+    def nbytes(self):
+        """
+        Number of bytes used by the counts
+        """
+        return self.counts.nbytes
+
+    def area(self):
+        return int(self.counts[1::2].sum())
+
+    def sum(self):
+        return self.area()
+
+    def bbox(self):
+        """
+        Returns or generates :class:`BBox` representation of the encoding.
+
+        :returns: Bounding Box representation
+        :rtype: :class:`BBox`
+        """
+        if not self._c_bbox:
+
+            ends = np.cumsum(self.counts)
+            lengths = self.counts[1::2]
+            starts = ends[::2][:len(lengths)]
+
+            starts = starts[lengths > 0]
+            stops = starts + lengths[lengths > 0] - 1
+
+            if starts.size == 0:
+                return BBox.empty()
+
+            # Runs go down columns, so a run spanning several columns covers
+            # every row of the mask
+            first_col, last_col = starts // self.height, stops // self.height
+            single = first_col == last_col
+
+            rmin = np.where(single, starts % self.height, 0).min()
+            rmax = np.where(single, stops % self.height, self.height - 1).max()
+
+            self._c_bbox = BBox((first_col.min(), rmin, last_col.max(), rmax))
+
+        return self._c_bbox
+
+    def mask(self):
+        """
+        Decodes the run-length encoding into a :class:`Mask`
+
+        :returns: Mask representation
+        :rtype: :class:`Mask`
+        """
+        shape = (self.height, self.width)
+        if self.area() == 0:
+            return Mask._cropped(np.zeros((0, 0), dtype=bool), (0, 0), shape)
+
+        # Only decode the columns inside of the bounding box
+        x0, y0, x1, y1 = self.bbox().bbox(style=BBox.MIN_MAX)
+        start, stop = x0 * self.height, (x1 + 1) * self.height
+
+        ends = np.cumsum(self.counts)
+        lengths = np.clip(ends, start, stop) - np.clip(ends - self.counts, start, stop)
+
+        values = np.zeros(len(self.counts), dtype=bool)
+        values[1::2] = True
+
+        columns = np.repeat(values, lengths).reshape((x1 + 1 - x0, self.height)).T
+        return Mask._cropped(np.ascontiguousarray(columns[y0:y1 + 1]), (y0, x0), shape)
+
+    def polygons(self):
+        """
+        Generates :class:`Polygons` representation of the encoding.
+
+        :returns: Polygons representation
+        :rtype: :class:`Polygons`
+        """
+        return self.mask().polygons()
+
+    def coco(self, compressed=True):
+        """
+        Generates COCO format of run-length encoding
+
+        :param compressed: encode counts as a string (True) or a list (False)
+        :type compressed: bool
+        :returns: COCO segmentation
+        :rtype: dict
+        """
+        counts = _encode_counts(self.counts) if compressed else self.counts.tolist()
+        return {'size': [self.height, self.width], 'counts': counts}
+
+    def _segments(self, other, operation):
+        """
+        Splits both encodings at every run boundary and applies the boolean
+        operation to each segment
+
+        :returns: tuple of segment starts, ends and values
+        """
+        other = RLE.create(other) or Mask.create(other).rle()
+        assert self.size == other.size, "encodings must have the same size"
+
+        ends_a = np.cumsum(self.counts)
+        ends_b = np.cumsum(other.counts)
+
+        ends = np.union1d(ends_a, ends_b)
+        ends = ends[ends > 0]
+        starts = np.concatenate(([0], ends[:-1]))
+
+        # Odd run indices are foreground
+        a = np.searchsorted(ends_a, starts, side='right') % 2 == 1
+        b = np.searchsorted(ends_b, starts, side='right') % 2 == 1
+
+        return starts, ends, operation(a, b)
+
+    def _combine(self, other, operation):
+        starts, ends, values = self._segments(other, operation)
+
+        if values.size == 0:
+            return RLE([], width=self.width, height=self.height)
+
+        changes = np.flatnonzero(values[1:] != values[:-1]) + 1
+        bounds = np.concatenate(([0], starts[changes], [ends[-1]]))
+        counts = np.diff(bounds)
+
+        if values[0]:
+            counts = np.concatenate(([0], counts))
+
+        return RLE(counts, width=self.width, height=self.height)
+
+    def union(self, other):
+        """
+        Unites the specified encoding with this encoding and returns the
+        result as a new encoding.
+
+        :param other: encoding to unite with
+        :type other: :class:`RLE`, :class:`Mask`, dict
+        :return: resulting :class:`RLE`
+        """
+        return self._combine(other, np.logical_or)
+
+    def __add__(self, other):
+        return self.union(other)
+
+    def intersect(self, other):
+        """
+        Intersects the specified encoding with this encoding and returns the
+        result as a new encoding.
+
+        :param other: encoding to intersect with
+        :type other: :class:`RLE`, :class:`Mask`, dict
+        :return: resulting :class:`RLE`
+        """
+        return self._combine(other, np.logical_and)
+
+    def __mul__(self, other):
+        return self.intersect(other)
+
+    def subtract(self, other):
+        """
+        Subtracts the specified encoding from this encoding and returns the
+        result as a new encoding.
+
+        :param other: encoding to subtract
+        :type other: :class:`RLE`, :class:`Mask`, dict
+        :return: resulting :class:`RLE`
+        """
+        return self._combine(other, lambda a, b: np.logical_and(a, np.logical_not(b)))
+
+    def __sub__(self, other):
+        return self.subtract(other)
+
+    def invert(self):
+        """
+        Inverts current encoding
+
+        :return: resulting :class:`RLE`
+        """
+        if len(self.counts) > 1 and self.counts[0] == 0:
+            counts = self.counts[1:]
+        else:
+            counts = np.concatenate(([0], self.counts))
+
+        return RLE(counts, width=self.width, height=self.height)
+
+    def __invert__(self):
+        return self.invert()
+
+    def iou(self, other):
+        """
+        Intersect over union value of the specified encodings
+
+        :param other: encoding to compute value with
+        :type other: :class:`RLE`, :class:`Mask`, dict
+        :return: resulting float value
+        """
+        other = RLE.create(other) or Mask.create(other).rle()
+
+        starts, ends, values = self._segments(other, np.logical_and)
+        i = int((ends - starts)[values].sum())
+        u = self.area() + other.area() - i
+
+        if i == 0 or u == 0:
+            return 0
+
+        return i / float(u)
+
+    def match(self, item, threshold=0.5):
+        """
+        Given a overlap threashold determines if encodings match
+
+        :param item: item to compare with
+        :type item: :class:`RLE`, :class:`Mask`
+        :param threshold: max amount of overlap (percentage)
+        :returns: boolean determining if the items match
+        """
+        return self.iou(item) >= threshold
+
+    def draw(self, image, color=None, alpha=0.5, inplace=False):
+        """
+        Draws current encoding to the image array of shape (width, height, 3)
+
+        :param color: RGB color repersentation
+        :type color: tuple, list
+        :param alpha: opacity of mask
+        :type alpha: float
+        :param inplace: draw on the image array itself
+        :type inplace: bool
+        """
+        return self.mask().draw(image, color=color, alpha=alpha, inplace=inplace)
+
+    def __eq__(self, other):
+        if isinstance(other, dict):
+            other = RLE.from_coco(other)
+
+        if isinstance(other, (Mask, np.ndarray)):
+            other = Mask.create(other).rle()
+
+        if isinstance(other, RLE):
+            if self.size != other.size:
+                return False
+            _, _, values = self._segments(other, np.logical_xor)
+            return not np.any(values)
+
+        return False
+
+    def __repr__(self):
+        return repr(self.coco(compressed=False))
+
+
+def _encode_counts(counts):
+    """
+    Compresses run-length counts into the COCO string format (LEB128-like
+    with the counts stored as differences)
+    """
+    string = []
+    for i, x in enumerate(counts):
+        x = int(x)
+        if i > 2:
+            x -= int(counts[i - 2])
+
+        more = True
+        while more:
+            c = x & 0x1f
+            x >>= 5
+            more = x != -1 if c & 0x10 else x != 0
+            if more:
+                c |= 0x20
+            string.append(chr(c + 48))
+
+    return ''.join(string)
+
+
+def _decode_counts(string):
+    """
+    Decompresses COCO string counts into a list of run-lengths
+    """
+    counts = []
+    p = 0
+    while p < len(string):
+        x = k = 0
+        more = True
+        while more:
+            c = ord(string[p]) - 48
+            x |= (c & 0x1f) << (5 * k)
+            more = c & 0x20
+            p += 1
+            k += 1
+            if not more and c & 0x10:
+                x |= -1 << (5 * k)
+
+        if len(counts) > 2:
+            x += counts[-2]
+        counts.append(x)
+
+    return counts
+
+
+__all__ = ["Annotation", "BBox", "BBoxArray", "Mask", "PackedMask", "Polygons", "RLE"]
@@ -1,4 +1,105 @@
+from lxml import etree as ET
+import json
+
 from .styles import *
+from .coco import open_file
+from .utils import json_default
+
+
+_EXPORTERS = {}
+
+
+def register_exporter(style, export=None, write=None, cls=None):
+    """
+    Registers how objects are exported to a style
+
+    Exporters are looked up along the class hierarchy of the exported object,
+    so an exporter registered for a subclass takes precedence for its instances.
+    Only the exporter of the requested style is ever invoked.
+
+    :param style: name of the style
+    :type style: str
+    :param export: called with the object, returns the object in the style
+    :type export: callable
+    :param write: called with the object and a text file, writes the object in
+                  the style without building it in memory first
+    :type write: callable
+    :param cls: class the exporter applies to (defaults: :class:`Semantic`)
+    :type cls: type
+    """
+    assert export is not None or write is not None, \
+        "you must provide an export or write function"
+
+    _EXPORTERS.setdefault(style, {})[cls or Semantic] = (export, write)
+
+
+def _exporters(obj, style):
+    """
+    Generates the (export, write) functions registered for style which apply
+    to obj, most specific class first
+    """
+    registered = _EXPORTERS.get(style)
+    if registered is None:
+        raise ValueError('Unknown export style {}'.format(style))
+
+    for cls in type(obj).__mro__:
+        if cls in registered:
+            yield registered[cls]
+
+
+class IdCounter(object):
+    """
+    Allocates unique integer ids in constant time
+
+    Ids which are already taken (for example ids kept from an imported file) are
+    claimed so they are never handed out again.
+    """
+
+    def __init__(self, start=1):
+        self.value = start
+
+    def next(self):
+        """
+        :returns: next free id
+        :rtype: int
+        """
+        value = self.value
+        self.value += 1
+        return value
+
+    def reserve(self, count):
+        """
+        Reserves a block of consecutive ids for a batch of objects
+
+        :param count: number of ids to reserve
+        :returns: reserved ids
+        :rtype: range
+        """
+        start = self.value
+        self.value += count
+        return range(start, self.value)
+
+    def claim(self, value):
+        """
+        Marks an id as taken
+        """
+        if value >= self.value:
+            self.value = value + 1
+
+    def allocate(self, value, index):
+        """
+        Keeps value if it is a free id in index, otherwise allocates a new one
+
+        :param value: id requested by the object
+        :param index: dict of the objects by id
+        :returns: id to use
+        :rtype: int
+        """
+        if value is None or value in index:
+            return self.next()
+
+        self.claim(value)
+        return value
 
 
 class Semantic(object):
@@ -52,14 +153,47 @@ class Semantic(object):
     def export(self, style=COCO):
         """
         Exports object into specified style
+
+        :param style: name of a style registered with :func:`register_exporter`
+        :raises ValueError: if no exporter is registered for style
         """
-        return {
-            COCO: self.coco(),
-            VGG: self.vgg(),
-            YOLO: self.yolo(),
-            VOC: self.voc(),
-            PAPERJS: self.paperjs()
-        }.get(style)
+        for export, _ in _exporters(self, style):
+            if export is not None:
+                return export(self)
+
+        return None
     
-    def save(self, file):
-        pass
+    def save(self, file_path, style=COCO):
+        """
+        Saves object into a file in the specified style. Styles without a write
+        function are saved as JSON. Paths ending in ``.gz`` are gzipped
+
+        :param file_path: path of the file to write
+        :param style: name of a style registered with :func:`register_exporter`
+        :raises ValueError: if no exporter is registered for style
+        """
+        for export, write in _exporters(self, style):
+            with open_file(file_path, 'wt', encoding='utf-8') as fp:
+                if write is not None:
+                    write(self, fp)
+                else:
+                    json.dump(export(self), fp, default=json_default)
+            return
+
+        raise ValueError('Cannot export {} in style {}'.format(type(self).__name__, style))
+
+
+def _write_voc(obj, fp):
+    element = obj.voc()
+    if element is not None:
+        fp.write(ET.tostring(element, pretty_print=True).decode('utf-8'))
+
+
+register_exporter(COCO, lambda obj: obj.coco())
+register_exporter(VGG, lambda obj: obj.vgg())
+register_exporter(YOLO, lambda obj: obj.yolo())
+register_exporter(VOC, lambda obj: obj.voc(), write=_write_voc)
+register_exporter(PAPERJS, lambda obj: obj.paperjs())
+
+
+__all__ = ["Semantic", "IdCounter", "register_exporter"]
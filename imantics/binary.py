@@ -0,0 +1,182 @@
+import json
+import struct
+import numpy as np
+
+from .annotation import BBox
+from .utils import json_default
+
+
+MAGIC = b'IMANTICS'
+VERSION = 1
+
+#: Byte alignment of the arrays in the file, so they can be viewed in place
+ALIGNMENT = 64
+
+#: Flags of the representations an annotation was created with
+BBOX, MASK, POLYGONS, RLE = 1, 2, 4, 8
+
+#: Flag of annotations whose area is a number of pixels (an int)
+INTEGER_AREA = 16
+
+
+def _align(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _offsets(lengths):
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    return offsets
+
+
+def _concatenate(arrays, dtype):
+    if not arrays:
+        return np.zeros(0, dtype=dtype)
+    return np.concatenate(arrays)
+
+
+def _columns(dataset):
+    """
+    Columnar arrays of the annotations of a dataset
+    """
+    categories = list(dataset.iter_categories())
+    category_index = {id(category): index for index, category in enumerate(categories)}
+
+    columns = {
+        'id': [], 'image': [], 'category': [], 'flags': [],
+        'bbox': [], 'area': [], 'color': []
+    }
+    polygons, rings, coordinates, counts = [], [], [], []
+    metadata = {}
+
+    for position, annotation in enumerate(dataset.iter_annotations()):
+        flags = (BBOX * annotation._init_with_bbox) | (MASK * annotation._init_with_mask) \
+            | (POLYGONS * annotation._init_with_polygons) | (RLE * annotation._init_with_rle) \
+            | (INTEGER_AREA * isinstance(annotation.area, (int, np.integer)))
+
+        columns['id'].append(annotation.id)
+        columns['image'].append(annotation.image.id if annotation.image else -1)
+        columns['category'].append(category_index.get(id(annotation.category), -1))
+        columns['flags'].append(flags)
+        columns['bbox'].append(annotation.bbox.bbox(style=BBox.MIN_MAX))
+        columns['area'].append(annotation.area)
+        columns['color'].append(annotation.color.rgb)
+
+        ring_list = annotation.polygons.polygons if flags & POLYGONS else []
+        polygons.append(len(ring_list))
+        rings.extend(len(ring) for ring in ring_list)
+        coordinates.extend(ring_list)
+
+        # Masks are stored as run-length encodings of the whole image
+        encoding = annotation.rle.counts if flags & (MASK | RLE) else np.zeros(0, dtype=np.int64)
+        counts.append(encoding)
+
+        if annotation.metadata:
+            metadata[position] = annotation.metadata
+
+    arrays = {
+        'annotation_' + name: np.asarray(values).reshape((len(values),) + np.shape(values)[1:])
+        for name, values in columns.items()
+    }
+    arrays['annotation_flags'] = arrays['annotation_flags'].astype(np.uint8)
+    arrays['annotation_area'] = arrays['annotation_area'].astype(np.float64)
+    arrays['annotation_color'] = arrays['annotation_color'].astype(np.uint8).reshape(-1, 3)
+    arrays['annotation_bbox'] = arrays['annotation_bbox'].reshape(-1, 4)
+
+    arrays['polygon_offsets'] = _offsets(polygons)
+    arrays['ring_offsets'] = _offsets(rings)
+    arrays['coordinates'] = _concatenate(coordinates, np.float64)
+    arrays['rle_offsets'] = _offsets([len(encoding) for encoding in counts])
+    arrays['rle_counts'] = _concatenate(counts, np.int64).astype(np.uint32)
+
+    header = {
+        'categories': [category.coco(include=False) for category in categories],
+        'images': [image.coco(include=False) for image in dataset.iter_images()],
+        'annotation_metadata': metadata
+    }
+
+    return header, arrays
+
+
+def write_binary(dataset, fp):
+    """
+    Writes a dataset in the binary container format
+
+    The file starts with ``IMANTICS``, a version and the length of a JSON
+    header, followed by the header and the arrays. Categories and images are
+    stored in the header, annotations as columns: ids, image ids, category
+    positions, flags of the source representations and of integer areas,
+    boxes, areas and colors.
+    Polygons are stored as one flat coordinate buffer with offsets per
+    annotation and ring, masks as run-length encodings.
+
+    :param dataset: dataset to write
+    :type dataset: :class:`Dataset`
+    :param fp: file object opened in binary mode
+    """
+    header, arrays = _columns(dataset)
+    header.update({'name': dataset.name, 'id': dataset.id, 'metadata': dataset.metadata})
+
+    # Offsets are relative to the first array, which is aligned after the header
+    header['arrays'] = {}
+    offset = 0
+    for name, array in arrays.items():
+        array = arrays[name] = np.ascontiguousarray(array)
+        header['arrays'][name] = {'dtype': array.dtype.str, 'shape': array.shape, 'offset': offset}
+        offset = _align(offset + array.nbytes)
+
+    encoded = json.dumps(header, default=json_default).encode('utf-8')
+    fp.write(MAGIC + struct.pack('<II', VERSION, len(encoded)))
+    fp.write(encoded)
+
+    written = len(MAGIC) + 8 + len(encoded)
+    start = _align(written)
+    fp.write(b'\0' * (start - written))
+
+    for name, array in arrays.items():
+        fp.write(array.tobytes())
+        padding = _align(array.nbytes) - array.nbytes
+        fp.write(b'\0' * padding)
+
+
+def read_binary(path, mmap=False):
+    """
+    Reads a file in the binary container format written by :func:`write_binary`
+
+    :param path: path to the file
+    :param mmap: view the arrays in a memory map of the file instead of
+                 reading it into memory
+    :type mmap: bool
+    :returns: tuple (header, arrays)
+    :raise ValueError: Raised if the file is not in the binary format
+    """
+    if mmap:
+        # Plain arrays viewing the map, slicing memmap objects is slow
+        data = np.memmap(path, dtype=np.uint8, mode='r').view(np.ndarray)
+    else:
+        data = np.fromfile(path, dtype=np.uint8)
+
+    prefix = len(MAGIC) + 8
+    if data[:len(MAGIC)].tobytes() != MAGIC:
+        raise ValueError('{} is not an imantics binary file'.format(path))
+
+    version, length = struct.unpack('<II', data[len(MAGIC):prefix].tobytes())
+    if version > VERSION:
+        raise ValueError('Unsupported binary format version {}'.format(version))
+
+    header = json.loads(data[prefix:prefix + length].tobytes().decode('utf-8'))
+    start = _align(prefix + length)
+
+    arrays = {}
+    for name, info in header.pop('arrays').items():
+        dtype = np.dtype(info['dtype'])
+        shape = tuple(info['shape'])
+        offset = start + info['offset']
+        count = int(np.prod(shape)) * dtype.itemsize
+
+        arrays[name] = data[offset:offset + count].view(dtype).reshape(shape)
+
+    return header, arrays
+
+
+__all__ = ["read_binary", "write_binary"]
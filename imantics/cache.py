@@ -0,0 +1,285 @@
+import os
+import uuid
+import hashlib
+import weakref
+import numpy as np
+
+from collections import OrderedDict
+
+
+class GeometryCache(object):
+    """
+    Least recently used cache of derived geometry with a byte budget
+
+    Masks, polygons and run-length encodings generated from another
+    representation are stored here instead of on the objects they were generated
+    from. When the budget is exceeded the least recently used entries are evicted
+    and are generated again on their next use. Entries of an object are removed
+    when it is garbage collected.
+    """
+
+    def __init__(self, budget=256 * 1024 * 1024):
+        """
+        :param budget: maximum number of bytes held by the cache
+        :type budget: int
+        """
+        self._entries = OrderedDict()
+        self._owners = {}
+        self._values = {}
+
+        #: Optional :class:`DiskCache` consulted before rasterizing or tracing
+        self.disk = None
+
+        self.budget = budget
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, obj, name):
+        """
+        :returns: value cached for the attribute name of obj, or None
+        """
+        key = (id(obj), name)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, obj, name, value):
+        """
+        Caches value for the attribute name of obj, None removes the entry.
+        The newest entry is kept even if it is larger than the budget
+        """
+        self._discard((id(obj), name))
+        if value is None:
+            return
+
+        owner = id(obj)
+        if owner not in self._owners:
+            self._owners[owner] = set()
+            weakref.finalize(obj, self._forget, owner)
+        self._owners[owner].add(name)
+
+        # The same value can be cached for several objects, it is only counted once
+        self._entries[(owner, name)] = value
+        counted = self._values.get(id(value))
+        if counted is None:
+            nbytes = getattr(value, 'nbytes', 64)
+            self._values[id(value)] = [nbytes, 1]
+            self.size += nbytes
+        else:
+            counted[1] += 1
+
+        self._evict()
+
+    def resize(self, budget):
+        """
+        Changes the budget, evicting entries if needed
+        """
+        self.budget = budget
+        self._evict()
+
+    def clear(self):
+        """
+        Removes all entries and resets the statistics
+        """
+        self._entries.clear()
+        self._owners.clear()
+        self._values.clear()
+        self.size = self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """
+        :returns: hits, misses, evictions, entries, bytes and budget of the cache
+        :rtype: dict
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(self._entries),
+            'bytes': self.size,
+            'budget': self.budget
+        }
+
+    def _evict(self):
+        while self.size > self.budget and len(self._entries) > 1:
+            _, value = self._entries.popitem(last=False)
+            self._release(value)
+            self.evictions += 1
+
+    def _discard(self, key):
+        value = self._entries.pop(key, None)
+        if value is not None:
+            self._release(value)
+
+    def _release(self, value):
+        counted = self._values[id(value)]
+        counted[1] -= 1
+        if counted[1] == 0:
+            del self._values[id(value)]
+            self.size -= counted[0]
+
+    def _forget(self, owner):
+        for name in self._owners.pop(owner, ()):
+            self._discard((owner, name))
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DiskCache(object):
+    """
+    Persistent cache of rasterized masks and traced polygons
+
+    Every entry is stored in its own ``.npy`` file, named by a hash of the source
+    geometry and the target size, and is memory mapped when read. Masks are
+    stored as packed bits, polygons as a flat coordinate buffer.
+
+    .. code-block:: python
+
+        geometry_cache.disk = DiskCache('/tmp/imantics')
+    """
+
+    _HEADER = 6
+
+    def __init__(self, directory):
+        """
+        :param directory: folder to store the entries in, created if missing
+        """
+        self.directory = str(directory)
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    @staticmethod
+    def key(kind, *parts):
+        """
+        Hash of a conversion and its inputs
+
+        :param kind: name of the conversion
+        :param parts: integers and arrays the result depends on
+        :rtype: str
+        """
+        digest = hashlib.blake2b(kind.encode('utf-8'), digest_size=16)
+        for part in parts:
+            part = np.ascontiguousarray(part)
+            digest.update(str((part.dtype.str, part.shape)).encode('utf-8'))
+            digest.update(part.tobytes())
+        return digest.hexdigest()
+
+    def read_mask(self, key):
+        """
+        :returns: tuple (local array, origin, shape) or None if not cached
+        """
+        data = self._read(key)
+        if data is None:
+            return None
+
+        top, left, height, width, rows, cols = data[:self._HEADER * 8].view(np.int64)
+        bits = np.unpackbits(data[self._HEADER * 8:], count=int(rows * cols))
+        return bits.reshape(int(rows), int(cols)).astype(bool), (top, left), (height, width)
+
+    def write_mask(self, key, local, origin, shape):
+        header = np.array(tuple(origin) + tuple(shape) + local.shape, dtype=np.int64)
+        self._write(key, header.view(np.uint8), np.packbits(local))
+
+    def read_polygons(self, key):
+        """
+        :returns: list of flat coordinate arrays or None if not cached
+        """
+        data = self._read(key)
+        if data is None:
+            return None
+
+        count = int(data[:8].view(np.int64)[0])
+        lengths = data[8:8 * (count + 1)].view(np.int64)
+        coordinates = data[8 * (count + 1):].view(np.int32)
+        return np.split(np.array(coordinates), np.cumsum(lengths)[:-1]) if count else []
+
+    def write_polygons(self, key, polygons):
+        lengths = np.array([len(polygons)] + [len(polygon) for polygon in polygons], dtype=np.int64)
+        coordinates = np.concatenate(polygons).astype(np.int32) if polygons else np.zeros(0, np.int32)
+        self._write(key, lengths.view(np.uint8), coordinates.view(np.uint8))
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + '.npy')
+
+    def _read(self, key):
+        try:
+            data = np.load(self._path(key), mmap_mode='r')
+        except (IOError, OSError, ValueError):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return data
+
+    def _write(self, key, *parts):
+        path = self._path(key)
+        folder = os.path.dirname(path)
+        if not os.path.isdir(folder):
+            os.makedirs(folder, exist_ok=True)
+
+        # Write to a temporary file first so readers never see partial entries
+        temporary = '{}.{}.tmp'.format(path, uuid.uuid4().hex)
+        with open(temporary, 'wb') as fp:
+            np.save(fp, np.concatenate(parts))
+        os.replace(temporary, path)
+        self.writes += 1
+
+    def stats(self):
+        """
+        :returns: hits, misses and writes of the cache
+        :rtype: dict
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'writes': self.writes}
+
+
+#: Cache shared by all annotations, bounding boxes, polygons and masks
+geometry_cache = GeometryCache()
+
+
+class _Cached(object):
+    """
+    Attribute stored in :data:`geometry_cache`
+
+    If source names a true attribute of the object the value is the
+    representation the object was created with, and is stored on the object.
+    Links back to the object a value was generated from are set as
+    :func:`weakref.ref`, so the cache never keeps both ends of a conversion
+    alive.
+    """
+
+    def __init__(self, name, source=None):
+        self.name = name
+        self.source = source
+
+    def __get__(self, obj, owner):
+        if obj is None:
+            return self
+
+        if self.source and obj.__dict__.get(self.source):
+            return obj.__dict__.get(self.name)
+
+        value = geometry_cache.get(obj, self.name)
+        if isinstance(value, weakref.ref):
+            return value()
+        return value
+
+    def __set__(self, obj, value):
+        if self.source and obj.__dict__.get(self.source):
+            obj.__dict__[self.name] = value
+        else:
+            geometry_cache.put(obj, self.name, value)
+
+
+__all__ = ["GeometryCache", "DiskCache", "geometry_cache"]
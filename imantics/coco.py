@@ -0,0 +1,186 @@
+import io
+import re
+import gzip
+import json
+import codecs
+
+from .utils import json_default
+
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+def open_file(path, mode='rb', encoding=None):
+    """
+    Opens a file, transparently using gzip for paths ending in ``.gz``
+    """
+    if str(path).endswith('.gz'):
+        return gzip.open(path, mode, encoding=encoding)
+    return open(path, mode, encoding=encoding)
+
+
+def iter_coco(fp, chunk_size=1 << 20, progress=None):
+    """
+    Parses a COCO JSON file incrementally
+
+    Generates ``(section, item)`` tuples in file order. Elements of list sections
+    (``images``, ``annotations``, ``categories``, ...) are generated one at a time,
+    every other section is generated as a single value. Only the element being
+    parsed is held in memory.
+
+    :param fp: file object opened in binary or text mode
+    :param chunk_size: number of bytes read at a time
+    :param progress: called with the number of bytes read after every read
+    :type progress: callable
+    """
+    reader = _Reader(fp, chunk_size, progress)
+
+    reader.expect('{')
+    if reader.peek() == '}':
+        return
+
+    while True:
+        section = reader.value()
+        reader.expect(':')
+
+        if reader.peek() == '[':
+            reader.expect('[')
+
+            if reader.peek() == ']':
+                reader.expect(']')
+            else:
+                while True:
+                    yield section, reader.value()
+                    if reader.token(',]') == ']':
+                        break
+        else:
+            yield section, reader.value()
+
+        if reader.token(',}') == '}':
+            break
+
+
+def write_coco(dataset, fp):
+    """
+    Writes a dataset in COCO format one object at a time
+
+    Categories, images and annotations are serialized while iterating over the
+    dataset so the complete COCO dict is never built in memory.
+
+    :param dataset: dataset to write
+    :type dataset: :class:`Dataset`
+    :param fp: file object opened in binary or text mode
+    """
+    if isinstance(fp, io.TextIOBase):
+        write = fp.write
+    else:
+        write = lambda text: fp.write(text.encode('utf-8'))
+
+    write('{"info": {}')
+
+    sections = (
+        ('categories', dataset.iter_categories()),
+        ('images', dataset.iter_images()),
+        ('annotations', dataset.iter_annotations())
+    )
+
+    for section, items in sections:
+        write(', "{}": ['.format(section))
+
+        for index, item in enumerate(items):
+            if index > 0:
+                write(', ')
+            write(json.dumps(item.coco(include=False), default=json_default))
+
+        write(']')
+
+    write('}')
+
+
+class _Reader:
+    """
+    Buffered JSON tokenizer over a file object
+    """
+
+    def __init__(self, fp, chunk_size, progress=None):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.progress = progress
+
+        self.buffer = ''
+        self.position = 0
+        self.bytes_read = 0
+        self.eof = False
+
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder('utf-8')()
+
+    def fill(self, size):
+        """
+        Appends the next chunk of the file to the buffer, dropping everything
+        before the current position
+
+        :returns: False if the end of the file was reached
+        """
+        data = self.fp.read(size)
+        self.bytes_read += len(data)
+
+        chunk = self._text.decode(data, final=not data) if isinstance(data, bytes) else data
+
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+
+        if self.progress is not None:
+            self.progress(self.bytes_read)
+
+        self.eof = not data
+        return not self.eof
+
+    def peek(self):
+        """
+        Next non-whitespace character without consuming it
+        """
+        while True:
+            self.position = WHITESPACE.match(self.buffer, self.position).end()
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+
+            if not self.fill(self.chunk_size):
+                raise ValueError('Unexpected end of COCO file')
+
+    def expect(self, character):
+        self.token(character)
+
+    def token(self, characters):
+        character = self.peek()
+        if character not in characters:
+            raise ValueError('Expected one of {!r} but found {!r}'.format(characters, character))
+
+        self.position += 1
+        return character
+
+    def value(self):
+        """
+        Decodes the next complete JSON value
+        """
+        self.peek()
+
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self.buffer, self.position)
+
+                # Values ending with the buffer (like numbers) might continue
+                if end < len(self.buffer) or self.eof:
+                    self.position = end
+                    return value
+
+            except ValueError:
+                if self.eof:
+                    raise
+
+            # Read at least as much as is buffered so large values are not
+            # decoded from the start too many times
+            self.fill(max(self.chunk_size, len(self.buffer) - self.position))
+
+
+__all__ = ["iter_coco", "open_file", "write_coco"]
@@ -1,76 +1,69 @@
-import random
+from lxml import etree as ET
+
+import os
 import numpy as np
 
-from .annotation import Annotation
+from types import MappingProxyType
+
+from .annotation import Annotation, BBox, BBoxArray, Polygons, RLE, _simplify
 from .category import Category
-from .basic import Semantic
+from .basic import Semantic, IdCounter, register_exporter
+from .coco import iter_coco, open_file, write_coco
+from .binary import read_binary, write_binary, BBOX, MASK, POLYGONS, RLE as RLE_FLAG, INTEGER_AREA
+from .color import Color
+from .styles import COCO
+from .query import AnnotationIndex
 from .image import Image
+from .store import MaskStore
 
 
 class Dataset(Semantic):
     @classmethod
-    def from_xml(cls, xml_folder, name="XML Dataset"):
-        extensions = ("jpg","JPG","png")
-
-        from xmljson import badgerfish as bf
-        from xml.etree.ElementTree import fromstring
+    def from_xml(cls, xml_folder, name="XML Dataset", workers=None):
         """
-        Generates a dataset from a folder with XML and corresponding images
+        Generates a dataset from a folder (including subfolders) of images with
+        Pascal VOC XML files next to them
 
-        :param xml_folder:
-        :type xml_folder: pathlib.Path
-        :raise ImportError: Raised if xml_folder is a `pathlib.Path`
-                            object and it cannot be imported
+        Every XML file is parsed once, and image sizes are taken from its
+        ``<size>`` element. Images without an XML file are skipped.
+
+        :param xml_folder: folder to search
+        :type xml_folder: str, pathlib.Path
+        :param workers: number of processes used to parse the XML files
+        :type workers: int
         """
         dataset = cls(name)
-        xml_list = []
-        id_counter = 0
-
-        for ext in extensions:
-            xml_list += list(xml_folder.glob(f"*.{ext}"))
-        categories = []
-        for idx, imgp in enumerate(xml_list):
-            xml = bf.data(fromstring(open(imgp.with_suffix(".xml"),"r").read()))
-            if "object" in xml["annotation"].keys():
-                if type(xml["annotation"]["object"]) is not list:
-                    cat = xml["annotation"]["object"]["name"]["$"]
-                    categories.append(cat)
-                else:
-                    for ann in xml["annotation"]["object"]:
-                        cat = ann["name"]["$"]
-                        categories.append(cat)
-
-        categories = list(set(categories))
 
-        xml_categories = {cat: Category(cat,id=idx+1) for idx,cat in enumerate(categories)}
-
-        for idx, imgp in enumerate(xml_list):
-            image = Image.from_path(str(imgp))
-            image.id = idx
-            image.dataset = name
-
-
-            xml = bf.data(fromstring(open(imgp.with_suffix(".xml"),"r").read()))
-            if "object" in xml["annotation"].keys():
-
-                # Handle single object case
-                if type(xml["annotation"]["object"]) is not list:
-                    xml["annotation"]["object"] = [xml["annotation"]["object"]]
+        jobs = []
+        for path, _ in sorted(Image._scan(str(xml_folder))):
+            xml_path = os.path.splitext(path)[0] + '.xml'
+            if os.path.isfile(xml_path):
+                jobs.append((xml_path, path))
+
+        if workers and workers > 1 and jobs:
+            from concurrent.futures import ProcessPoolExecutor
+            xml_paths, paths = zip(*jobs)
+            chunk_size = max(1, len(jobs) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                parsed = list(executor.map(_read_voc, xml_paths, paths, chunksize=chunk_size))
+        else:
+            parsed = [_read_voc(xml_path, path) for xml_path, path in jobs]
 
-                for ann in xml["annotation"]["object"]:
-                    i = ann["bndbox"]
-                    cat = ann["name"]["$"]
+        categories = {}
+        for image_id, ((_, path), (width, height, objects)) in enumerate(zip(jobs, parsed)):
+            image = Image(path=path, id=image_id, width=width, height=height, dataset=dataset)
 
-                    x,y,xx,yy = (int(i["xmin"]["$"]), int(i["ymin"]["$"]),int(i["xmax"]["$"]),int(i["ymax"]["$"]))
-                    bbox = [x,y,xx,yy]
+            for category_name, bbox, metadata in objects:
+                category = categories.get(category_name)
+                if category is None:
+                    category = Category(category_name, id=len(categories) + 1)
+                    categories[category_name] = category
 
-                    fin_ann = Annotation(id=id_counter, image=image, bbox=bbox,category=xml_categories[cat])
-                    id_counter += 1
+                image.add(Annotation(image=image, category=category, bbox=bbox, metadata=metadata))
 
-                    image.add(fin_ann)
             dataset.add(image)
-        return dataset
 
+        return dataset
 
     @classmethod
     def from_coco(cls, coco_obj, name="COCO Datset"):
@@ -106,14 +99,8 @@ class Dataset(Semantic):
 
                 image = dataset.images[image_id]
                 category = index_categories[category_id]
-                segmentation = annotation.get('segmentation')
-                metadata = annotation.get('metadata', {})
 
-                # color can be stored in the metadata
-                color = annotation.get('color', metadata.get('color'))
-
-                annotation = Annotation(image, category, polygons=segmentation,\
-                                        color=color, metadata=metadata)
+                annotation = Annotation.from_coco(annotation, image=image, category=category)
                 dataset.add(annotation)
 
             return dataset
@@ -124,13 +111,135 @@ class Dataset(Semantic):
 
         return None
 
+    @classmethod
+    def from_coco_file(cls, path, name="COCO Dataset", progress=None):
+        """
+        Generates a dataset from a COCO JSON file (optionally gzipped), building
+        categories, images and annotations while the file is parsed instead of
+        loading the whole file first
+
+        Annotations found before their image or category are kept until the end
+        of the file.
+
+        :param path: path to the COCO file
+        :param progress: called with the number of bytes read as the file is parsed
+        :type progress: callable
+        :raise KeyError: Raised if an annotation references a missing image or category
+        """
+        dataset = cls(name)
+        categories = {}
+        pending = []
+
+        def add_annotation(coco):
+            image = dataset.images.get(coco.get('image_id'))
+            category = categories.get(coco.get('category_id'))
+
+            if image is None or category is None:
+                return False
+
+            dataset.add(Annotation.from_coco(coco, image=image, category=category))
+            return True
+
+        with open_file(path, 'rb') as fp:
+            for section, item in iter_coco(fp, progress=progress):
+
+                if section == 'categories':
+                    category = Category.from_coco(item)
+                    categories[category.id] = category
+
+                elif section == 'images':
+                    dataset.add(Image.from_coco(item, dataset=dataset))
+
+                elif section == 'annotations':
+                    if not add_annotation(item):
+                        pending.append(item)
+
+        for item in pending:
+            if not add_annotation(item):
+                raise KeyError('Annotation references missing image {} or category {}'\
+                               .format(item.get('image_id'), item.get('category_id')))
+
+        return dataset
+
+    @classmethod
+    def from_binary(cls, path, name=None, mmap=False):
+        """
+        Generates a dataset from a file written by :meth:`save_binary`
+
+        :param path: path to the file
+        :param name: name of the dataset (defaults: name stored in the file)
+        :param mmap: view the arrays in a memory map of the file instead of
+                     reading it into memory, polygons of annotations are still
+                     copied when they are created
+        :type mmap: bool
+        :raise ValueError: Raised if the file is not in the binary format
+        """
+        header, arrays = read_binary(path, mmap=mmap)
+        dataset = cls(name or header.get('name', ''), id=header.get('id', 0),
+                      metadata=header.get('metadata', {}))
+
+        categories = [Category.from_coco(category) for category in header['categories']]
+        for image in header['images']:
+            dataset.add(Image.from_coco(image, dataset=dataset))
+
+        metadata = header['annotation_metadata']
+        ids = arrays['annotation_id'].tolist()
+        image_ids = arrays['annotation_image'].tolist()
+        category_positions = arrays['annotation_category'].tolist()
+        flags = arrays['annotation_flags'].tolist()
+        boxes = arrays['annotation_bbox'].tolist()
+        areas = arrays['annotation_area'].tolist()
+        colors = arrays['annotation_color'].tolist()
+
+        # Split the flat buffers once instead of slicing them per annotation
+        rings = np.split(arrays['coordinates'], arrays['ring_offsets'][1:-1])
+        polygon_offsets = arrays['polygon_offsets'].tolist()
+        rle_offsets = arrays['rle_offsets'].tolist()
+        rle_counts = arrays['rle_counts']
+
+        for position, annotation_id in enumerate(ids):
+            image = dataset.images[image_ids[position]]
+            source = {}
+
+            if flags[position] & POLYGONS:
+                source['polygons'] = Polygons(rings[polygon_offsets[position]:polygon_offsets[position + 1]])
+
+            if flags[position] & (MASK | RLE_FLAG):
+                counts = rle_counts[rle_offsets[position]:rle_offsets[position + 1]]
+                rle = RLE(counts, width=image.width, height=image.height)
+                if flags[position] & RLE_FLAG:
+                    source['rle'] = rle
+                if flags[position] & MASK:
+                    source['mask'] = rle.mask()
+
+            area = int(areas[position]) if flags[position] & INTEGER_AREA else areas[position]
+            category = categories[category_positions[position]] if category_positions[position] >= 0 else None
+            annotation = Annotation._restore(image, category, annotation_id, Color(rgb=tuple(colors[position])),
+                                             metadata.get(str(position), {}), area, BBox(boxes[position]),
+                                             source_bbox=bool(flags[position] & BBOX), **source)
+
+            # Ids of a stored dataset are unique, only colliding ids need the full indexing
+            if annotation_id in dataset.annotations or annotation_id in image.annotations or category is None:
+                dataset.add(annotation)
+                continue
+
+            dataset.annotations[annotation_id] = image.annotations[annotation_id] = annotation
+            dataset.categories.setdefault(category.name.lower(), category)
+            image.categories.setdefault(category.name.lower(), category)
+            dataset.annotation_ids.claim(annotation_id)
+            image.annotation_ids.claim(annotation_id)
+
+        return dataset
+
+    _c_query_index = None
+
     def __init__(self, name, images=[], id=0, metadata={}):
         self.annotations = {}
         self.categories = {}
         self.images = {}
         self.name = name
-        self._max_ann_id = None
-        self._max_img_id = None
+        self.annotation_ids = IdCounter()
+        self.image_ids = IdCounter()
         for image in images:
             image.index(self)
 
@@ -153,7 +262,7 @@ class Dataset(Semantic):
             annotation = image
             image = self.images.get(annotation.image.id)
 
-            annotation.index(self)
+            self._index_annotation(annotation)
             image.add(annotation)
             return
 
@@ -162,6 +271,55 @@ class Dataset(Semantic):
 
         image.index(self)
 
+    #: :class:`MaskStore` holding the masks of the annotations, see :meth:`store_masks`
+    mask_store = None
+
+    def store_masks(self, path, mode='w'):
+        """
+        Moves the masks of annotations created from a mask into a memory mapped
+        :class:`MaskStore`, so they are paged in from disk when used instead of
+        being held in memory. Masks of annotations added afterwards are appended
+        to the store as they are added, and are indexed on disk when the store
+        is closed or garbage collected.
+
+        :param path: path of the store
+        :param mode: mode to open the store with, see :class:`MaskStore`
+        :returns: the store
+        :rtype: :class:`MaskStore`
+        """
+        self.mask_store = MaskStore(path, mode=mode)
+        for annotation in self.iter_annotations():
+            self._store_mask(annotation)
+        self.mask_store.flush()
+        return self.mask_store
+
+    def _store_mask(self, annotation):
+        if not annotation._init_with_mask or isinstance(annotation.mask.local, np.memmap):
+            return
+        annotation._c_mask = self.mask_store.append(annotation.mask)
+
+    def _index_annotation(self, annotation):
+        annotation.index(self)
+
+        if self.mask_store is not None:
+            self._store_mask(annotation)
+
+        if self._c_query_index is not None:
+            self._c_query_index.add(annotation)
+
+    def query(self):
+        """
+        Starts a query over the annotations of the dataset. Indexes by category,
+        image and area are built on first use and kept up to date as annotations
+        are added
+
+        :rtype: :class:`Query`
+        """
+        if self._c_query_index is None:
+            self._c_query_index = AnnotationIndex(self.iter_annotations())
+
+        return self._c_query_index.query()
+
     def iter_images(self):
         """
         Generator to iterate over all images
@@ -184,12 +342,22 @@ class Dataset(Semantic):
         for _, category in self.categories.items():
             yield category
 
-    def split(self, ratios, random=False):
+    def bboxes(self):
         """
-        Splits dataset images into mutiple sub datasets of the given ratios
+        Copy of the bounding boxes of all annotations in a single array. Changes
+        to the array are not applied to the annotations
 
-        If a tuple of (1, 1, 2) was passed in the result would return 3 dataset
-        objects of 25%, 25% and 50% of the images.
+        :returns: bounding boxes in the order of :meth:`iter_annotations`
+        :rtype: :class:`BBoxArray`
+        """
+        return BBoxArray.from_annotations(self.iter_annotations())
+
+    def split(self, ratios, random=False, seed=None, stratify=False):
+        """
+        Splits dataset images into mutiple read-only views of the given ratios
+
+        If a tuple of (1, 1, 2) was passed in the result would return 3 views
+        of 25%, 25% and 50% of the images.
 
         .. code-block:: python
 
@@ -197,54 +365,204 @@ class Dataset(Semantic):
 
         :param ratios: ratios to split dataset into
         :type ratios: tuple, list
-        :param random: randomize the images before spliting
-        :returns: tuple of datasets with length of the number of ratios
-        :rtype: tuple
+        :param random: shuffle the images before spliting
+        :param seed: seed of the shuffle, implies random
+        :type seed: int
+        :param stratify: keep the frequency of categories similar in every split,
+                         images are grouped by their rarest category
+        :returns: list of :class:`DatasetView` with length of the number of ratios
+        :rtype: list
         """
-
         if len(ratios) >= len(self.images):
             raise ValueError("Too many values in ratio array compared to dataset size")
 
-        ratios = np.array(ratios)
-        percents = ratios / ratios.sum()
+        ratios = np.array(ratios, dtype=np.float64)
+        if np.any(ratios < 0) or ratios.sum() <= 0:
+            raise ValueError("Ratios must be positive")
 
-        if percents.sum() != 1:
-            raise ValueError("Percents don't add up to 100%")
+        image_ids, groups = self._split_order(random or seed is not None, seed, stratify)
+        assignment = _apportion(ratios / ratios.sum(), len(image_ids), groups)
 
-        percents = percents[:-1] # don't need last percent, just take what is left
-        percents *= len(self.images) # how many images in each dataset
-        percents = percents.round().astype(np.int) # prepare where we split
+        return [DatasetView(self, image_ids[assignment == index], name="split" + str(index))
+                for index in range(len(ratios))]
 
-        if random:
-            im = random.sample(list(self.images.keys()))
-        else:
-            im = list(self.images.keys())
+    def kfold(self, folds, random=False, seed=None, stratify=False):
+        """
+        Generates train and test views for k-fold cross validation. Images are
+        assigned to folds once, so every fold only selects ids
+
+        :param folds: number of folds
+        :type folds: int
+        :param random: shuffle the images before assigning folds
+        :param seed: seed of the shuffle, implies random
+        :param stratify: keep the frequency of categories similar in every fold
+        :returns: generator of (train, test) :class:`DatasetView` tuples
+        """
+        if folds < 2 or folds > len(self.images):
+            raise ValueError("Number of folds must be between 2 and the number of images")
+
+        image_ids, groups = self._split_order(random or seed is not None, seed, stratify)
+        assignment = _apportion(np.full(folds, 1.0 / folds), len(image_ids), groups)
+
+        for index in range(folds):
+            test = assignment == index
+            yield (DatasetView(self, image_ids[~test], name="train" + str(index)),
+                   DatasetView(self, image_ids[test], name="test" + str(index)))
+
+    def _split_order(self, shuffle, seed, stratify):
+        """
+        Orders the image ids for splitting
+
+        :returns: tuple of the image ids and a group number per image (None if
+                  not stratified)
+        """
+        image_ids = np.empty(len(self.images), dtype=object)
+        image_ids[:] = list(self.images.keys())
+
+        if shuffle:
+            image_ids = image_ids[np.random.RandomState(seed).permutation(len(image_ids))]
+
+        if not stratify:
+            return image_ids, None
+
+        names = []
+        frequency = {}
+        for image_id in image_ids:
+            image_names = {a.category.name.lower() for a in self.images[image_id].iter_annotations()}
+            for name in image_names:
+                frequency[name] = frequency.get(name, 0) + 1
+            names.append(image_names)
+
+        # Images are grouped by their rarest category, unlabeled images form their own group
+        ranks = {name: rank for rank, name in enumerate(sorted(frequency, key=lambda n: (frequency[n], n)))}
+        groups = [min(ranks[name] for name in image_names) if image_names else len(ranks)
+                  for image_names in names]
+
+        return image_ids, np.array(groups, dtype=np.int64)
+
+    def precompute(self, attributes=('polygons', 'bbox', 'area'), workers=None):
+        """
+        Generates and caches representations of all annotations, optionally
+        spread over a pool of processes
+
+        :param attributes: names of the representations to generate, any of
+                           ``mask``, ``polygons``, ``bbox``, ``rle`` and ``area``
+        :type attributes: list, tuple
+        :param workers: number of processes used
+        :type workers: int
+        """
+        self._precompute(self.iter_annotations(), attributes, workers)
+
+    def _precompute(self, annotations, attributes, workers):
+        """
+        Generates the missing attributes of annotations and caches them
+
+        :returns: dict of the representations generated by worker processes,
+                  by ``id`` of the annotation
+        """
+        jobs = []
+        for annotation in annotations:
+            missing = annotation._missing(attributes)
+            if missing:
+                jobs.append((annotation, missing))
+
+        if not (workers and workers > 1) or len(jobs) < 2:
+            for annotation, missing in jobs:
+                annotation.precompute(missing)
+            return {}
+
+        from concurrent.futures import ProcessPoolExecutor
+        sources = [annotation._source() for annotation, _ in jobs]
+        sizes = [annotation.size for annotation, _ in jobs]
+        chunk_size = max(1, len(jobs) // (workers * 4))
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(_precompute, sources, sizes, [m for _, m in jobs], chunksize=chunk_size)
+
+            generated = {}
+            for (annotation, _), result in zip(jobs, results):
+                for attribute, value in result.items():
+                    setattr(annotation, '_c_' + attribute, value)
+                generated[id(annotation)] = result
+
+        return generated
+
+    def simplify(self, tolerance=1.0, max_vertices=None):
+        """
+        Simplifies the polygons of all annotations created from polygons or
+        masks at once, see :meth:`Polygons.simplify`. Call it before :meth:`coco`
+        to export the simplified polygons
+
+        :param tolerance: maximum distance in pixels of removed vertices
+        :param max_vertices: maximum number of vertices of each polygon
+        :returns: number of simplified annotations, and vertices before and after
+        :rtype: dict
+        """
+        annotations = [annotation for annotation in self.iter_annotations()
+                       if annotation._init_with_polygons or annotation._init_with_mask]
+        polygons = [annotation.polygons.polygons for annotation in annotations]
 
-        splits = np.split(im, percents)
+        rings = _simplify([ring for rings in polygons for ring in rings], tolerance, max_vertices)
 
-        datasets = []
-        for idx, split in enumerate(splits):
-            tmp_images = []
+        position = 0
+        for annotation, original in zip(annotations, polygons):
+            annotation._set_polygons(Polygons(rings[position:position + len(original)]))
+            position += len(original)
 
-            for key in split:
-                # get all images corresponding to the split's keys
-                tmp_images.append(self.images.get(key))
+        before = sum(len(ring) for rings in polygons for ring in rings) // 2
+        after = sum(len(ring) for ring in rings) // 2
 
-            dataset = Dataset("split" + str(idx), images=tmp_images)
-            datasets.append(dataset)
+        return {
+            'annotations': len(annotations),
+            'before': before,
+            'after': after,
+            'reduction': 1 - after / float(before) if before else 0
+        }
+
+    def coco(self, workers=None):
+        """
+        Generates COCO format of the dataset
 
-        return datasets
+        :param workers: number of processes used to generate the polygons, bounding
+                        boxes and areas of the annotations
+        :type workers: int
+        """
+        generated = {}
+        if workers and workers > 1:
+            annotations = list(self.iter_annotations())
+            generated = self._precompute(annotations, ('bbox', 'area'), workers)
+            # Crowd annotations are exported as run-length encodings
+            polygons = self._precompute((a for a in annotations if not a._init_with_rle), ('polygons',), workers)
+            for key, result in polygons.items():
+                generated.setdefault(key, {}).update(result)
+
+        # Results of the workers are held here until exported, so they are not
+        # generated again if the geometry cache evicted them in the meantime
+        exported = []
+        for annotation in self.iter_annotations():
+            for attribute, value in generated.pop(id(annotation), {}).items():
+                setattr(annotation, '_c_' + attribute, value)
+            exported.append(annotation.coco(include=False))
 
-    def coco(self):
         coco = {
             'info': {},
             'categories': [c.coco(include=False) for c in self.iter_categories()],
             'images': [i.coco(include=False) for i in self.iter_images()],
-            'annotations': [a.coco(include=False) for a in self.iter_annotations()]
+            'annotations': exported
         }
 
         return coco
 
+    def save_binary(self, path):
+        """
+        Saves the dataset in the binary container format, which can be loaded
+        with :meth:`from_binary` without parsing any JSON for the annotations
+
+        :param path: path to the file
+        """
+        with open(path, 'wb') as fp:
+            write_binary(self, fp)
+
     def yolo(self):
         yolo = {}
 
@@ -254,4 +572,137 @@ class Dataset(Semantic):
         return yolo
 
 
-__all__ = ["Dataset"]
+class DatasetView(Dataset):
+    """
+    Read-only view of a subset of the images of a :class:`Dataset`
+
+    Only the ids of the images are stored; images, annotations and categories
+    are those of the parent dataset. Views can be exported, queried and split
+    like a dataset, but not modified.
+    """
+
+    def __init__(self, parent, image_ids, name=None):
+        self.parent = parent
+        self.name = name if name else parent.name
+        self._image_keys = image_ids
+
+        self._c_images = None
+        self._c_annotations = None
+
+        Semantic.__init__(self, parent.id, parent.metadata)
+
+    @property
+    def images(self):
+        if self._c_images is None:
+            images = self.parent.images
+            self._c_images = MappingProxyType({key: images[key] for key in self._image_keys})
+        return self._c_images
+
+    @property
+    def annotations(self):
+        if self._c_annotations is None:
+            self._c_annotations = MappingProxyType({
+                annotation.id: annotation
+                for image in self.iter_images()
+                for annotation in image.iter_annotations()
+            })
+        return self._c_annotations
+
+    @property
+    def categories(self):
+        return MappingProxyType(self.parent.categories)
+
+    def add(self, image):
+        raise TypeError("Dataset views are read-only")
+
+    def query(self):
+        """
+        Starts a query over the annotations of the view, using the indexes of
+        the parent dataset
+
+        :rtype: :class:`Query`
+        """
+        return self.parent.query().image(*self._image_keys)
+
+
+def _apportion(percents, length, groups=None):
+    """
+    Assigns items to splits of the given percents. Without groups the splits are
+    consecutive. With groups every group is divided as close to percents as
+    possible: each item goes to the split furthest below its share of the group,
+    ties are broken by the share of all items
+
+    :returns: split index of every item
+    :rtype: numpy.ndarray
+    """
+    if groups is None:
+        stops = np.round(np.cumsum(percents) * length).astype(np.int64)
+        return np.searchsorted(stops, np.arange(length), side='right')
+
+    assignment = np.zeros(len(groups), dtype=np.int64)
+    totals = np.zeros(len(percents))
+    counts = {}
+
+    for index, group in enumerate(groups):
+        count = counts.get(group)
+        if count is None:
+            count = counts[group] = np.zeros(len(percents))
+
+        seen = count.sum() + 1
+        deficit = percents * seen - count
+        overall = percents * (index + 1) - totals
+
+        split = max(range(len(percents)), key=lambda j: (round(deficit[j], 9), overall[j], -j))
+        assignment[index] = split
+        count[split] += 1
+        totals[split] += 1
+
+    return assignment
+
+
+def _precompute(source, size, attributes):
+    """
+    Generates representations of an annotation created from source. Runs in
+    the worker processes of :meth:`Dataset.precompute`
+
+    :returns: dict of representations by name
+    """
+    width, height = size
+    annotation = Annotation(width=width, height=height, **source)
+
+    # Representations linked through the geometry cache are not pickled,
+    # so only the requested ones are sent back
+    return {attribute: getattr(annotation, attribute) for attribute in attributes}
+
+
+def _read_voc(xml_path, image_path):
+    """
+    Reads the image size and objects of a Pascal VOC XML file
+
+    :returns: tuple (width, height, objects) where objects is a list of
+              (category name, bbox, metadata) tuples
+    """
+    root = ET.parse(xml_path).getroot()
+
+    width = int(root.findtext('size/width') or 0)
+    height = int(root.findtext('size/height') or 0)
+    if width <= 0 or height <= 0:
+        width, height = Image._probe(image_path)
+
+    objects = []
+    for element in root.iterfind('object'):
+        bbox = [int(float(element.findtext('bndbox/' + key)))
+                for key in ('xmin', 'ymin', 'xmax', 'ymax')]
+        metadata = {
+            'pose': element.findtext('pose', 'Unspecified'),
+            'difficult': int(element.findtext('difficult') or 0)
+        }
+        objects.append((element.findtext('name'), bbox, metadata))
+
+    return width, height, objects
+
+
+register_exporter(COCO, write=write_coco, cls=Dataset)
+
+
+__all__ = ["Dataset", "DatasetView"]
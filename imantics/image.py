@@ -7,8 +7,9 @@ import json
 import numpy as np
 
 from .annotation import *
-from .basic import Semantic
-from .utils import json_default
+from .basic import Semantic, IdCounter
+from .spatial import SpatialIndex
+from .utils import json_default, image_size
 from .styles import COCO, VGG, VOC, YOLO
 
 
@@ -17,24 +18,89 @@ class Image(Semantic):
     FORMATS = ('.png', '.jpg', '.jpeg', '.jpe', '.tiff', '.bmp', '.sr', '.ras')
 
     @classmethod
-    def from_folder(cls, directory):
+    def from_folder(cls, directory, workers=None, manifest=None):
         """
         Creates :class:`Image`'s from all images found in directory
 
+        Images are sorted by path so ids are assigned the same way on every scan.
+        Dimensions can be cached in a manifest file, in which case only files whose
+        size or modification time changed are read again.
+
+        :param directory: folder to search (including subfolders)
+        :param workers: number of threads used to read image sizes
+        :type workers: int
+        :param manifest: path to a JSON file caching the image dimensions
+        :type manifest: str
         :returns: list of :class:`Image`'s
         """
-        image_id = 0
+        entries = sorted(cls._scan(directory), key=lambda entry: entry[0])
+
+        cache = {}
+        if manifest and os.path.isfile(manifest):
+            with open(manifest, 'r') as fp:
+                cache = json.load(fp)
+
+        sizes = [None] * len(entries)
+        missing = []
+        for index, (path, stat) in enumerate(entries):
+            cached = cache.get(os.path.relpath(path, directory))
+            if cached and cached[:2] == [stat.st_size, stat.st_mtime]:
+                sizes[index] = tuple(cached[2:])
+            else:
+                missing.append(index)
+
+        paths = [entries[index][0] for index in missing]
+        if workers and workers > 1:
+            from concurrent.futures import ThreadPoolExecutor
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                probed = list(executor.map(cls._probe, paths))
+        else:
+            probed = [cls._probe(path) for path in paths]
+
+        for index, size in zip(missing, probed):
+            sizes[index] = size
+
+        # Only rewrite the manifest if something changed
+        if manifest and (missing or len(cache) != len(entries)):
+            cache = {
+                os.path.relpath(path, directory): [stat.st_size, stat.st_mtime, width, height]
+                for (path, stat), (width, height) in zip(entries, sizes)
+            }
+            with open(manifest, 'w') as fp:
+                json.dump(cache, fp)
+
         images = []
-        for path, _, files in os.walk(directory):
-            for name in files:
-                file_path = os.path.join(path, name)
-                if file_path.lower().endswith(cls.FORMATS):
-                    images.append(cls.from_path(file_path))
-                    images[image_id].id = image_id
-                    image_id += 1
+        for image_id, ((path, _), (width, height)) in enumerate(zip(entries, sizes)):
+            images.append(cls(path=path, id=image_id, width=width, height=height))
 
         return images
 
+    @classmethod
+    def _scan(cls, directory):
+        """
+        Generates the path and stat of every image file in directory. Like
+        ``os.walk``, symbolic links to directories are not followed
+        """
+        folders = [directory]
+        while folders:
+            for entry in os.scandir(folders.pop()):
+                if entry.is_dir(follow_symlinks=False):
+                    folders.append(entry.path)
+                elif os.path.splitext(entry.name)[1].lower() in cls.FORMATS:
+                    yield entry.path, entry.stat()
+
+    @staticmethod
+    def _probe(path):
+        """
+        Reads the (width, height) of an image, only decoding the pixels if
+        the header can not be read
+        """
+        size = image_size(path)
+        if size is None:
+            height, width = cv2.imread(path).shape[:2]
+            return width, height
+        return size
+
     @classmethod
     def from_path(cls, path):
         """
@@ -44,10 +110,8 @@ class Image(Semantic):
         if os.path.isdir(path):
             return Image.from_folder(path)
 
-        brg = cv2.imread(path)
-        image_array = cv2.cvtColor(brg, cv2.COLOR_BGR2RGB)
-
-        return cls(image_array, path=path)
+        width, height = cls._probe(path)
+        return cls(path=path, width=width, height=height)
 
     @classmethod
     def from_coco(cls, coco, dataset=None):
@@ -89,11 +153,15 @@ class Image(Semantic):
     annotations = {}
     categories = {}
 
+    _c_array = None
+    _c_spatial_index = None
+
     def __init__(self, image_array=None, annotations=[], path="", id=0, metadata={}, dataset=None, width=0, height=0):
 
         self.dataset = dataset
         self.annotations = {}
         self.categories = {}
+        self.annotation_ids = IdCounter()
 
         # Index annotation
         for index, annotation in enumerate(annotations):
@@ -110,12 +178,33 @@ class Image(Semantic):
             self.height, self.width = (height, width)
         else:
             self.height, self.width = image_array.shape[:2]
+            self._c_array = image_array
 
         self.size = (self.width, self.height)
         self.file_name = os.path.basename(self.path)
 
         super(Image, self).__init__(id, metadata)
 
+    @property
+    def array(self):
+        """
+        RGB pixel array of the image. Only an array the image was created with
+        is kept, otherwise the file at :attr:`path` is decoded on every access.
+        Images without either are black.
+
+        :raises IOError: if the file at :attr:`path` can not be decoded
+        """
+        if self._c_array is not None:
+            return self._c_array
+
+        if not self.path:
+            return np.zeros((self.height, self.width, 3), dtype=np.uint8)
+
+        bgr = cv2.imread(self.path)
+        if bgr is None:
+            raise IOError('Cannot read image {}'.format(self.path))
+        return cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
+
     def add(self, annotation, category=None):
         """
         Adds an annotation, list of annotation, mask, polygon or bbox to current image.
@@ -132,12 +221,19 @@ class Image(Semantic):
 
         if isinstance(annotation, Mask):
 
-            height, width = annotation.array.shape[:2]
+            height, width = annotation.shape[:2]
             if width == self.width and height == self.height:
                 annotation = Annotation.from_mask(annotation, image=self, category=category)
             else:
                 raise ValueError('Cannot add annotaiton of size {} to image of size {}'\
-                                 .format(annotation.array.shape, (self.height, self.width)))
+                                 .format(annotation.shape, (self.height, self.width)))
+
+        if isinstance(annotation, RLE):
+            if annotation.size == self.size:
+                annotation = Annotation.from_rle(annotation, image=self, category=category)
+            else:
+                raise ValueError('Cannot add annotaiton of size {} to image of size {}'\
+                                 .format(annotation.size, self.size))
 
         if isinstance(annotation, BBox):
             annotation = Annotation.from_bbox(annotation, image=self, category=category)
@@ -148,22 +244,49 @@ class Image(Semantic):
         annotation.set_image(self)
         annotation.index(self)
 
+        if self._c_spatial_index is not None:
+            self._c_spatial_index.add(annotation)
+
+    def spatial_index(self, cell_size=64):
+        """
+        Grid index over the annotations for region, point and nearest neighbour
+        queries. It is built on first use and updated by :meth:`add`
+
+        :param cell_size: width and height of a grid cell in pixels
+        :rtype: :class:`SpatialIndex`
+        """
+        if self._c_spatial_index is None or self._c_spatial_index.cell_size != cell_size:
+            self._c_spatial_index = SpatialIndex(self.iter_annotations(), cell_size=cell_size)
+
+        return self._c_spatial_index
+
     def index(self, dataset):
-        image_index = dataset.images
+        """
+        Adds the image and its annotations to the index of a :class:`Dataset`.
+        The id of the image is kept unless it is already used by another image,
+        in which case the next free id is allocated. The same goes for the ids
+        of the annotations, which are then changed in the image too
 
-        if dataset._max_img_id is None:
-            if image_index.get(self.id):
-                self.id = max(image_index.keys()) + 1
-                dataset._max_img_id = self.id
+        :type dataset: :class:`Dataset`
+        """
+        image_index = dataset.images
 
-        else:
-            dataset._max_img_id += 1
-            self.id = dataset._max_img_id
+        if image_index.get(self.id) is not self:
+            self.id = dataset.image_ids.allocate(self.id, image_index)
 
         image_index[self.id] = self
 
-        for annotation in self.iter_annotations():
-            annotation.index(dataset)
+        annotations = list(self.iter_annotations())
+        for annotation in annotations:
+            dataset._index_annotation(annotation)
+
+        # Annotations whose ids were already used in the dataset got new ones
+        if any(self.annotations.get(annotation.id) is not annotation for annotation in annotations):
+            for key in [key for key in self.annotations if isinstance(key, int)]:
+                del self.annotations[key]
+            for annotation in annotations:
+                self.annotations[annotation.id] = annotation
+                self.annotation_ids.claim(annotation.id)
 
     def draw(self, bbox=True, outline=True, mask=True, text=True, thickness=3, \
              alpha=0.5, categories=None, text_scale = 0.5, color_by_category=False):
@@ -171,6 +294,9 @@ class Image(Semantic):
         Draws annotations on top of the image. If no image is loaded, annotations will be applied
         to a black image array.
 
+        Masks are blended first, inside of their bounding boxes, into a single copy of the
+        image; outlines, bboxes and text are then drawn on top of it in place.
+
         :param bbox: Draw bboxes
         :param outline: Draw mask outlines
         :param mask: Draw masks
@@ -181,31 +307,35 @@ class Image(Semantic):
         :returns: Image array with annotations
         :rtype: numpy.ndarray
         """
+        array = self.array
+        if array.ndim == 2:
+            temp_image = cv2.cvtColor(array, cv2.COLOR_GRAY2BGR)
+        else:
+            temp_image = cv2.cvtColor(array, cv2.COLOR_RGB2BGR)
 
-
-        temp_image = cv2.imread(self.path)
-        if temp_image is None:
-            temp_image = np.zeros((self.height,self.width,3)).astype(np.uint8)
-        temp_image.setflags(write=True)
-
+        annotations = []
         for annotation in self.iter_annotations():
             category = annotation.category
-            if  (categories is None) or (category in categories):
+            if (categories is None) or (category in categories):
                 color = category.color if color_by_category else annotation.color
+                annotations.append((annotation, category, color))
 
-                if mask:
-                    temp_image = annotation.mask.draw(temp_image, alpha=alpha, color=color)
+        if mask:
+            for annotation, _, color in annotations:
+                annotation.mask.draw(temp_image, alpha=alpha, color=color, inplace=True)
 
-                if outline:
-                    temp_image = annotation.polygons.draw(temp_image, color=color, thickness=thickness)
+        for annotation, category, color in annotations:
+            if outline:
+                annotation.polygons.draw(temp_image, color=color, thickness=thickness, inplace=True)
 
-                if bbox:
-                    temp_image = annotation.bbox.draw(temp_image, thickness=thickness, color=color)
-                if text:
-                    cv2.putText(temp_image, category.name, annotation.bbox.top_left,
-                        cv2.FONT_HERSHEY_PLAIN, text_scale, (0,0,0), 2, cv2.LINE_AA)
-                    cv2.putText(temp_image, category.name, annotation.bbox.top_left,
-                        cv2.FONT_HERSHEY_PLAIN, text_scale, (255,255,255), 1, cv2.LINE_AA)
+            if bbox:
+                annotation.bbox.draw(temp_image, thickness=thickness, color=color, inplace=True)
+
+            if text:
+                cv2.putText(temp_image, category.name, annotation.bbox.top_left,
+                    cv2.FONT_HERSHEY_PLAIN, text_scale, (0,0,0), 2, cv2.LINE_AA)
+                cv2.putText(temp_image, category.name, annotation.bbox.top_left,
+                    cv2.FONT_HERSHEY_PLAIN, text_scale, (255,255,255), 1, cv2.LINE_AA)
 
         return temp_image
 
@@ -224,6 +354,16 @@ class Image(Semantic):
         for key, category in self.categories.items():
             yield category
 
+    def bboxes(self):
+        """
+        Copy of the bounding boxes of all annotations in a single array. Changes
+        to the array are not applied to the annotations
+
+        :returns: bounding boxes in the order of :meth:`iter_annotations`
+        :rtype: :class:`BBoxArray`
+        """
+        return BBoxArray.from_annotations(self.iter_annotations())
+
     def coco(self, include=True):
         keys_to_remove = {'license', 'flickr_url', 'coco_url', 'date_captured'}
         metadata = {k: v for k, v in self.metadata.items() if k not in keys_to_remove}
@@ -296,7 +436,3 @@ class Image(Semantic):
 
         return element
 
-    def save(self, file_path, style=COCO):
-        with open(file_path, 'w') as fp:
-            json.dump(self.export(style=style), fp)
-
@@ -0,0 +1,231 @@
+import numpy as np
+
+from .annotation import Annotation, BBox, BBoxArray, Mask, Polygons, RLE
+
+
+def bbox_iou_matrix(a, b):
+    """
+    Computes the intersect over union of every pair of bounding boxes
+
+    :param a: N bounding boxes
+    :type a: :class:`BBoxArray`, list of :class:`BBox`, :class:`Annotation`, tuple or numpy.ndarray (N, 4)
+    :param b: M bounding boxes
+    :type b: :class:`BBoxArray`, list of :class:`BBox`, :class:`Annotation`, tuple or numpy.ndarray (M, 4)
+    :returns: N x M matrix of iou values
+    :rtype: numpy.ndarray
+    """
+    a = _bbox_array(a)
+    b = _bbox_array(b)
+
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+
+    width = np.minimum(a[:, None, 2], b[None, :, 2]) - np.maximum(a[:, None, 0], b[None, :, 0])
+    height = np.minimum(a[:, None, 3], b[None, :, 3]) - np.maximum(a[:, None, 1], b[None, :, 1])
+
+    intersection = np.clip(width, 0, None) * np.clip(height, 0, None)
+    union = area_a[:, None] + area_b[None, :] - intersection
+
+    return np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+
+
+def polygon_iou_matrix(a, b, resolution=None):
+    """
+    Computes the intersect over union of every pair of polygons by clipping
+    them against each other, without rasterizing (see :meth:`Polygons.iou`).
+    Pairs whose bounding boxes are disjoint are skipped
+
+    :param a: N polygons to compare
+    :type a: list of :class:`Polygons`, :class:`Annotation`
+    :param b: M polygons to compare
+    :type b: list of :class:`Polygons`, :class:`Annotation`
+    :param resolution: rasterize each pair with this many pixels per unit inside
+                       of the union of their bounding boxes instead
+    :type resolution: float
+    :returns: N x M matrix of iou values
+    :rtype: numpy.ndarray
+    """
+    a = [_polygons(item) for item in a]
+    b = [_polygons(item) for item in b]
+
+    boxes_a = _bbox_array([item.bbox() for item in a])
+    boxes_b = _bbox_array([item.bbox() for item in b])
+
+    overlapping = (boxes_a[:, None, 0] <= boxes_b[None, :, 2]) & (boxes_b[None, :, 0] <= boxes_a[:, None, 2]) \
+        & (boxes_a[:, None, 1] <= boxes_b[None, :, 3]) & (boxes_b[None, :, 1] <= boxes_a[:, None, 3])
+
+    matrix = np.zeros((len(a), len(b)))
+    for i, j in zip(*np.nonzero(overlapping)):
+        matrix[i, j] = a[i].iou(b[j], resolution=resolution)
+
+    return matrix
+
+
+def _polygons(item):
+    if isinstance(item, Annotation):
+        return item.polygons
+    return Polygons.create(item)
+
+
+def iou_matrix(a, b, width=None, height=None):
+    """
+    Computes the intersect over union of every pair of items
+
+    Collections of :class:`BBox` are compared with :func:`bbox_iou_matrix`.
+    Pairs of two :class:`Polygons` are compared with :func:`polygon_iou_matrix`,
+    so their value does not depend on the other items. Every other pair is
+    compared as masks: pairs whose bounding boxes are disjoint are skipped and
+    the remaining pairs are only compared inside the overlap of their bounding
+    boxes.
+
+    :param a: N items to compare
+    :type a: list of :class:`BBox`, :class:`Polygons`, :class:`Mask`, :class:`RLE`, :class:`Annotation`
+    :param b: M items to compare
+    :type b: list of :class:`BBox`, :class:`Polygons`, :class:`Mask`, :class:`RLE`, :class:`Annotation`
+    :param width: width of the image polygons are rasterized to (defaults to fit all items)
+    :param height: height of the image polygons are rasterized to (defaults to fit all items)
+    :returns: N x M matrix of iou values
+    :rtype: numpy.ndarray
+    """
+    if isinstance(a, BBoxArray) or isinstance(b, BBoxArray):
+        return bbox_iou_matrix(a, b)
+
+    a, b = list(a), list(b)
+
+    if all(isinstance(item, BBox) for item in a + b):
+        return bbox_iou_matrix(a, b)
+
+    polygons_a = np.array([isinstance(item, Polygons) for item in a], dtype=bool)
+    polygons_b = np.array([isinstance(item, Polygons) for item in b], dtype=bool)
+
+    matrix = np.zeros((len(a), len(b)))
+    rows, cols = np.flatnonzero(polygons_a), np.flatnonzero(polygons_b)
+    if len(rows) and len(cols):
+        matrix[np.ix_(rows, cols)] = polygon_iou_matrix([a[i] for i in rows], [b[j] for j in cols])
+
+    if polygons_a.all() and polygons_b.all():
+        return matrix
+
+    rasterized = [item for item in a + b if not isinstance(item, (Annotation, Mask, RLE, np.ndarray))]
+    if rasterized and (width is None or height is None):
+        frame_width, frame_height = _frame_size(rasterized)
+        width = width or frame_width
+        height = height or frame_height
+
+    # Every row against the other items, and the remaining rows of polygons
+    # against the other items which are not polygons
+    rows, cols = np.flatnonzero(~polygons_a), np.arange(len(b))
+    if len(rows):
+        matrix[np.ix_(rows, cols)] = _mask_iou_matrix([a[i] for i in rows], b, width, height)
+
+    rows, cols = np.flatnonzero(polygons_a), np.flatnonzero(~polygons_b)
+    if len(rows) and len(cols):
+        matrix[np.ix_(rows, cols)] = _mask_iou_matrix([a[i] for i in rows], [b[j] for j in cols], width, height)
+
+    return matrix
+
+
+def _mask_iou_matrix(a, b, width, height):
+    """
+    Intersect over union of every pair of items compared as masks
+    """
+    a = [_mask_like(item, width, height) for item in a]
+    b = [_mask_like(item, width, height) for item in b]
+
+    # Mixed collections are compared on the runs, encoding each mask once
+    if any(isinstance(item, RLE) for item in a + b):
+        a = [item if isinstance(item, RLE) else item.rle() for item in a]
+        b = [item if isinstance(item, RLE) else item.rle() for item in b]
+
+    # Inclusive pixel bounding boxes of each item
+    boxes_a = np.array([item.bbox().bbox(style=BBox.MIN_MAX) for item in a], dtype=np.int64).reshape(-1, 4)
+    boxes_b = np.array([item.bbox().bbox(style=BBox.MIN_MAX) for item in b], dtype=np.int64).reshape(-1, 4)
+    area_a = np.array([item.area() for item in a], dtype=np.float64)
+    area_b = np.array([item.area() for item in b], dtype=np.float64)
+
+    x0 = np.maximum(boxes_a[:, None, 0], boxes_b[None, :, 0])
+    y0 = np.maximum(boxes_a[:, None, 1], boxes_b[None, :, 1])
+    x1 = np.minimum(boxes_a[:, None, 2], boxes_b[None, :, 2]) + 1
+    y1 = np.minimum(boxes_a[:, None, 3], boxes_b[None, :, 3]) + 1
+
+    overlapping = (x1 > x0) & (y1 > y0) & (area_a[:, None] > 0) & (area_b[None, :] > 0)
+
+    intersection = np.zeros((len(a), len(b)))
+    for i, j in zip(*np.nonzero(overlapping)):
+        window = (y0[i, j], x0[i, j]), (y1[i, j], x1[i, j])
+        intersection[i, j] = _intersection_area(a[i], b[j], window)
+
+    union = area_a[:, None] + area_b[None, :] - intersection
+
+    return np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+
+
+def _bbox_array(boxes):
+    """
+    Converts a collection of bounding boxes to a (N, 4) array in MIN_MAX style
+    """
+    if isinstance(boxes, BBoxArray):
+        return boxes.array.astype(np.float64)
+
+    if isinstance(boxes, np.ndarray):
+        return boxes.reshape(-1, 4).astype(np.float64)
+
+    rows = []
+    for box in boxes:
+        if isinstance(box, Annotation):
+            box = box.bbox
+        rows.append(BBox.create(box).bbox(style=BBox.MIN_MAX))
+
+    return np.array(rows, dtype=np.float64).reshape(-1, 4)
+
+
+def _frame_size(items):
+    """
+    Size of the smallest image containing all of the polygons and bounding boxes
+    """
+    width = height = 0
+    for item in items:
+        if isinstance(item, Polygons):
+            item = item.bbox()
+        item_width, item_height = BBox.create(item).max_point
+
+        width = max(width, item_width + 1)
+        height = max(height, item_height + 1)
+
+    return int(width), int(height)
+
+
+def _mask_like(item, width, height):
+    """
+    Returns the :class:`Mask` or :class:`RLE` used to compare an item
+    """
+    if isinstance(item, Annotation):
+        if item._init_with_rle:
+            return item.rle
+        return item.mask
+
+    if isinstance(item, (Mask, RLE)):
+        return item
+
+    if isinstance(item, np.ndarray):
+        return Mask(item)
+
+    if isinstance(item, Polygons):
+        return item.mask(width=width, height=height)
+
+    return BBox.create(item).mask(width=width, height=height)
+
+
+def _intersection_area(a, b, window):
+    """
+    Number of pixels shared by both items, only looking inside of the window
+    """
+    if isinstance(a, Mask):
+        start, stop = window
+        return np.count_nonzero(np.logical_and(a._region(start, stop), b._region(start, stop)))
+
+    starts, ends, values = a._segments(b, np.logical_and)
+    return (ends - starts)[values].sum()
+
+
+__all__ = ["bbox_iou_matrix", "iou_matrix", "polygon_iou_matrix"]
@@ -0,0 +1,205 @@
+import numpy as np
+
+
+class AnnotationIndex(object):
+    """
+    Secondary indexes over annotations by category, image and area
+
+    Annotations are identified by their position in :attr:`annotations`. Category
+    and image indexes map to sorted position arrays, areas are computed once and
+    kept sorted for range queries.
+    """
+
+    def __init__(self, annotations=()):
+        self.annotations = []
+
+        self._positions = {}
+        self._categories = {}
+        self._images = {}
+        self._areas = []
+
+        self._c_lists = {}
+        self._c_area_order = None
+
+        for annotation in annotations:
+            self.add(annotation)
+
+    def add(self, annotation):
+        """
+        Adds an annotation to the indexes, annotations already indexed are ignored
+
+        :type annotation: :class:`Annotation`
+        """
+        if id(annotation) in self._positions:
+            return
+
+        position = len(self.annotations)
+        self._positions[id(annotation)] = position
+        self.annotations.append(annotation)
+
+        category = annotation.category.name.lower() if annotation.category else None
+        self._categories.setdefault(category, []).append(position)
+
+        image = annotation.image.id if annotation.image else None
+        self._images.setdefault(image, []).append(position)
+
+        self._c_lists = {}
+        self._c_area_order = None
+
+    def _array(self, key, positions):
+        """
+        Cached array of a position list
+        """
+        array = self._c_lists.get(key)
+        if array is None:
+            array = self._c_lists[key] = np.array(positions, dtype=np.int64)
+        return array
+
+    def category(self, name):
+        """
+        :returns: sorted positions of the annotations of a category
+        :rtype: numpy.ndarray
+        """
+        name = name.lower()
+        return self._array(('category', name), self._categories.get(name, []))
+
+    def image(self, image_id):
+        """
+        :returns: sorted positions of the annotations of an image
+        :rtype: numpy.ndarray
+        """
+        return self._array(('image', image_id), self._images.get(image_id, []))
+
+    def image_ids(self):
+        """
+        :returns: ids of the images with indexed annotations
+        """
+        return self._images.keys()
+
+    @property
+    def areas(self):
+        """
+        Area of every annotation, computed when first needed
+        """
+        for annotation in self.annotations[len(self._areas):]:
+            self._areas.append(annotation.area)
+
+        return self._array('areas', self._areas)
+
+    def area(self, minimum=None, maximum=None):
+        """
+        :returns: sorted positions of the annotations with an area between minimum
+                  and maximum (inclusive)
+        :rtype: numpy.ndarray
+        """
+        areas = self.areas
+        if self._c_area_order is None:
+            self._c_area_order = np.argsort(areas, kind='stable')
+
+        ordered = areas[self._c_area_order]
+        start = 0 if minimum is None else np.searchsorted(ordered, minimum, side='left')
+        stop = len(ordered) if maximum is None else np.searchsorted(ordered, maximum, side='right')
+
+        return np.sort(self._c_area_order[start:stop])
+
+    def query(self):
+        """
+        :returns: :class:`Query` over all indexed annotations
+        """
+        return Query(self)
+
+    def __len__(self):
+        return len(self.annotations)
+
+
+class Query(object):
+    """
+    Composable, read-only view of annotations matching a set of filters
+
+    Every filter returns a new :class:`Query`; only positions into the
+    :class:`AnnotationIndex` are stored, annotations are not copied.
+
+    .. code-block:: python
+
+        large_cats = dataset.query().category('cat').area(minimum=1000)
+    """
+
+    def __init__(self, index, positions=None):
+        self.index = index
+        self.positions = positions
+
+    def _narrow(self, positions):
+        if self.positions is not None:
+            positions = np.intersect1d(self.positions, positions, assume_unique=True)
+        return Query(self.index, positions)
+
+    def category(self, *categories):
+        """
+        Keeps annotations of any of the given categories
+
+        :param categories: :class:`Category` objects or names (case insensitive)
+        """
+        names = {getattr(category, 'name', category) for category in categories}
+        positions = [self.index.category(name) for name in names]
+        return self._narrow(np.unique(np.concatenate(positions or [[]])).astype(np.int64))
+
+    def image(self, *images):
+        """
+        Keeps annotations of any of the given images
+
+        :param images: :class:`Image` objects, image ids, or a function returning
+                       True for images to keep
+        """
+        image_ids = set()
+        for image in images:
+            if callable(image):
+                image_ids.update(self._matching_images(image))
+            else:
+                image_ids.add(getattr(image, 'id', image))
+
+        positions = [self.index.image(image_id) for image_id in image_ids]
+        return self._narrow(np.unique(np.concatenate(positions or [[]])).astype(np.int64))
+
+    def _matching_images(self, predicate):
+        for image_id in self.index.image_ids():
+            positions = self.index.image(image_id)
+            if len(positions) and predicate(self.index.annotations[positions[0]].image):
+                yield image_id
+
+    def area(self, minimum=None, maximum=None):
+        """
+        Keeps annotations with an area between minimum and maximum (inclusive)
+        """
+        return self._narrow(self.index.area(minimum, maximum))
+
+    def where(self, predicate):
+        """
+        Keeps annotations for which predicate returns True
+        """
+        positions = [position for position in self._iter_positions()
+                     if predicate(self.index.annotations[position])]
+        return Query(self.index, np.array(positions, dtype=np.int64))
+
+    def _iter_positions(self):
+        if self.positions is None:
+            return iter(range(len(self.index)))
+        return iter(self.positions)
+
+    def ids(self):
+        """
+        :returns: ids of the matching annotations
+        :rtype: list
+        """
+        return [annotation.id for annotation in self]
+
+    def __iter__(self):
+        for position in self._iter_positions():
+            yield self.index.annotations[position]
+
+    def __len__(self):
+        if self.positions is None:
+            return len(self.index)
+        return len(self.positions)
+
+
+__all__ = ["Query"]
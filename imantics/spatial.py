@@ -0,0 +1,154 @@
+import numpy as np
+
+from .annotation import BBox
+
+
+class SpatialIndex(object):
+    """
+    Uniform grid over the bounding boxes of annotations
+
+    Every annotation is stored in each grid cell its bounding box touches. Queries
+    only look at the annotations of the cells they cover, and can optionally be
+    refined against the mask of the annotation, which is only rasterized inside
+    of its bounding box.
+
+    The index stores the bounding boxes annotations had when they were added.
+    """
+
+    def __init__(self, annotations=(), cell_size=64):
+        """
+        :param annotations: annotations to index
+        :param cell_size: width and height of a grid cell in pixels
+        :type cell_size: int
+        """
+        self.cell_size = int(cell_size)
+        self.annotations = []
+
+        self._positions = {}
+        self._boxes = []
+        self._cells = {}
+        self._c_boxes = None
+
+        for annotation in annotations:
+            self.add(annotation)
+
+    def add(self, annotation):
+        """
+        Adds an annotation to the index, annotations already indexed are ignored
+
+        :type annotation: :class:`Annotation`
+        """
+        if id(annotation) in self._positions:
+            return
+
+        position = len(self.annotations)
+        box = annotation.bbox.bbox(style=BBox.MIN_MAX)
+
+        self._positions[id(annotation)] = position
+        self.annotations.append(annotation)
+        self._boxes.append(box)
+        self._c_boxes = None
+
+        for cell in self._cells_of(box):
+            self._cells.setdefault(cell, []).append(position)
+
+    @property
+    def boxes(self):
+        """
+        Bounding boxes of the indexed annotations as a (N, 4) array in
+        :attr:`BBox.MIN_MAX` style
+        """
+        if self._c_boxes is None:
+            self._c_boxes = np.array(self._boxes, dtype=np.int64).reshape(-1, 4)
+        return self._c_boxes
+
+    def _cell_range(self, box):
+        xmin, ymin, xmax, ymax = box
+        size = self.cell_size
+        return range(xmin // size, xmax // size + 1), range(ymin // size, ymax // size + 1)
+
+    def _cells_of(self, box):
+        columns, rows = self._cell_range(box)
+        for column in columns:
+            for row in rows:
+                yield column, row
+
+    def _candidates(self, box):
+        """
+        Positions of the annotations stored in the cells covered by box (inclusive)
+        """
+        columns, rows = self._cell_range(box)
+
+        # Looking up more cells than annotations is slower than a full scan
+        if len(columns) * len(rows) > len(self.annotations):
+            return np.arange(len(self.annotations))
+
+        positions = set()
+        for column in columns:
+            for row in rows:
+                positions.update(self._cells.get((column, row), ()))
+
+        return np.array(sorted(positions), dtype=np.int64)
+
+    def query(self, bbox, exact=False):
+        """
+        Finds the annotations intersecting a region
+
+        :param bbox: region to search, pixels from (x1, y1) up to but excluding (x2, y2)
+        :type bbox: :class:`BBox`, list, tuple
+        :param exact: only return annotations whose mask intersects the region,
+                      instead of their bounding box
+        :type exact: bool
+        :returns: list of :class:`Annotation`'s in the order they were added
+        """
+        xmin, ymin, xmax, ymax = BBox.create(bbox).bbox(style=BBox.MIN_MAX)
+        if xmax <= xmin or ymax <= ymin or not self.annotations:
+            return []
+
+        candidates = self._candidates((xmin, ymin, xmax - 1, ymax - 1))
+        boxes = self.boxes[candidates]
+
+        hit = (boxes[:, 0] < xmax) & (boxes[:, 2] >= xmin) \
+            & (boxes[:, 1] < ymax) & (boxes[:, 3] >= ymin)
+        found = [self.annotations[position] for position in candidates[hit]]
+
+        if exact:
+            found = [annotation for annotation in found
+                     if annotation.mask._region((ymin, xmin), (ymax, xmax)).any()]
+
+        return found
+
+    def at(self, x, y, exact=True):
+        """
+        Finds the annotations covering a pixel
+
+        :param exact: check the mask of the annotations, instead of only their
+                      bounding box
+        :type exact: bool
+        :returns: list of :class:`Annotation`'s in the order they were added
+        """
+        return self.query((x, y, x + 1, y + 1), exact=exact)
+
+    def nearest(self, x, y, count=1):
+        """
+        Finds the annotations whose bounding boxes are closest to a point
+
+        :param count: number of annotations to return
+        :type count: int
+        :returns: list of :class:`Annotation`'s, closest first
+        """
+        boxes = self.boxes
+        dx = np.maximum(np.maximum(boxes[:, 0] - x, x - boxes[:, 2]), 0)
+        dy = np.maximum(np.maximum(boxes[:, 1] - y, y - boxes[:, 3]), 0)
+
+        order = np.argsort(np.hypot(dx, dy), kind='stable')[:count]
+        return [self.annotations[position] for position in order]
+
+    def __len__(self):
+        return len(self.annotations)
+
+    def __contains__(self, annotation):
+        return id(annotation) in self._positions
+
+
+__all__ = ["SpatialIndex"]
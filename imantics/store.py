@@ -0,0 +1,138 @@
+import os
+import numpy as np
+
+from .annotation import Mask
+
+
+class MaskStore(object):
+    """
+    Append-only file of mask arrays
+
+    The local arrays of masks are written one after another to a single file,
+    and masks are read back as views of a memory map of that file, so their
+    pixels are only paged in when used. The origin and shape of every mask are
+    kept in an index file next to it (``<path>.index.npy``), written on
+    :meth:`flush` and :meth:`close`, and when the store is garbage collected.
+
+    .. code-block:: python
+
+        with MaskStore('masks.bin', mode='w') as store:
+            mask = store.append(Mask(array))
+    """
+
+    #: Columns of the index: byte offset, origin (top, left), image shape
+    #: (height, width) and local shape (rows, cols)
+    _COLUMNS = 7
+
+    def __init__(self, path, mode='a'):
+        """
+        :param path: path of the data file
+        :param mode: 'r' to read an existing store, 'a' to append to it (created
+                     if missing) or 'w' to start a new one
+        :raise ValueError: Raised if mode is not 'r', 'a' or 'w'
+        """
+        if mode not in ('r', 'a', 'w'):
+            raise ValueError("Mode must be 'r', 'a' or 'w' not '{}'".format(mode))
+
+        self.path = str(path)
+        self.mode = mode
+
+        self._records = []
+        self._map = None
+        self._fp = None
+        self._dirty = False
+
+        if mode == 'w' or (mode == 'a' and not os.path.exists(self.path)):
+            open(self.path, 'wb').close()
+        else:
+            index = np.load(self.index_path)
+            self._records = [tuple(int(value) for value in row) for row in index.reshape(-1, self._COLUMNS)]
+
+        if mode != 'r':
+            self._fp = open(self.path, 'ab')
+
+        self.nbytes = os.path.getsize(self.path)
+
+    @property
+    def index_path(self):
+        return self.path + '.index.npy'
+
+    def append(self, mask):
+        """
+        Writes the local array of a mask to the end of the store
+
+        :type mask: :class:`Mask`
+        :returns: :class:`Mask` backed by the store
+        :raise IOError: Raised if the store was opened read-only
+        """
+        if self._fp is None:
+            raise IOError("Mask store {} is read-only".format(self.path))
+
+        local = np.ascontiguousarray(mask.local, dtype=bool)
+        if local.ndim != 2:
+            raise ValueError("Only 2D masks can be stored")
+
+        self._fp.write(local.tobytes())
+        self._records.append((self.nbytes,) + tuple(mask._origin) + tuple(mask.shape) + local.shape)
+        self.nbytes += local.nbytes
+        self._dirty = True
+
+        return self[len(self._records) - 1]
+
+    def flush(self):
+        """
+        Writes pending data and the index to disk
+        """
+        if self._fp is None:
+            return
+
+        self._fp.flush()
+        index = np.array(self._records, dtype=np.int64).reshape(-1, self._COLUMNS)
+        np.save(self.index_path, index)
+        self._dirty = False
+
+    def close(self):
+        self.flush()
+        if self._fp is not None:
+            self._fp.close()
+            self._fp = None
+
+    def _view(self, offset, count):
+        """
+        Bytes of the data file as a view of the memory map, the file is mapped
+        again when it has grown past the current map
+        """
+        if self._map is None or offset + count > len(self._map):
+            if self._fp is not None:
+                self._fp.flush()
+            if self.nbytes == 0:
+                return np.zeros(0, dtype=bool)
+            self._map = np.memmap(self.path, dtype=bool, mode='r')
+
+        return self._map[offset:offset + count]
+
+    def __getitem__(self, position):
+        offset, top, left, height, width, rows, cols = self._records[position]
+        local = self._view(offset, rows * cols).reshape(rows, cols)
+        return Mask._cropped(local, (top, left), (height, width))
+
+    def __iter__(self):
+        for position in range(len(self)):
+            yield self[position]
+
+    def __len__(self):
+        return len(self._records)
+
+    def __del__(self):
+        # Masks appended since the last flush are kept when the store is dropped
+        if getattr(self, '_fp', None) is not None:
+            self.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+__all__ = ["MaskStore"]
@@ -1,13 +1,141 @@
+import struct
 import numpy as np
 
 
 def json_default(o):
-    print(o)
-    if isinstance(o, np.int64):
-        return int(o)
+    if isinstance(o, np.generic):
+        return o.item()
     if isinstance(o, np.ndarray):
         return o.tolist()
     
     type_name = o.__class__.__name__
     raise TypeError("Object of type {} is not JSON serializable".format(type_name))
 
+
+
+def image_size(path):
+    """
+    Reads the width and height of an image from its file header without
+    decoding the pixels. Supports PNG, JPEG, BMP, TIFF and Sun raster files.
+
+    EXIF orientations which swap the axes are applied, matching ``cv2.imread``.
+
+    :param path: path to the image
+    :returns: tuple (width, height) or None if the header could not be read
+    """
+    try:
+        with open(path, 'rb') as fp:
+            header = fp.read(32)
+            fp.seek(0)
+
+            if header.startswith(b'\x89PNG\r\n\x1a\n'):
+                return _png_size(header)
+            if header.startswith(b'\xff\xd8'):
+                return _jpeg_size(fp)
+            if header.startswith(b'BM'):
+                return _bmp_size(header)
+            if header[:4] in (b'II*\x00', b'MM\x00*'):
+                return _tiff_size(fp)
+            if header.startswith(b'\x59\xa6\x6a\x95'):
+                return _sun_raster_size(header)
+
+    except (IOError, OSError, struct.error, IndexError, ValueError):
+        return None
+
+    return None
+
+
+def _png_size(header):
+    width, height = struct.unpack('>II', header[16:24])
+    return width, height
+
+
+def _bmp_size(header):
+    width, height = struct.unpack('<ii', header[18:26])
+    return abs(width), abs(height)
+
+
+def _sun_raster_size(header):
+    width, height = struct.unpack('>II', header[4:12])
+    return width, height
+
+
+def _jpeg_size(fp):
+    fp.read(2)
+    orientation = 1
+
+    while True:
+        marker = fp.read(2)
+        while marker[:1] == b'\xff' and marker[1:2] == b'\xff':
+            # Skip fill bytes
+            marker = marker[1:] + fp.read(1)
+
+        if len(marker) < 2 or marker[0:1] != b'\xff':
+            return None
+
+        code = marker[1]
+        length = struct.unpack('>H', fp.read(2))[0]
+
+        # Start of frame markers (excluding DHT, JPG and DAC)
+        if 0xc0 <= code <= 0xcf and code not in (0xc4, 0xc8, 0xcc):
+            height, width = struct.unpack('>xHH', fp.read(5))
+            break
+
+        segment = fp.read(length - 2)
+        if code == 0xe1 and segment.startswith(b'Exif\x00\x00'):
+            orientation = _tiff_tags(segment[6:]).get(274, orientation)
+
+    if orientation in (5, 6, 7, 8):
+        return height, width
+
+    return width, height
+
+
+def _tiff_size(fp):
+    """
+    Reads the size of a TIFF file, only reading the header and the entries
+    of its first image file directory
+    """
+    header = fp.read(8)
+    endian = '<' if header[:2] == b'II' else '>'
+    offset = struct.unpack(endian + 'I', header[4:8])[0]
+
+    fp.seek(offset)
+    count = struct.unpack(endian + 'H', fp.read(2))[0]
+    tags = _ifd_tags(fp.read(12 * count), count, endian)
+    width, height = tags[256], tags[257]
+
+    if tags.get(274, 1) in (5, 6, 7, 8):
+        return height, width
+
+    return width, height
+
+
+def _tiff_tags(data):
+    """
+    Reads the integer tags of the first image file directory of a TIFF
+    structure (also used by EXIF)
+    """
+    endian = '<' if data[:2] == b'II' else '>'
+    offset = struct.unpack(endian + 'I', data[4:8])[0]
+    count = struct.unpack(endian + 'H', data[offset:offset + 2])[0]
+
+    return _ifd_tags(data[offset + 2:offset + 2 + 12 * count], count, endian)
+
+
+def _ifd_tags(entries, count, endian):
+    """
+    Reads the integer tags from the 12 byte entries of an image file directory
+    """
+    tags = {}
+    for i in range(count):
+        entry = entries[12 * i:12 * i + 12]
+        tag, kind = struct.unpack(endian + 'HH', entry[:4])
+
+        # SHORT and LONG values stored inline
+        if kind == 3:
+            tags[tag] = struct.unpack(endian + 'H', entry[8:10])[0]
+        elif kind == 4:
+            tags[tag] = struct.unpack(endian + 'I', entry[8:12])[0]
+
+    return tags
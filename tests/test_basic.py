@@ -0,0 +1,64 @@
+import json
+import pytest
+from imantics import Image, Dataset, Category, register_exporter
+from imantics.styles import COCO, VOC
+
+
+class TestExporters:
+
+    def test_export_only_requested_style(self, monkeypatch):
+        image = Image.empty(width=10, height=10)
+
+        def fail(*args, **kwargs):
+            raise AssertionError('only the requested style should be exported')
+
+        monkeypatch.setattr(Image, 'yolo', fail)
+        monkeypatch.setattr(Image, 'voc', fail)
+
+        assert image.export(style=COCO)['images'][0]['width'] == 10
+
+    def test_unknown_style(self):
+        with pytest.raises(ValueError):
+            Image.empty().export(style='unknown')
+
+    def test_register_exporter(self, tmpdir):
+        register_exporter('names', lambda category: [category.name], cls=Category)
+        category = Category('cat')
+        path = str(tmpdir.join('names.json'))
+
+        category.save(path, style='names')
+
+        assert category.export(style='names') == ['cat']
+        with open(path) as fp:
+            assert json.load(fp) == ['cat']
+
+        with pytest.raises(ValueError):
+            Image.empty().save(path, style='names')
+
+    def test_register_writer(self, tmpdir):
+        def write(category, fp):
+            fp.write(category.name)
+
+        register_exporter('text', write=write)
+        path = str(tmpdir.join('name.txt'))
+
+        Category('cat').save(path, style='text')
+
+        with open(path) as fp:
+            assert fp.read() == 'cat'
+
+    def test_save_voc(self, tmpdir):
+        path = str(tmpdir.join('image.xml'))
+        Image(path='folder/image.jpg', width=10, height=20).save(path, style=VOC)
+
+        with open(path) as fp:
+            assert '<filename>image.jpg</filename>' in fp.read()
+
+    def test_save_dataset_uses_writer(self, tmpdir, monkeypatch):
+        monkeypatch.setattr(Dataset, 'coco', lambda self: pytest.fail('coco() should not be built'))
+        path = str(tmpdir.join('coco.json'))
+
+        Dataset('empty').save(path)
+
+        with open(path) as fp:
+            assert json.load(fp)['images'] == []
@@ -1,6 +1,7 @@
 
 import pytest
-from imantics import BBox
+import numpy as np
+from imantics import BBox, BBoxArray
 
 
 test_shape = [
@@ -70,3 +71,57 @@ class TestBBoxStyle:
     def test_style_change(self):
         pass
 
+
+
+class TestBBoxArray:
+
+    def test_create(self):
+        boxes = [[0, 0, 10, 15], [5, 5, 10, 15]]
+        sut = BBoxArray(boxes)
+
+        assert len(sut) == 2
+        assert sut.array.dtype == np.int32
+        assert sut == boxes
+        assert BBoxArray([BBox(box) for box in boxes]) == boxes
+        assert BBoxArray(boxes, style=BBox.WIDTH_HEIGHT) == [[0, 0, 10, 15], [5, 5, 15, 20]]
+
+    @pytest.mark.parametrize("bbox,style,e_area", test_area)
+    def test_area(self, bbox, style, e_area):
+        sut = BBoxArray([bbox, bbox], style=style)
+
+        assert sut.area().tolist() == [e_area, e_area]
+
+    def test_style_change(self):
+        sut = BBoxArray([[5, 5, 10, 15]])
+
+        assert sut.bbox(style=BBox.WIDTH_HEIGHT).tolist() == [[5, 5, 5, 10]]
+        assert sut.bbox(style=BBox.MIN_MAX).tolist() == [[5, 5, 10, 15]]
+
+    def test_transforms(self):
+        sut = BBoxArray([[-5, 5, 10, 30]])
+
+        assert sut.clip(20, 20) == [[0, 5, 10, 20]]
+        assert sut.scale(2, 0.5) == [[-10, 2, 20, 15]]
+        assert sut.translate(5, -5) == [[0, 0, 15, 25]]
+
+    def test_views(self):
+        sut = BBoxArray([[0, 0, 10, 15], [5, 5, 10, 15]])
+        view = sut[1]
+
+        assert isinstance(view, BBox)
+        assert view == (5, 5, 10, 15)
+        assert view.size == (5, 10)
+
+        sut.array[1, 2] = 20
+        assert view.max_point == (20, 15)
+        assert [box.area() for box in sut] == [150, 150]
+
+    def test_view_geometry_follows_row(self):
+        sut = BBoxArray([[0, 0, 10, 15]])
+        view = sut[0]
+
+        assert view.mask(width=20, height=20).area() == 150
+
+        sut.array[0, 2] = 20
+        assert view.mask(width=20, height=20).area() == 300
+        assert view.polygons().bbox() == (0, 0, 20, 15)
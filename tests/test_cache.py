@@ -0,0 +1,180 @@
+import gc
+import pytest
+import numpy as np
+from imantics import Annotation, Category, Image, Mask, Polygons, GeometryCache, DiskCache, geometry_cache
+
+
+@pytest.fixture
+def cache():
+    budget = geometry_cache.budget
+    geometry_cache.clear()
+    yield geometry_cache
+    geometry_cache.resize(budget)
+    geometry_cache.clear()
+
+
+@pytest.fixture
+def disk(tmpdir):
+    geometry_cache.disk = DiskCache(str(tmpdir))
+    yield geometry_cache.disk
+    geometry_cache.disk = None
+
+
+class TestGeometryCache:
+
+    def test_lru(self):
+        cache = GeometryCache(budget=200)
+        owners = [Mask(np.zeros((2, 2))) for _ in range(3)]
+        values = [Mask(np.ones((10, 10))) for _ in range(3)]
+
+        cache.put(owners[0], 'mask', values[0])
+        cache.put(owners[1], 'mask', values[1])
+        assert cache.get(owners[0], 'mask') is values[0]
+
+        cache.put(owners[2], 'mask', values[2])
+
+        assert cache.get(owners[1], 'mask') is None
+        assert cache.get(owners[0], 'mask') is values[0]
+        assert cache.stats() == {
+            'hits': 2, 'misses': 1, 'evictions': 1, 'entries': 2, 'bytes': 200, 'budget': 200
+        }
+
+    def test_newest_is_kept(self):
+        cache = GeometryCache(budget=10)
+        owner = Mask(np.zeros((2, 2)))
+        value = Mask(np.ones((10, 10)))
+
+        cache.put(owner, 'mask', value)
+
+        assert cache.get(owner, 'mask') is value
+
+    def test_shared_value_counted_once(self):
+        cache = GeometryCache()
+        value = Mask(np.ones((10, 10)))
+        owners = [Mask(np.zeros((2, 2))) for _ in range(2)]
+
+        for owner in owners:
+            cache.put(owner, 'mask', value)
+
+        assert cache.size == 100
+        cache.put(owners[0], 'mask', None)
+        assert cache.size == 100
+        cache.put(owners[1], 'mask', None)
+        assert cache.size == 0
+
+    def test_forget_collected(self):
+        cache = GeometryCache()
+        owner = Mask(np.zeros((2, 2)))
+        cache.put(owner, 'mask', Mask(np.ones((10, 10))))
+
+        del owner
+        gc.collect()
+
+        assert len(cache) == 0
+        assert cache.size == 0
+
+
+class TestAnnotationCache:
+
+    def test_recompute(self, cache):
+        annotation = Annotation(polygons=[[0, 0, 30, 0, 30, 30]], width=40, height=40)
+        mask = annotation.mask
+
+        assert annotation.mask is mask
+        assert cache.stats()['hits'] > 0
+
+        cache.resize(0)
+        other = Annotation(polygons=[[0, 0, 10, 0, 10, 10]], width=40, height=40)
+        other.mask
+
+        assert cache.stats()['evictions'] > 0
+        assert annotation.mask is not mask
+        assert annotation.mask == mask
+
+    def test_source_not_cached(self, cache):
+        mask = Mask(np.ones((5, 5)))
+        annotation = Annotation(mask=mask)
+        cache.resize(0)
+
+        annotation.polygons
+        annotation.rle
+
+        assert annotation.mask is mask
+        assert len(cache) == 1
+
+    def test_collected(self, cache):
+        array = np.zeros((40, 40), dtype=bool)
+        array[5:20, 10:30] = True
+
+        image = Image(width=40, height=40)
+        category = Category("thing")
+        image.add(Annotation(mask=Mask(array), category=category))
+        image.add(Annotation(polygons=[[0, 0, 30, 0, 30, 30]], category=category))
+        for annotation in image.iter_annotations():
+            annotation.polygons.bbox().mask()
+            annotation.mask.polygons().mask().bbox()
+            annotation.rle
+
+        mask = Mask(array)
+        mask.polygons().mask().polygons()
+        assert cache.size > 0
+
+        del image, annotation, mask
+        gc.collect()
+
+        assert len(cache) == 0
+        assert cache.size == 0
+
+    def test_clear(self, cache):
+        mask = Mask(np.ones((5, 5)))
+        mask.polygons()
+        cache.clear()
+
+        assert cache._owners == {}
+        mask.polygons()
+        del mask
+        gc.collect()
+        assert len(cache) == 0
+
+
+class TestDiskCache:
+
+    def test_mask(self, disk):
+        points = [[2, 3, 20, 3, 20, 15, 2, 15], [25, 25, 30, 25, 30, 30]]
+        mask = Polygons(points).mask(40, 40)
+
+        assert disk.stats() == {'hits': 0, 'misses': 1, 'writes': 1}
+
+        cached = Polygons(points).mask(40, 40)
+        assert disk.stats()['hits'] == 1
+        assert cached == mask
+        assert cached.bbox() == mask.bbox()
+
+        Polygons(points).mask(50, 50)
+        assert disk.stats()['misses'] == 2
+
+    def test_polygons(self, disk):
+        array = np.zeros((30, 30), dtype=bool)
+        array[5:10, 5:20] = True
+        array[15:25, 15:25] = True
+        polygons = Mask(array).polygons()
+
+        cached = Mask(array).polygons()
+        assert disk.stats()['hits'] == 1
+        assert cached.segmentation == polygons.segmentation
+
+    def test_empty(self, disk):
+        Mask(np.zeros((5, 5))).polygons()
+        assert Mask(np.zeros((5, 5))).polygons().segmentation == []
+        assert disk.stats()['hits'] == 1
+
+    def test_corrupt_entry(self, disk):
+        points = [[0, 0, 10, 0, 10, 10]]
+        mask = Polygons(points).mask(20, 20)
+
+        key = disk.key('mask', (20, 20), *Polygons(points).points)
+        with open(disk._path(key), 'wb') as fp:
+            fp.write(b'broken')
+
+        assert Polygons(points).mask(20, 20) == mask
+        assert disk.stats()['writes'] == 2
@@ -0,0 +1,356 @@
+import io
+import json
+import gzip
+import struct
+import pytest
+import numpy as np
+from imantics import Dataset, Image, Annotation, Mask, Category, geometry_cache
+from imantics.coco import iter_coco, write_coco
+
+coco = {
+    'info': {'description': 'tést ✓'},
+    'annotations': [
+        {'id': 1, 'image_id': 2, 'category_id': 1, 'segmentation': [[0, 0, 10, 0, 10, 10, 0, 10]]},
+        {'id': 2, 'image_id': 1, 'category_id': 2, 'segmentation': {'size': [20, 30], 'counts': [10, 5, 585]}},
+    ],
+    'images': [
+        {'id': 1, 'width': 30, 'height': 20, 'file_name': 'a.jpg'},
+        {'id': 2, 'width': 30, 'height': 20, 'file_name': 'b.jpg'},
+    ],
+    'categories': [
+        {'id': 1, 'name': 'cat', 'supercategory': 'animal'},
+        {'id': 2, 'name': 'dog', 'supercategory': 'animal'},
+    ],
+    'empty': []
+}
+
+
+def coco_dataset():
+    return Dataset.from_coco(json.loads(json.dumps(coco)))
+
+
+def mixed_dataset():
+    """
+    Annotations created from polygons, run-length encodings, masks and boxes
+    """
+    dataset = coco_dataset()
+
+    array = np.zeros((20, 30), dtype=bool)
+    array[3:9, 4:15] = True
+    image = dataset.images[1]
+    dataset.add(Annotation(image=image, mask=Mask(array), category=Category('cat'), metadata={'a': 1}))
+    dataset.add(Annotation(image=image, bbox=[2, 3, 12, 15], category=Category('bird')))
+    return dataset
+
+
+def mask_dataset():
+    """
+    Four overlapping rectangular masks on one image
+    """
+    dataset = Dataset('masks')
+    image = Image.empty(width=40, height=30)
+    dataset.add(image)
+
+    for index in range(4):
+        array = np.zeros((30, 40), dtype=bool)
+        array[index:index + 10, 5 * index:5 * index + 12] = True
+        dataset.add(Annotation.from_mask(Mask(array), image=image, category=Category('cat')))
+
+    return dataset
+
+
+def split_dataset(count=20):
+    """
+    One box per image, every fifth of them in a rare category
+    """
+    dataset = Dataset('split')
+    for index in range(count):
+        image = Image(id=index, width=10, height=10)
+        dataset.add(image)
+        category = Category('rare' if index % 5 == 0 else 'common')
+        dataset.add(Annotation.from_bbox([0, 0, 2, 2], image=image, category=category))
+    return dataset
+
+
+class TestDatasetCOCO:
+
+    @pytest.mark.parametrize("chunk_size", [1, 7, 1 << 20])
+    def test_iter_coco(self, chunk_size):
+        fp = io.BytesIO(json.dumps(coco, indent=2).encode('utf-8'))
+        items = list(iter_coco(fp, chunk_size=chunk_size))
+
+        assert items[0] == ('info', coco['info'])
+        assert [item for section, item in items if section == 'images'] == coco['images']
+        assert len(items) == 7
+
+    @pytest.mark.parametrize("file_name", ["coco.json", "coco.json.gz"])
+    def test_from_coco_file(self, tmpdir, file_name):
+        path = str(tmpdir.join(file_name))
+        opener = gzip.open if file_name.endswith('.gz') else open
+        with opener(path, 'wt') as fp:
+            json.dump(coco, fp)
+
+        progress = []
+        dataset = Dataset.from_coco_file(path, progress=progress.append)
+        expected = coco_dataset()
+
+        assert progress and progress == sorted(progress)
+        assert dataset.images.keys() == expected.images.keys()
+        assert len(list(dataset.iter_annotations())) == 2
+        assert sorted(a.area for a in dataset.iter_annotations()) == \
+            sorted(a.area for a in expected.iter_annotations())
+
+    @pytest.mark.parametrize("fp", [io.StringIO(), io.BytesIO()])
+    def test_write_coco(self, fp):
+        dataset = coco_dataset()
+        write_coco(dataset, fp)
+
+        value = fp.getvalue()
+        written = json.loads(value if isinstance(value, str) else value.decode('utf-8'))
+
+        assert written == json.loads(json.dumps(dataset.coco()))
+
+    @pytest.mark.parametrize("file_name", ["coco.json", "coco.json.gz"])
+    def test_save(self, tmpdir, file_name):
+        path = str(tmpdir.join(file_name))
+        dataset = coco_dataset()
+        dataset.save(path)
+
+        loaded = Dataset.from_coco_file(path)
+
+        assert loaded.images.keys() == dataset.images.keys()
+        assert sorted(a.area for a in loaded.iter_annotations()) == \
+            sorted(a.area for a in dataset.iter_annotations())
+
+
+class TestDatasetBinary:
+
+    @pytest.mark.parametrize("mmap", [False, True])
+    def test_round_trip(self, tmpdir, mmap):
+        path = str(tmpdir.join('dataset.imantics'))
+        dataset = mixed_dataset()
+        dataset.save_binary(path)
+
+        loaded = Dataset.from_binary(path, mmap=mmap)
+
+        assert loaded.name == dataset.name
+        assert loaded.images.keys() == dataset.images.keys()
+        assert sorted(c.name for c in loaded.iter_categories()) == \
+            sorted(c.name for c in dataset.iter_categories())
+
+        expected = dataset.coco()['annotations']
+        assert loaded.coco()['annotations'] == expected
+
+        for original, annotation in zip(dataset.iter_annotations(), loaded.iter_annotations()):
+            assert annotation._source().keys() == original._source().keys()
+            assert annotation.__dict__['_c_bbox'] == original.bbox
+            assert annotation.area == original.area
+            assert type(annotation.area) is type(original.area)
+            assert annotation.mask == original.mask
+            assert annotation.color.hex == original.color.hex
+
+    def test_empty(self, tmpdir):
+        path = str(tmpdir.join('dataset.imantics'))
+        Dataset('empty').save_binary(path)
+
+        assert len(list(Dataset.from_binary(path).iter_annotations())) == 0
+
+    def test_not_binary(self, tmpdir):
+        path = str(tmpdir.join('dataset.json'))
+        Dataset('json').save(path)
+
+        with pytest.raises(ValueError):
+            Dataset.from_binary(path)
+
+
+class TestDatasetXML:
+
+    @pytest.mark.parametrize("workers", [None, 2])
+    def test_from_xml(self, workers):
+        dataset = Dataset.from_xml('examples/data/xml_example', workers=workers)
+        images = list(dataset.iter_images())
+
+        assert [image.file_name for image in images] == ['009958.jpg', '009961.jpg']
+        assert [image.size for image in images] == [(500, 333), (500, 374)]
+        assert [len(image.annotations) for image in images] == [5, 1]
+        assert sorted(c.name for c in dataset.iter_categories()) == ['bicycle', 'dog', 'person']
+
+        annotation = next(images[0].iter_annotations())
+        assert annotation.bbox == (344, 106, 444, 298)
+        assert annotation.metadata['pose'] == 'Rear'
+
+    def test_from_xml_subfolders(self, tmpdir):
+        folder = tmpdir.mkdir('sub')
+        folder.join('image.png').write_binary(b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR' + struct.pack('>II', 40, 30))
+        folder.join('image.xml').write(
+            '<annotation><object><name>cat</name>'
+            '<bndbox><xmin>1.0</xmin><ymin>2</ymin><xmax>10</xmax><ymax>20</ymax></bndbox>'
+            '</object></annotation>'
+        )
+        tmpdir.join('unlabeled.png').write_binary(b'')
+
+        dataset = Dataset.from_xml(str(tmpdir))
+        image, = dataset.iter_images()
+
+        assert image.size == (40, 30)
+        assert next(image.iter_annotations()).bbox == (1, 2, 10, 20)
+
+
+class TestDatasetPrecompute:
+
+    def test_precompute(self):
+        dataset = mask_dataset()
+        dataset.precompute(['polygons', 'area'], workers=2)
+
+        for annotation in dataset.iter_annotations():
+            assert annotation._c_polygons is not None
+            assert annotation._c_area == 120
+            assert annotation._c_bbox is None
+
+    def test_coco_workers(self):
+        expected = mask_dataset().coco()
+        coco = mask_dataset().coco(workers=2)
+
+        assert [a['segmentation'] for a in coco['annotations']] == \
+            [a['segmentation'] for a in expected['annotations']]
+        assert [a['bbox'] for a in coco['annotations']] == [a['bbox'] for a in expected['annotations']]
+        assert [a['area'] for a in coco['annotations']] == [a['area'] for a in expected['annotations']]
+
+    def test_coco_workers_evicted(self, monkeypatch):
+        traced = []
+        polygons = Mask.polygons
+        monkeypatch.setattr(Mask, 'polygons', lambda mask: traced.append(mask) or polygons(mask))
+
+        budget = geometry_cache.budget
+        geometry_cache.resize(0)
+        try:
+            coco = mask_dataset().coco(workers=2)
+        finally:
+            geometry_cache.resize(budget)
+
+        # Polygons were only traced in the workers
+        assert traced == []
+        assert all(a['segmentation'] for a in coco['annotations'])
+
+
+class TestDatasetSimplify:
+
+    def test_simplify(self):
+        dataset = mask_dataset()
+        image = next(dataset.iter_images())
+        dataset.add(Annotation(image=image, bbox=[1, 1, 5, 5], category=Category('box')))
+        dataset.add(Annotation(image=image, polygons=[[0, 0, 5, 0, 10, 0, 10, 10, 0, 10]], category=Category('cat')))
+
+        report = dataset.simplify(tolerance=0)
+
+        assert report['annotations'] == 5
+        assert report['after'] == report['before'] - 1
+        assert report['reduction'] > 0
+        assert dataset.coco()['annotations'][-1]['segmentation'] == [[0, 0, 10, 0, 10, 10, 0, 10]]
+
+
+class TestDatasetIds:
+
+    def test_keep_source_ids(self):
+        dataset = coco_dataset()
+
+        assert sorted(dataset.images) == [1, 2]
+        assert sorted(dataset.annotations) == [1, 2]
+        assert dataset.annotation_ids.next() == 3
+
+    def test_colliding_ids(self):
+        dataset = Dataset('ids')
+        images = [Image(id=5, width=10, height=10) for _ in range(3)]
+        dataset.add(images)
+
+        assert [image.id for image in images] == [5, 6, 7]
+
+        for image in images:
+            for _ in range(2):
+                dataset.add(Annotation.from_bbox([0, 0, 2, 2], image=image, category=Category('box')))
+
+        assert sorted(dataset.annotations) == list(range(1, 7))
+
+        # Indexing an image again does not change its ids
+        images[0].index(dataset)
+        assert images[0].id == 5
+
+        # Annotations added to images before the dataset are renumbered in both
+        others = [Image(width=10, height=10) for _ in range(2)]
+        for image in others:
+            image.add(Annotation.from_bbox([0, 0, 2, 2], category=Category('box')))
+            image.add(Annotation.from_bbox([2, 2, 4, 4], category=Category('box')))
+        dataset.add(others)
+
+        assert sorted(dataset.annotations) == list(range(1, 11))
+        for image in images + others:
+            assert sorted(image.annotations) == sorted(a.id for a in image.iter_annotations())
+            assert all(image.annotations[a.id] is a for a in image.iter_annotations())
+
+        annotation = Annotation.from_bbox([4, 4, 6, 6], category=Category('box'))
+        others[1].add(annotation)
+        assert others[1].annotations[annotation.id] is annotation
+
+    def test_reserve(self):
+        dataset = Dataset('ids')
+        dataset.add(Image(id=3))
+
+        ids = dataset.image_ids.reserve(2)
+        dataset.add([Image(id=i) for i in ids])
+
+        assert list(ids) == [4, 5]
+        assert sorted(dataset.images) == [3, 4, 5]
+
+
+class TestDatasetSplit:
+
+    def test_split(self):
+        dataset = split_dataset()
+        splits = dataset.split((1, 1, 2))
+
+        assert [sorted(split.images) for split in splits] == \
+            [list(range(0, 5)), list(range(5, 10)), list(range(10, 20))]
+        assert [len(split.annotations) for split in splits] == [5, 5, 10]
+        assert splits[0].images[0] is dataset.images[0]
+        assert len(dataset.images) == 20
+
+    def test_split_seed(self):
+        dataset = split_dataset()
+
+        first = [sorted(split.images) for split in dataset.split((1, 1), seed=4)]
+        second = [sorted(split.images) for split in dataset.split((1, 1), seed=4)]
+
+        assert first == second
+        assert first != [list(range(0, 10)), list(range(10, 20))]
+        assert sorted(first[0] + first[1]) == list(range(20))
+
+    def test_split_stratify(self):
+        dataset = split_dataset()
+
+        for split in dataset.split((1, 1), random=True, stratify=True):
+            names = [a.category.name for a in split.iter_annotations()]
+            assert names.count('rare') == 2
+            assert names.count('common') == 8
+
+    def test_view(self):
+        dataset = split_dataset()
+        view, _ = dataset.split((1, 3))
+
+        assert view.query().category('rare').ids() == [1]
+        assert len(view.coco()['images']) == 5
+        assert [sorted(split.images) for split in view.split((2, 3))] == [[0, 1], [2, 3, 4]]
+
+        with pytest.raises(TypeError):
+            view.add(Image())
+
+    def test_kfold(self):
+        dataset = split_dataset()
+        folds = list(dataset.kfold(4, seed=0, stratify=True))
+
+        assert len(folds) == 4
+        tests = [sorted(test.images) for _, test in folds]
+        assert sorted(sum(tests, [])) == list(range(20))
+
+        for train, test in folds:
+            assert len(train.images) == 15
+            assert not set(train.images) & set(test.images)
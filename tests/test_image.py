@@ -1,4 +1,11 @@
-from imantics import Image
+import os
+import cv2
+import pytest
+import numpy as np
+from imantics import Image, Annotation, Category
+from imantics.utils import image_size
+
+test_formats = ['png', 'jpg', 'bmp', 'tiff', 'ras']
 
 class TestImageCreate:
 
@@ -28,3 +35,108 @@ class TestImageCreate:
         
         assert isinstance(images, list)
         assert len(images) == 1
+
+    def test_image_from_path_lazy(self):
+        image = Image.from_path('examples/data/coco_example/tesla.jpg')
+
+        assert image._c_array is None
+        assert image.array.shape == (600, 900, 3)
+        assert image._c_array is None
+
+        image.draw()
+        assert image._c_array is None
+
+    def test_image_missing_file(self):
+        image = Image(path='examples/data/missing.jpg', width=10, height=10)
+
+        with pytest.raises(IOError):
+            image.array
+
+    def test_draw_image_array(self):
+        array = np.zeros((10, 20, 3), dtype=np.uint8)
+        array[..., 0] = 255
+        image = Image(image_array=array)
+
+        draw = image.draw()
+
+        assert (draw[..., 2] == 255).all()
+        assert (image.array == array).all()
+        assert image.array is array
+
+    def test_draw_without_array(self):
+        image = Image(width=20, height=10)
+
+        assert image.draw().shape == (10, 20, 3)
+        assert image._c_array is None
+
+    def test_draw_annotations(self):
+        image = Image(image_array=np.zeros((10, 20, 3), dtype=np.uint8))
+        image.add(Annotation.from_bbox([2, 2, 8, 8], category=Category('box', color=(0, 0, 255))))
+        image.add(Annotation.from_bbox([12, 2, 18, 8], category=Category('other')))
+
+        draw = image.draw(bbox=False, outline=False, text=False, categories=[image.categories['box']],
+                          color_by_category=True)
+
+        assert (draw[4, 4] == (0, 0, 127)).all()
+        assert (draw[4, 14] == 0).all()
+        assert (image.array == 0).all()
+
+
+class TestImageFolder:
+
+    def create_folder(self, tmpdir):
+        folder = str(tmpdir)
+        os.makedirs(os.path.join(folder, 'sub'))
+        for index, name in enumerate(['b.png', 'a.JPG', os.path.join('sub', 'c.bmp')]):
+            cv2.imwrite(os.path.join(folder, name), np.zeros((10 + index, 20, 3), dtype=np.uint8))
+        open(os.path.join(folder, 'notes.txt'), 'w').close()
+        return folder
+
+    @pytest.mark.parametrize("workers", [None, 4])
+    def test_from_folder(self, tmpdir, workers):
+        folder = self.create_folder(tmpdir)
+        images = Image.from_folder(folder, workers=workers)
+
+        assert [image.file_name for image in images] == ['a.JPG', 'b.png', 'c.bmp']
+        assert [image.id for image in images] == [0, 1, 2]
+        assert [image.size for image in images] == [(20, 11), (20, 10), (20, 12)]
+
+    def test_symlinked_folder(self, tmpdir):
+        folder = self.create_folder(tmpdir)
+        os.symlink(folder, os.path.join(folder, 'sub', 'loop'))
+
+        images = Image.from_folder(folder)
+
+        assert [image.file_name for image in images] == ['a.JPG', 'b.png', 'c.bmp']
+
+    def test_manifest(self, tmpdir, monkeypatch):
+        folder = self.create_folder(tmpdir)
+        manifest = os.path.join(folder, 'manifest.json')
+
+        images = Image.from_folder(folder, manifest=manifest)
+        assert os.path.isfile(manifest)
+
+        def probe(path):
+            raise AssertionError('unchanged files should not be read')
+
+        monkeypatch.setattr(Image, '_probe', staticmethod(probe))
+        cached = Image.from_folder(folder, manifest=manifest)
+
+        assert [image.size for image in cached] == [image.size for image in images]
+
+
+class TestImageSize:
+
+    @pytest.mark.parametrize("extension", test_formats)
+    def test_header_size(self, tmpdir, extension):
+        path = os.path.join(str(tmpdir), 'image.' + extension)
+        cv2.imwrite(path, np.zeros((37, 53, 3), dtype=np.uint8))
+
+        assert image_size(path) == (53, 37)
+
+    def test_unknown_format(self, tmpdir):
+        path = os.path.join(str(tmpdir), 'image.txt')
+        with open(path, 'w') as fp:
+            fp.write('not an image')
+
+        assert image_size(path) is None
@@ -1,6 +1,6 @@
 import pytest
 import numpy as np
-from imantics import Mask
+from imantics import Mask, PackedMask
 
 test_intersect = [
     # array a, array b, expect intersected array
@@ -176,3 +176,196 @@ class TestMaskComputations:
 
 
 
+class TestPackedMask:
+
+    @pytest.mark.parametrize("array_a,array_b,e_union", test_union)
+    def test_union(self, array_a, array_b, e_union):
+        assert PackedMask(array_a) + PackedMask(array_b) == e_union
+        assert PackedMask(array_a).union(Mask(array_b)) == e_union
+
+    @pytest.mark.parametrize("array_a,array_b,e_intersect", test_intersect)
+    def test_intersect(self, array_a, array_b, e_intersect):
+        assert PackedMask(array_a) * PackedMask(array_b) == e_intersect
+
+    @pytest.mark.parametrize("array_a,array_b,e_subtract", test_subtract)
+    def test_subtract(self, array_a, array_b, e_subtract):
+        assert PackedMask(array_a) - np.array(array_b) == e_subtract
+
+    @pytest.mark.parametrize("array_a,array_b,e_iou", test_iou)
+    def test_iou(self, array_a, array_b, e_iou):
+        assert PackedMask(array_a).iou(PackedMask(array_b)) == e_iou
+
+    @pytest.mark.parametrize("array,e_invert", test_invert)
+    def test_invert(self, array, e_invert):
+        assert ~PackedMask(array) == e_invert
+
+    def test_large(self):
+        rng = np.random.RandomState(0)
+        a = rng.rand(37, 53) > 0.5
+        b = rng.rand(37, 53) > 0.5
+        packed = PackedMask(a)
+
+        assert packed.nbytes == 8 * -(-37 * 53 // 64)
+        assert packed.area() == a.sum()
+        assert (~packed).area() == (~a).sum()
+        assert packed.iou(b) == pytest.approx(Mask(a).iou(Mask(b)))
+        assert np.array_equal((packed - b).array, a & ~b)
+
+    def test_conversion(self):
+        array = np.zeros((10, 12), dtype=bool)
+        array[2:5, 3:9] = True
+        mask = Mask(array)
+
+        packed = mask.pack()
+        assert packed.unpack() == mask
+        assert Mask.create(packed) == mask
+        assert packed.bbox() == mask.bbox()
+        assert packed.polygons() == mask.polygons()
+
+    def test_shape_mismatch(self):
+        with pytest.raises(ValueError):
+            PackedMask(np.zeros((2, 2))).union(PackedMask(np.zeros((3, 3))))
+
+
+class TestMaskCropped:
+
+    def test_create(self):
+        mask = Mask(np.ones((2, 3)), offset=(4, 1), size=(10, 5))
+
+        assert mask.local.shape == (2, 3)
+        assert mask.offset == (4, 1)
+        assert mask.size == (10, 5)
+        assert mask.area() == 6
+        assert mask.bbox() == (4, 1, 6, 2)
+        assert mask.array.shape == (5, 10)
+        assert mask.array[1:3, 4:7].all()
+
+    def test_crop(self):
+        array = np.zeros((10, 10))
+        array[2:4, 5:9] = 1
+        mask = Mask(array).crop()
+
+        assert mask.local.shape == (2, 4)
+        assert mask.offset == (5, 2)
+        assert mask == array
+
+    @pytest.mark.parametrize("cropped", [True, False])
+    def test_array_is_copy(self, cropped):
+        array = np.zeros((10, 10))
+        array[2:4, 5:9] = 1
+        mask = Mask(array).crop() if cropped else Mask(array)
+        area, bbox = mask.area(), mask.bbox()
+
+        mask.array[0, 0] = True
+
+        assert not mask[0, 0]
+        assert mask.area() == area and mask.bbox() == bbox
+
+    def test_set_array(self):
+        array = np.zeros((10, 10))
+        array[2:4, 5:9] = 1
+        mask = Mask(array).crop()
+        mask.area(), mask.bbox(), mask.polygons()
+
+        array = mask.array
+        array[0, 0] = True
+        mask.array = array
+
+        assert mask.offset == (0, 0)
+        assert mask.local.shape == (10, 10)
+        assert mask[0, 0]
+        assert mask.area() == 9
+        assert mask.bbox() == (0, 0, 8, 3)
+        assert mask.polygons().mask() == mask
+
+    def test_computations(self):
+        a = Mask(np.ones((2, 2)), offset=(0, 0), size=(6, 6))
+        b = Mask(np.ones((2, 2)), offset=(1, 1), size=(6, 6))
+        c = Mask(np.ones((2, 2)), offset=(4, 4), size=(6, 6))
+
+        assert (a + b).local.shape == (3, 3)
+        assert (a * b).local.shape == (1, 1)
+        assert (a * c).area() == 0
+        assert (a - b).area() == 3
+        assert a.iou(b) == 1/7
+        assert a.iou(c) == 0
+        assert (1, 1) in a
+        assert (4, 4) not in a
+
+    def test_polygons(self):
+        mask = Mask(np.ones((3, 4)), offset=(5, 2), size=(20, 20))
+
+        assert mask.polygons() == [[5, 2, 5, 4, 8, 4, 8, 2]]
+        assert mask.polygons().mask(width=20, height=20) == mask
+
+    def test_draw(self):
+        mask = Mask(np.ones((2, 3)), offset=(4, 1), size=(10, 5))
+        image = np.full((5, 10, 3), 100, dtype=np.uint8)
+
+        draw = mask.draw(image, color=(255, 0, 0), alpha=0.5)
+
+        assert (image == 100).all()
+        assert (draw[1:3, 4:7] == (177, 50, 50)).all()
+        assert draw[~mask.array].tolist() == image[~mask.array].tolist()
+
+        assert mask.draw(image, color=(255, 0, 0), inplace=True) is image
+        assert (image == draw).all()
+
+
+class TestMaskPruning:
+
+    def full_frame(self, rows, cols, shape=(100, 100)):
+        array = np.zeros(shape, dtype=bool)
+        array[rows, cols] = True
+        return Mask(array)
+
+    def test_disjoint(self, monkeypatch):
+        a = self.full_frame(slice(0, 10), slice(0, 10))
+        b = self.full_frame(slice(80, 90), slice(80, 90))
+
+        def fail(*args):
+            raise AssertionError('compared pixels')
+
+        a.bbox(), b.bbox()
+        monkeypatch.setattr(Mask, '_region', fail)
+
+        assert a.iou(b) == 0
+        assert a.intersect(b).area() == 0
+        assert not a.contains(b)
+        assert not a.match(b)
+
+    def test_overlap_window(self, monkeypatch):
+        a = self.full_frame(slice(0, 10), slice(0, 10))
+        b = self.full_frame(slice(5, 15), slice(5, 15))
+        region = Mask._region
+        windows = []
+
+        def record(self, start, stop):
+            windows.append(tuple(np.subtract(stop, start)))
+            return region(self, start, stop)
+
+        monkeypatch.setattr(Mask, '_region', record)
+
+        assert a.iou(b) == 25 / 175
+        assert set(windows) == {(5, 5)}
+        assert a.intersect(b) == self.full_frame(slice(5, 10), slice(5, 10))
+
+    def test_match_threshold(self, monkeypatch):
+        a = self.full_frame(slice(0, 10), slice(0, 10))
+        b = self.full_frame(slice(0, 10), slice(0, 2))
+        c = self.full_frame(slice(0, 10), slice(1, 11))
+
+        monkeypatch.setattr(Mask, 'iou', lambda *args: pytest.fail('iou computed'))
+        assert not a.match(b, threshold=0.5)
+        monkeypatch.undo()
+
+        assert a.match(c, threshold=0.8)
+        assert not a.match(c, threshold=0.9)
+        assert a.match(b, threshold=0)
+
+    def test_area_cache(self):
+        mask = self.full_frame(slice(0, 10), slice(0, 10))
+        assert mask.area() == 100
+
+        mask[50, 50] = True
+        assert mask.area() == 101
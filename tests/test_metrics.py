@@ -0,0 +1,120 @@
+import pytest
+import numpy as np
+from imantics import BBox, Mask, Polygons, Annotation, bbox_iou_matrix, iou_matrix, polygon_iou_matrix
+
+test_bbox_iou = [
+    # boxes a, boxes b, expected matrix
+    ([[0, 0, 10, 10]], [[0, 0, 10, 10]], [[1]]),
+    ([[0, 0, 10, 10]], [[20, 20, 30, 30]], [[0]]),
+    ([[0, 0, 10, 10]], [[5, 0, 15, 10], [0, 0, 5, 10]], [[1/3, 1/2]]),
+    ([[0, 0, 10, 10], [0, 0, 0, 0]], [[0, 0, 0, 0]], [[0], [0]]),
+]
+
+test_mask_iou = [
+    # arrays a, arrays b
+    ([[[1, 1, 0, 0]]], [[[1, 0, 0, 0]], [[0, 0, 1, 1]]]),
+    ([[[0, 0, 0, 0]], [[1, 1, 1, 1]]], [[[1, 1, 0, 0]], [[0, 0, 0, 0]]]),
+    ([[[1, 0], [0, 1]], [[0, 1], [1, 1]]], [[[1, 1], [0, 1]]]),
+]
+
+
+class TestIOUMatrix:
+
+    @pytest.mark.parametrize("boxes_a,boxes_b,e_matrix", test_bbox_iou)
+    def test_bbox_iou(self, boxes_a, boxes_b, e_matrix):
+        a = [BBox(box) for box in boxes_a]
+        b = [BBox(box) for box in boxes_b]
+
+        assert np.allclose(bbox_iou_matrix(a, b), e_matrix)
+        assert np.allclose(bbox_iou_matrix(np.array(boxes_a), np.array(boxes_b)), e_matrix)
+        assert np.allclose(iou_matrix(a, b), e_matrix)
+
+    @pytest.mark.parametrize("arrays_a,arrays_b", test_mask_iou)
+    def test_mask_iou(self, arrays_a, arrays_b):
+        a = [Mask(array) for array in arrays_a]
+        b = [Mask(array) for array in arrays_b]
+
+        e_matrix = [[mask_a.iou(mask_b) for mask_b in b] for mask_a in a]
+
+        assert np.allclose(iou_matrix(a, b), e_matrix)
+        assert np.allclose(iou_matrix([m.rle() for m in a], b), e_matrix)
+
+    def test_polygons_iou(self):
+        a = Polygons([[0, 0, 4, 0, 4, 4, 0, 4]])
+        b = Polygons([[20, 20, 24, 20, 24, 24, 20, 24]])
+
+        matrix = iou_matrix([a, b], [a, b], width=30, height=30)
+
+        assert np.allclose(matrix, np.eye(2))
+
+
+class TestPolygonIOU:
+
+    square = [0, 0, 10, 0, 10, 10, 0, 10]
+
+    @pytest.mark.parametrize("other,e_iou", [
+        ([0, 0, 10, 0, 10, 10, 0, 10], 1),
+        ([0, 10, 10, 10, 10, 0, 0, 0], 1),
+        ([5, 0, 15, 0, 15, 10, 5, 10], 1/3),
+        ([10, 0, 20, 0, 20, 10, 10, 10], 0),
+        ([2, 2, 4, 2, 4, 4, 2, 4], 0.04),
+        ([5, 0, 10, 5, 5, 10, 0, 5], 1/2),
+        ([30, 30, 40, 30, 40, 40], 0),
+    ])
+    def test_iou(self, other, e_iou):
+        assert Polygons([self.square]).iou([other]) == pytest.approx(e_iou)
+
+    def test_holes(self):
+        holed = Polygons([self.square, [2, 2, 2, 6, 6, 6, 6, 2]])
+
+        assert holed.iou(Polygons([self.square])) == pytest.approx(84 / 100)
+        assert holed.iou([[3, 3, 5, 3, 5, 5, 3, 5]]) == 0
+
+    def test_resolution(self):
+        angles = np.linspace(0, 2 * np.pi, 50, endpoint=False)
+        a = Polygons([np.stack([20 * np.cos(angles), 20 * np.sin(angles)], axis=1).ravel()])
+        b = Polygons([np.stack([10 + 20 * np.cos(angles), 20 * np.sin(angles)], axis=1).ravel()])
+
+        assert a.iou(b, resolution=4) == pytest.approx(a.iou(b), abs=0.01)
+
+    def test_matrix(self):
+        a = [Polygons([self.square]), Annotation(polygons=[[20, 20, 30, 20, 30, 30, 20, 30]])]
+        b = [Polygons([[5, 0, 15, 0, 15, 10, 5, 10]]), Polygons([[100, 100, 110, 100, 110, 110]])]
+
+        assert np.allclose(polygon_iou_matrix(a, b), [[1/3, 0], [0, 0]])
+        assert np.allclose(iou_matrix(a[:1], b), [[1/3, 0]])
+
+    def test_mixed_matrix(self):
+        square, shifted = Polygons([self.square]), Polygons([[5, 0, 15, 0, 15, 10, 5, 10]])
+        mask = Mask(np.ones((10, 10)))
+
+        matrix = iou_matrix([square, mask], [shifted, square])
+
+        assert matrix[0, 0] == pytest.approx(1/3)
+        assert matrix[0, 1] == pytest.approx(1)
+        assert matrix[1] == pytest.approx([mask.iou(shifted.mask(width=16, height=11)), mask.iou(square.mask())])
+
+    def test_many_vertices(self):
+        angles = np.linspace(0, 2 * np.pi, 3000, endpoint=False)
+        circle = np.stack([np.cos(angles), np.sin(angles)], axis=1)
+        a = Polygons([(500 + 400 * circle).ravel()])
+        b = Polygons([(600 + 400 * circle).ravel()])
+
+        # Lens shaped overlap of two circles of radius 400 a distance d apart
+        d = 100 * np.sqrt(2)
+        lens = 2 * 400 ** 2 * np.arccos(d / 800) - d / 2 * np.sqrt(4 * 400 ** 2 - d ** 2)
+        e_iou = lens / (2 * np.pi * 400 ** 2 - lens)
+
+        assert a.iou(b) == pytest.approx(e_iou, abs=1e-4)
+
+    def test_raster_above_limit(self, monkeypatch):
+        a = Polygons([self.square])
+        b = Polygons([[5, 0, 15, 0, 15, 10, 5, 10]])
+        monkeypatch.setattr(Polygons, 'EXACT_VERTICES', 4)
+
+        calls = []
+        raster_area = Polygons._raster_area
+        monkeypatch.setattr(Polygons, '_raster_area', lambda *args: calls.append(args) or raster_area(*args))
+
+        assert a.iou(b) == pytest.approx(1/3, abs=0.05)
+        assert len(calls) == 1
@@ -0,0 +1,154 @@
+import cv2
+import pytest
+import tracemalloc
+import numpy as np
+from imantics import Annotation, Dataset, Image, Category, Mask, Polygons
+
+
+def circle(count=400, radius=50, center=(100, 100)):
+    angles = np.linspace(0, 2 * np.pi, count, endpoint=False)
+    return np.stack([center[0] + radius * np.cos(angles), center[1] + radius * np.sin(angles)], axis=1).ravel()
+
+
+class TestPolygonsSimplify:
+
+    def test_collinear(self):
+        polygons = Polygons([[0, 0, 5, 0, 10, 0, 10, 5, 10, 10, 0, 10]])
+
+        assert polygons.simplify(0).segmentation == [[0, 0, 10, 0, 10, 10, 0, 10]]
+
+    @pytest.mark.parametrize("tolerance", [0.1, 0.5, 2])
+    def test_tolerance(self, tolerance):
+        polygons = Polygons([circle()])
+        simplified = polygons.simplify(tolerance)
+
+        assert 3 <= simplified.vertices < polygons.vertices
+
+        # Removed vertices are within tolerance of the simplified outline
+        mask = simplified.mask(200, 200)
+        outline = polygons.mask(200, 200)
+        assert mask.iou(outline) > 0.95
+
+    def test_max_vertices(self):
+        polygons = Polygons([circle(), [0, 0, 10, 0, 10, 10, 0, 10]])
+        simplified = polygons.simplify(0, max_vertices=12)
+
+        assert [len(ring) // 2 for ring in simplified.polygons] == [12, 4]
+
+    def test_minimum_vertices(self):
+        simplified = Polygons([[0, 0, 10, 0, 10, 1, 0, 1]]).simplify(100)
+
+        assert simplified.vertices == 3
+
+    def test_traced(self):
+        array = np.zeros((200, 200), dtype=bool)
+        array[np.hypot(*np.mgrid[:200, :200] - 100) < 60] = True
+        annotation = Annotation(mask=Mask(array))
+
+        before = annotation.polygons.vertices
+        simplified = annotation.simplify(1.0)
+
+        assert simplified.vertices < before
+        assert annotation.polygons is simplified
+        assert annotation.mask.area() == array.sum()
+        assert annotation.coco(include=False)['segmentation'] == simplified.segmentation
+
+    def test_source_polygons(self):
+        annotation = Annotation(polygons=[circle()], width=200, height=200)
+        area = annotation.area
+
+        annotation.simplify(2.0)
+
+        assert annotation.area != area
+        assert annotation.area == annotation.mask.area()
+
+
+class TestPolygonsGeometry:
+
+    square = [0, 0, 10, 0, 10, 10, 0, 10]
+    hole = [2, 2, 2, 6, 6, 6, 6, 2]
+
+    def test_area(self):
+        assert Polygons([self.square]).area() == 100
+        assert Polygons([[0, 0, 4, 0, 0, 3]]).area() == 6
+        assert Polygons([self.square, [20, 20, 25, 20, 25, 25, 20, 25]]).area() == 125
+        assert Polygons([[0, 0, 5, 5]]).area() == 0
+
+    def test_area_holes(self):
+        assert Polygons([self.square, self.hole]).area() == 84
+        assert Polygons([self.hole, self.square]).area() == 84
+
+        island = [3, 3, 5, 3, 5, 5, 3, 5]
+        assert Polygons([self.square, self.hole, island]).area() == 88
+
+    def test_area_circle(self):
+        assert Polygons([circle(radius=50)]).area() == pytest.approx(np.pi * 50 ** 2, rel=1e-3)
+
+    def test_bbox(self):
+        polygons = Polygons([[5, 6, 9, 6, 9, 12], [1, 30, 4, 31, 2, 35]])
+
+        assert polygons.bbox() == (1, 6, 9, 35)
+
+    def test_contains(self):
+        polygons = Polygons([self.square, self.hole])
+        points = np.array([[1, 1], [4, 4], [9.5, 5], [11, 5], [-1, 5]])
+
+        assert list(polygons.contains(points)) == [True, False, True, False, False]
+        assert (1, 1) in polygons
+        assert (4, 4) not in polygons
+
+    def test_contains_many(self):
+        polygons = Polygons([circle(radius=50)])
+        points = np.random.RandomState(0).rand(5000, 2) * 200
+
+        inside = polygons.contains(points)
+        expected = np.hypot(points[:, 0] - 100, points[:, 1] - 100) < 50
+
+        assert np.mean(inside == expected) > 0.99
+
+    def test_contains_memory(self):
+        polygons = Polygons([circle(count=2000)])
+        points = np.random.RandomState(0).rand(30000, 2) * 200
+
+        tracemalloc.start()
+        inside = polygons.contains(points)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        # One (points x edges) boolean array would take 60MB
+        assert peak < 20 * 1024 * 1024
+        assert np.mean(inside == (np.hypot(points[:, 0] - 100, points[:, 1] - 100) < 50)) > 0.99
+
+    def test_coco_without_rasterizing(self, monkeypatch):
+        def fail(*args, **kwargs):
+            raise AssertionError('rasterized')
+
+        zeros = np.zeros
+
+        def small_zeros(shape, *args, **kwargs):
+            assert np.prod(shape) < 4000 * 3000, 'allocated an image sized array'
+            return zeros(shape, *args, **kwargs)
+
+        monkeypatch.setattr(cv2, 'fillPoly', fail)
+        monkeypatch.setattr(np, 'zeros', small_zeros)
+        monkeypatch.setattr(Annotation, 'EXACT_POLYGON_AREA', True)
+
+        dataset = Dataset('polygons')
+        image = Image(width=4000, height=3000)
+        image.add(Annotation(polygons=[self.square, self.hole], category=Category('cat')))
+        dataset.add(image)
+        coco = dataset.coco()
+
+        assert coco['annotations'][0]['area'] == 84
+        assert coco['annotations'][0]['bbox'] == (0, 0, 10, 10)
+
+    def test_annotation_area(self, monkeypatch):
+        polygons = [self.square, self.hole]
+
+        # Pixels on the outline are counted, like in the mask
+        annotation = Annotation(polygons=polygons, width=20, height=20)
+        assert annotation.area == annotation.mask.area() == 121 - 9
+        assert isinstance(annotation.area, int)
+
+        monkeypatch.setattr(Annotation, 'EXACT_POLYGON_AREA', True)
+        assert Annotation(polygons=polygons, width=20, height=20).area == 84
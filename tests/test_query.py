@@ -0,0 +1,63 @@
+import pytest
+from imantics import Dataset, Image, Annotation, Category
+
+
+class TestQuery:
+
+    def create_dataset(self):
+        dataset = Dataset('query')
+        for image_id, width in enumerate([100, 200]):
+            dataset.add(Image(id=image_id, width=width, height=100))
+
+        boxes = [
+            (0, 'cat', [0, 0, 10, 10]),
+            (0, 'dog', [0, 0, 20, 20]),
+            (1, 'Cat', [0, 0, 30, 30]),
+            (1, 'cat', [0, 0, 5, 5]),
+        ]
+        for image_id, name, bbox in boxes:
+            image = dataset.images[image_id]
+            dataset.add(Annotation.from_bbox(bbox, image=image, category=Category(name)))
+
+        return dataset
+
+    def test_category(self):
+        dataset = self.create_dataset()
+
+        assert dataset.query().category('cat').ids() == [1, 3, 4]
+        assert dataset.query().category(dataset.categories['dog']).ids() == [2]
+        assert dataset.query().category('cat', 'dog').ids() == [1, 2, 3, 4]
+        assert len(dataset.query().category('bird')) == 0
+
+    def test_image(self):
+        dataset = self.create_dataset()
+
+        assert dataset.query().image(0).ids() == [1, 2]
+        assert dataset.query().image(dataset.images[1]).ids() == [3, 4]
+        assert dataset.query().image(lambda image: image.width > 150).ids() == [3, 4]
+
+    def test_area(self):
+        dataset = self.create_dataset()
+
+        assert dataset.query().area(minimum=100).ids() == [1, 2, 3]
+        assert dataset.query().area(maximum=100).ids() == [1, 4]
+        assert dataset.query().area(101, 899).ids() == [2]
+
+    def test_compose(self):
+        dataset = self.create_dataset()
+        query = dataset.query().category('cat')
+
+        assert query.area(minimum=50).image(lambda image: image.width > 150).ids() == [3]
+        assert query.where(lambda annotation: annotation.bbox.width == 5).ids() == [4]
+        # Filters do not change the query they start from
+        assert query.ids() == [1, 3, 4]
+
+    def test_updated_on_add(self):
+        dataset = self.create_dataset()
+        assert len(dataset.query().category('cat')) == 3
+
+        image = dataset.images[0]
+        dataset.add(Annotation.from_bbox([0, 0, 1, 1], image=image, category=Category('cat')))
+
+        assert dataset.query().category('cat').ids() == [1, 3, 4, 5]
+        assert dataset.query().area(maximum=1).ids() == [5]
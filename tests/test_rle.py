@@ -0,0 +1,130 @@
+import pytest
+import numpy as np
+from imantics import Annotation, Mask, RLE
+
+test_encode = [
+    # array, expected counts (column-major)
+    ([[0, 0], [0, 0]], [4]),
+    ([[1, 1], [1, 1]], [0, 4]),
+    ([[0, 1], [0, 1]], [2, 2]),
+    ([[1, 0], [0, 1]], [0, 1, 2, 1]),
+]
+
+test_compressed = [
+    # array, expected compressed string (pycocotools)
+    ([[0, 0], [0, 0]], '4'),
+    ([[1, 0], [0, 1]], '0120'),
+    ([
+        [0, 0, 0, 0],
+        [0, 1, 1, 0],
+        [0, 1, 1, 0],
+        [0, 0, 0, 0]
+    ], '52203'),
+]
+
+test_bbox = [
+    # array, expected bounding box
+    (np.zeros((4, 4)), (0, 0, 0, 0)),
+    ([
+        [0, 0, 0, 0],
+        [0, 1, 1, 0],
+        [0, 1, 1, 0],
+        [0, 0, 0, 0]
+    ], (1, 1, 2, 2)),
+    ([
+        [0, 0, 0, 1],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [1, 0, 0, 0]
+    ], (0, 0, 3, 3)),
+    ([
+        [0, 0, 0, 0],
+        [0, 0, 1, 1],
+        [1, 1, 0, 0],
+        [0, 0, 0, 0]
+    ], (0, 1, 3, 2)),
+    (np.ones((4, 4)), (0, 0, 3, 3)),
+]
+
+test_operations = [
+    # array a, array b
+    ([[0, 0], [0, 0]], [[1, 1], [1, 1]]),
+    ([[1, 0], [0, 1]], [[0, 1], [1, 0]]),
+    ([[1, 1], [0, 1]], [[1, 0], [0, 1]]),
+    ([[1, 1, 0], [0, 1, 1]], [[0, 1, 1], [1, 1, 0]]),
+]
+
+test_iou = [
+    # array a, array b, expected iou
+    ([0, 0, 0, 0], [0, 0, 0, 0], 0),
+    ([0, 0, 1, 1], [1, 1, 0, 0], 0),
+    ([1, 1, 0, 0], [1, 0, 0, 0], 1/2),
+    ([1, 1, 1, 1], [1, 1, 1, 1], 1)
+]
+
+
+class TestRLEConversion:
+
+    @pytest.mark.parametrize("array,e_counts", test_encode)
+    def test_to_counts(self, array, e_counts):
+        rle = Mask(array).rle()
+
+        assert rle.counts.tolist() == e_counts
+        assert rle.coco(compressed=False)['counts'] == e_counts
+
+    @pytest.mark.parametrize("array,e_string", test_compressed)
+    def test_compressed(self, array, e_string):
+        rle = Mask(array).rle()
+        coco = rle.coco()
+
+        assert coco['counts'] == e_string
+        assert coco['size'] == [len(array), len(array[0])]
+        assert RLE.from_coco(coco) == rle
+
+    @pytest.mark.parametrize("array,e_bbox", test_bbox)
+    def test_to_bbox(self, array, e_bbox):
+        rle = Mask(array).rle()
+
+        assert rle.bbox() == e_bbox
+
+    @pytest.mark.parametrize("array,e_counts", test_encode)
+    def test_decode(self, array, e_counts):
+        rle = RLE(e_counts, width=2, height=2)
+
+        assert rle.mask() == array
+        assert rle.area() == np.sum(array)
+
+
+class TestRLEComputations:
+
+    @pytest.mark.parametrize("array_a,array_b", test_operations)
+    def test_operations(self, array_a, array_b):
+        a, b = np.array(array_a, dtype=bool), np.array(array_b, dtype=bool)
+        rle_a, rle_b = Mask(a).rle(), Mask(b).rle()
+
+        assert rle_a + rle_b == np.logical_or(a, b)
+        assert rle_a * rle_b == np.logical_and(a, b)
+        assert rle_a - rle_b == np.logical_and(a, ~b)
+        assert ~rle_a == ~a
+
+    @pytest.mark.parametrize("array_a,array_b,e_iou", test_iou)
+    def test_iou(self, array_a, array_b, e_iou):
+        rle_a = Mask([array_a]).rle()
+        rle_b = Mask([array_b]).rle()
+
+        assert rle_a.iou(rle_b) == e_iou
+        assert rle_b.iou(rle_a) == e_iou
+
+
+class TestRLEAnnotation:
+
+    def test_coco_crowd(self):
+        segmentation = {'size': [4, 4], 'counts': '52203'}
+        annotation = Annotation.from_rle(segmentation)
+        coco = annotation.coco(include=False)
+
+        assert annotation.size == (4, 4)
+        assert coco['iscrowd'] == 1
+        assert coco['area'] == 4
+        assert coco['bbox'] == (1, 1, 1, 1)
+        assert coco['segmentation'] == segmentation
@@ -0,0 +1,66 @@
+import pytest
+import numpy as np
+from imantics import Image, Annotation, Category, Polygons, SpatialIndex
+
+
+class TestSpatialIndex:
+
+    def create_image(self):
+        image = Image.empty(width=200, height=100)
+        category = Category('shape')
+
+        # Triangle in the top left corner of its bounding box (10, 10, 50, 50)
+        image.add(Annotation.from_polygons([[10, 10, 50, 10, 10, 50]], category=category))
+        image.add(Annotation.from_bbox([100, 20, 120, 40], category=category))
+        image.add(Annotation.from_bbox([150, 60, 190, 90], category=category))
+        return image
+
+    @pytest.mark.parametrize("cell_size", [1, 16, 64, 1000])
+    def test_query(self, cell_size):
+        image = self.create_image()
+        first, second, third = image.iter_annotations()
+        index = image.spatial_index(cell_size=cell_size)
+
+        assert index.query((0, 0, 200, 100)) == [first, second, third]
+        assert index.query((105, 0, 160, 70)) == [second, third]
+        assert index.query((60, 0, 90, 100)) == []
+
+        # Bottom right of the triangle's bounding box is empty
+        assert index.query((45, 45, 50, 50)) == [first]
+        assert index.query((45, 45, 50, 50), exact=True) == []
+
+    def test_at(self):
+        image = self.create_image()
+        first, second, _ = image.iter_annotations()
+        index = image.spatial_index()
+
+        assert index.at(15, 15) == [first]
+        assert index.at(45, 45) == []
+        assert index.at(45, 45, exact=False) == [first]
+        assert index.at(110, 30) == [second]
+
+    def test_nearest(self):
+        image = self.create_image()
+        first, second, third = image.iter_annotations()
+        index = image.spatial_index()
+
+        assert index.nearest(130, 30) == [second]
+        assert index.nearest(140, 70, count=2) == [third, second]
+        assert index.nearest(0, 0, count=5) == [first, second, third]
+
+    def test_incremental(self):
+        image = self.create_image()
+        index = image.spatial_index()
+        annotation = Annotation.from_bbox([60, 60, 70, 70], category=Category('shape'))
+
+        image.add(annotation)
+
+        assert image.spatial_index() is index
+        assert len(index) == 4
+        assert index.at(65, 65) == [annotation]
+
+    def test_empty(self):
+        index = SpatialIndex()
+
+        assert index.query((0, 0, 10, 10)) == []
+        assert index.nearest(0, 0) == []
@@ -0,0 +1,103 @@
+import gc
+import pytest
+import numpy as np
+from imantics import Annotation, Category, Dataset, Image, Mask, MaskStore
+
+
+def masks():
+    first = np.zeros((20, 30), dtype=bool)
+    first[2:8, 3:12] = True
+    second = np.zeros((20, 30), dtype=bool)
+    second[10:18, 20:28] = True
+    return Mask(first), Mask(second)
+
+
+class TestMaskStore:
+
+    def test_append(self, tmpdir):
+        path = str(tmpdir.join('masks.bin'))
+        with MaskStore(path, mode='w') as store:
+            stored = [store.append(mask) for mask in masks()]
+
+            assert len(store) == 2
+            for mask, original in zip(stored, masks()):
+                assert isinstance(mask.local, np.memmap)
+                assert mask == original
+
+    def test_cropped(self, tmpdir):
+        path = str(tmpdir.join('masks.bin'))
+        mask = masks()[0].crop()
+
+        with MaskStore(path, mode='w') as store:
+            stored = store.append(mask)
+
+        assert store.nbytes == mask.local.nbytes
+        assert stored.shape == (20, 30)
+        assert stored == masks()[0]
+
+    def test_reopen(self, tmpdir):
+        path = str(tmpdir.join('masks.bin'))
+        with MaskStore(path, mode='w') as store:
+            store.append(masks()[0])
+
+        with MaskStore(path, mode='a') as store:
+            store.append(masks()[1])
+
+        store = MaskStore(path, mode='r')
+        assert list(store) == list(masks())
+
+        with pytest.raises(IOError):
+            store.append(masks()[0])
+
+    def test_write_copies(self, tmpdir):
+        with MaskStore(str(tmpdir.join('masks.bin')), mode='w') as store:
+            mask = store.append(masks()[0])
+
+        mask[0, 0] = True
+
+        assert mask.array[0, 0]
+        assert not store[0].array[0, 0]
+
+    def test_mode(self, tmpdir):
+        with pytest.raises(ValueError):
+            MaskStore(str(tmpdir.join('masks.bin')), mode='x')
+
+
+class TestDatasetMasks:
+
+    def test_store_masks(self, tmpdir):
+        dataset = Dataset('store')
+        image = Image(width=30, height=20)
+
+        category = Category('thing')
+        first, second = masks()
+        image.add(Annotation(mask=first, category=category))
+        image.add(Annotation(bbox=[1, 1, 5, 5], category=category))
+        dataset.add(image)
+
+        store = dataset.store_masks(str(tmpdir.join('masks.bin')))
+        assert len(store) == 1
+
+        annotation = Annotation(image=image, mask=second, category=category)
+        dataset.add(annotation)
+        assert len(store) == 2
+
+        assert isinstance(annotation.mask.local, np.memmap)
+        assert annotation.mask == second
+        assert annotation.area == second.area()
+
+    def test_reopen_after_store_masks(self, tmpdir):
+        path = str(tmpdir.join('masks.bin'))
+        dataset = Dataset('store')
+        image = Image(width=30, height=20)
+        first, second = masks()
+        image.add(Annotation(mask=first, category=Category('thing')))
+        dataset.add(image)
+
+        dataset.store_masks(path)
+        dataset.add(Annotation(image=image, mask=second, category=Category('thing')))
+
+        del dataset, image
+        gc.collect()
+
+        assert list(MaskStore(path, mode='r')) == [first, second]